@@ -0,0 +1,135 @@
+"""Microbenchmarks for the list builtins.
+
+Each builtin is timed on inputs of doubling size, calling the handler
+directly so that parsing and the solver loop do not blur the numbers. The
+ratio column is the time against the previous size: about 2 means linear,
+slightly above 2 means n log n, and 4 or more means quadratic.
+
+    python BENCH/list_bench.py [--sizes 1000 2000 4000 8000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PARSER.ast import Struct, Variable  # noqa: E402
+from PARSER.Data.list import (  # noqa: E402
+    PrologList,
+    handle_list_append,
+    handle_list_length,
+    handle_list_permutation,
+    handle_memberchk,
+    handle_reverse,
+    handle_sort,
+    handle_subtract,
+)
+from PARSER.Data.ordset import handle_ord_subset  # noqa: E402
+
+
+def atom(name) -> Struct:
+    return Struct(str(name), 0, [])
+
+
+def ground_list(values) -> Struct:
+    return PrologList([atom(v) for v in values]).to_struct()
+
+
+def open_list(values) -> Struct:
+    # cons cells that keep one unbound element, so no ArrayList fast path
+    elements = [atom(v) for v in values]
+    elements[-1] = Variable("_Last")
+    return PrologList(elements).to_struct()
+
+
+def shuffled(n: int):
+    # deterministic permutation of range(n)
+    return [(i * 7919) % n for i in range(n)]
+
+
+def goal(name: str, *params) -> Struct:
+    return Struct(name, len(params), list(params))
+
+
+CASES = {
+    "append/3": lambda n: (
+        handle_list_append,
+        goal(
+            "append",
+            ground_list(range(n)),
+            ground_list(range(n)),
+            Variable("X"),
+        ),
+    ),
+    "length/2": lambda n: (
+        handle_list_length,
+        goal("length", open_list(range(n)), Variable("N")),
+    ),
+    "reverse/2": lambda n: (
+        handle_reverse,
+        goal("reverse", ground_list(range(n)), Variable("X")),
+    ),
+    "permutation/2": lambda n: (
+        handle_list_permutation,
+        goal("permutation", ground_list(range(n)), ground_list(shuffled(n))),
+    ),
+    "memberchk/2 (first)": lambda n: (
+        handle_memberchk,
+        goal("memberchk", atom(0), ground_list(range(n))),
+    ),
+    "memberchk/2 (last)": lambda n: (
+        handle_memberchk,
+        goal("memberchk", atom(n - 1), ground_list(range(n))),
+    ),
+    "sort/2": lambda n: (
+        handle_sort,
+        goal("sort", ground_list(shuffled(n)), Variable("X")),
+    ),
+    "subtract/3": lambda n: (
+        handle_subtract,
+        goal(
+            "subtract",
+            ground_list(range(n)),
+            ground_list(range(0, n, 2)),
+            Variable("X"),
+        ),
+    ),
+    "ord_subset/2": lambda n: (
+        handle_ord_subset,
+        goal("ord_subset", ground_list(range(0, n, 2)), ground_list(range(n))),
+    ),
+}
+
+
+def time_case(make, n: int, repeat: int) -> float:
+    handler, g = make(n)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        handler(g, [], {})
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 2000, 4000, 8000]
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'builtin':<22}{'n':>8}{'ms':>10}{'ratio':>8}")
+    for name, make in CASES.items():
+        previous = None
+        for n in args.sizes:
+            elapsed = time_case(make, n, args.repeat)
+            ratio = f"{elapsed / previous:.2f}" if previous else ""
+            print(f"{name:<22}{n:>8}{elapsed * 1000:>10.3f}{ratio:>8}")
+            previous = elapsed
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Load-time benchmark for the parser.
+
+A program of generated facts is parsed on its own with parse_string,
+loaded from a file the way main.py consults it, and loaded again from the
+clause cache the first load wrote. The facts mix Hangul and ASCII names,
+quoted atoms, strings, lists, nested terms and negative numbers. The ratio
+column is the time against the previous size, so about 2 means parsing
+stays linear in the size of the program.
+
+    python BENCH/parse_bench.py [--sizes 12500 25000 50000 100000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from CONSOLE.repl import parse_file_multiline  # noqa: E402
+from PARSER.Data.recorded import RecordedDB  # noqa: E402
+from PARSER.parser import parse_string  # noqa: E402
+from PARSER.serialize import cache_path  # noqa: E402
+from UTIL.debug import DebugState  # noqa: E402
+
+
+def fact(i: int) -> str:
+    return (
+        f"사실({i}, 이름_{i % 97}, 'Atom {i % 13}', \"문자열 {i}\", "
+        f"[{i % 7}, b, c|_꼬리], 점(f(g({i})), -{i % 5})).\n"
+    )
+
+
+def program_text(n: int) -> str:
+    return "".join(fact(i) for i in range(n))
+
+
+def time_parse(text: str) -> float:
+    start = time.perf_counter()
+    parse_string(text)
+    return time.perf_counter() - start
+
+
+def write_program(text: str) -> str:
+    with tempfile.NamedTemporaryFile(
+        "w", suffix=".kpl", encoding="utf-8", delete=False
+    ) as f:
+        f.write(text)
+    return f.name
+
+
+def remove_program(path: str) -> None:
+    for name in (path, cache_path(path)):
+        if os.path.exists(name):
+            os.unlink(name)
+
+
+def time_load(text: str) -> float:
+    path = write_program(text)
+    try:
+        start = time.perf_counter()
+        parse_file_multiline(path, DebugState(RecordedDB()))
+        return time.perf_counter() - start
+    finally:
+        remove_program(path)
+
+
+def time_cached_load(text: str) -> float:
+    # the first load writes the clause cache, the second reads it
+    path = write_program(text)
+    try:
+        parse_file_multiline(path, DebugState(RecordedDB()))
+        start = time.perf_counter()
+        parse_file_multiline(path, DebugState(RecordedDB()))
+        return time.perf_counter() - start
+    finally:
+        remove_program(path)
+
+
+CASES = {
+    "parse_string": time_parse,
+    "load file": time_load,
+    "load cached": time_cached_load,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[12500, 25000, 50000, 100000]
+    )
+    args = parser.parse_args()
+
+    print(f"{'case':<16}{'facts':>8}{'s':>10}{'ratio':>8}")
+    for name, run in CASES.items():
+        previous = None
+        for n in args.sizes:
+            elapsed = run(program_text(n))
+            ratio = f"{elapsed / previous:.2f}" if previous else ""
+            print(f"{name:<16}{n:>8}{elapsed:>10.3f}{ratio:>8}")
+            previous = elapsed
+
+
+if __name__ == "__main__":
+    main()
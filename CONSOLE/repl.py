@@ -1,7 +1,19 @@
-from typing import List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List, Optional, Tuple
 
 from PARSER.ast import Struct, Term
-from PARSER.parser import parse_string
+from PARSER.Data.fact_file import FACT_FILE_SUFFIX, attach_fact_file
+from PARSER.Data.recorded import RecordedDB
+from PARSER.Data.saved_state import load_state, save_state
+from PARSER.parser import clause_goals, iter_file_statements, parse_string
+from PARSER.serialize import (
+    ClauseCache,
+    decode_term,
+    source_digest,
+    statement_digest,
+)
+from SOLVER.database import FACT_TABLE_MIN, Database, clause_key
 from SOLVER.solver import solve
 from UTIL.debug import DebugState
 from UTIL.err import (
@@ -23,10 +35,14 @@ class Command:
 
 
 class Load(Command):
-    def __init__(self, path: str):
-        if "." not in path:
-            path += ".kpl"  # TODO hard coded right now
-        self.path = path
+    def __init__(self, paths: str):
+        # one file, or several separated by commas as in [a,b,c]
+        self.paths = []
+        for path in paths.strip().strip("[]").split(","):
+            path = path.strip()
+            if "." not in path:
+                path += ".kpl"  # TODO hard coded right now
+            self.paths.append(path)
 
 
 class Make(Command):
@@ -105,75 +121,225 @@ def parse_command(command: str) -> Command:
         return Query(command)
 
 
-def parse_file_multiline(filepath: str, debug_state) -> Tuple[List[List[Term]], List]:
+def is_directive(term: Term) -> bool:
+    return isinstance(term, Struct) and term.name == ":-" and term.arity == 1
+
+
+def load_directive(
+    term: Term, pending_goals: List[Term], debug_state: DebugState
+) -> None:
+    # initialization goals wait until the whole file is loaded, and so do
+    # external declarations, which need the program; any other directive
+    # runs as soon as it is read
+    directive = term.params[0]
+    if isinstance(directive, Struct) and (
+        directive.name == "initialization" or directive.name == "초기화"
+    ):
+        if len(directive.params) != 1:
+            raise ErrUnknownPredicate("", len(directive.params))
+        pending_goals.append(directive.params[0])
+    elif isinstance(directive, Struct) and (
+        directive.name == "external" or directive.name == "외부"
+    ):
+        pending_goals.append(directive)
+    else:
+        success, unifs = solve([], clause_goals(term), debug_state)
+        print_result(success, unifs)
+
+
+def load_source(
+    program: Database, filepath: str, debug_state: DebugState
+) -> List[Term]:
+    # Consults a file into the program and returns its initialization
+    # goals. An unchanged file is read back from its clause cache, leaving
+    # each predicate encoded until it is first called. Otherwise statements
+    # are parsed while the file is read, each clause goes into the clause
+    # store as soon as it is parsed, a predicate moves into a fact table once
+    # it is large enough, and the cache is written once loading is done. A
+    # fact table file is attached as it is, without reading it.
+    if filepath.endswith(FACT_FILE_SUFFIX):
+        attach_fact_file(program, filepath)
+        return []
+    digest = source_digest(filepath)
+    cache = ClauseCache.load(filepath, digest)
+    if cache is not None:
+        return register_source(program, filepath, cache, debug_state)
+
+    pending_goals = []
+    cache = ClauseCache(digest)
     with open(filepath, "r", encoding="utf-8") as f:
-        content = f.read()
+        for text, term in iter_file_statements(f):
+            if is_directive(term):
+                cache.add_directive(term)
+                load_directive(term, pending_goals, debug_state)
+            else:
+                clause = clause_goals(term)
+                key = clause_key(clause)
+                cache.add_clause(key, clause, statement_digest(text))
+                program.append(clause)
+                if len(program.predicates.get(key, ())) == FACT_TABLE_MIN:
+                    # from here on its facts go straight into the table
+                    program.compact(key)
+    program.sources[filepath] = cache
+    for key in cache.predicates:
+        program.compact(key)
+    cache.save(filepath)
+
+    return pending_goals
+
+
+def register_source(
+    program: Database,
+    filepath: str,
+    cache: ClauseCache,
+    debug_state: DebugState,
+) -> List[Term]:
+    # adds an already compiled file to the program, leaving each predicate
+    # encoded until it is first called, and runs its directives
     pending_goals = []
-    statements = []
-    current_statement = ""
-
-    i = 0
-    in_single_quote = False
-    in_double_quote = False
-
-    while i < len(content):
-        char = content[i]
-        if char == "%":
-            while i < len(content) and content[i] != "\n":
-                i += 1
-            continue
-
-        current_statement += char
-
-        # Track quote state
-        if char == "'" and not in_double_quote:
-            in_single_quote = not in_single_quote
-        elif char == '"' and not in_single_quote:
-            in_double_quote = not in_double_quote
-
-        # Only treat period as statement terminator if not inside quotes
-        if char == "." and not in_single_quote and not in_double_quote:
-            statement = current_statement.strip()
-            if statement:
-                statement = " ".join(statement.split())
-                if statement.startswith(":-"):
-                    directive_body = statement[2:].strip()
-                    goals = parse_string(directive_body)
-
-                    if (
-                        goals
-                        and isinstance(goals[0][0], Struct)
-                        and (
-                            goals[0][0].name == "initialization"
-                            or goals[0][0].name == "초기화"
-                        )
-                    ):
-                        if len(goals[0][0].params) != 1:
-                            raise ErrUnknownPredicate("", len(goals[0][0].params))
-                        init_goal = goals[0][0].params[0]
-                        pending_goals.append(init_goal)
-                    else:
-                        success, unifs = solve([], goals, debug_state)
-                        print_result(success, unifs)
+    program.sources[filepath] = cache
+    for key, clauses in cache.predicates.items():
+        program.add_encoded(key, clauses)
+    for data in cache.directives:
+        load_directive(
+            decode_term(data, program.atoms), pending_goals, debug_state
+        )
+    return pending_goals
+
+
+def compile_source(filepath: str) -> Optional[bytes]:
+    # Runs in a worker process: parses a file into its clause cache, writes
+    # the cache beside it and returns it marshalled. None when the file does
+    # not compile, so the caller loads it itself and reports the error.
+    try:
+        cache = ClauseCache(source_digest(filepath))
+        with open(filepath, "r", encoding="utf-8") as f:
+            for text, term in iter_file_statements(f):
+                if is_directive(term):
+                    cache.add_directive(term)
                 else:
-                    statements.append(statement)
-            current_statement = ""
+                    clause = clause_goals(term)
+                    cache.add_clause(
+                        clause_key(clause), clause, statement_digest(text)
+                    )
+        if not cache.complete:
+            return None
+        cache.save(filepath)
+        return cache.dumps()
+    except (ErrProlog, OSError, ValueError, RecursionError):
+        return None
+
+
+def compile_sources(filepaths: List[str], jobs: int) -> Dict[str, ClauseCache]:
+    # compiles the files in a pool of worker processes; a file that failed
+    # or could not be sent to a worker is left out
+    compiled = {}
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for filepath, data in zip(
+                filepaths, executor.map(compile_source, filepaths), strict=True
+            ):
+                cache = ClauseCache.loads(data) if data is not None else None
+                if cache is not None:
+                    compiled[filepath] = cache
+    except (OSError, BrokenProcessPool):
+        pass
+    return compiled
+
+
+def load_sources(
+    program: Database,
+    filepaths: List[str],
+    debug_state: DebugState,
+    jobs: int = 1,
+) -> List[Term]:
+    # Consults several files in order. With more than one job, the files
+    # whose cache is stale are parsed in parallel by worker processes and
+    # merged into the program in the order they were given, with their
+    # directives run file by file as if each had been loaded on its own.
+    caches = {}
+    if jobs > 1:
+        for filepath in filepaths:
+            if filepath.endswith(FACT_FILE_SUFFIX):
+                continue
+            caches[filepath] = ClauseCache.load(
+                filepath, source_digest(filepath)
+            )
+        stale = [f for f, cache in caches.items() if cache is None]
+        if len(stale) > 1:
+            caches.update(compile_sources(stale, min(jobs, len(stale))))
 
-        i += 1
+    pending_goals = []
+    for filepath in filepaths:
+        cache = caches.get(filepath)
+        if cache is not None:
+            pending_goals += register_source(
+                program, filepath, cache, debug_state
+            )
+        else:
+            pending_goals += load_source(program, filepath, debug_state)
+    return pending_goals
+
+
+def reload_source(
+    program: Database, filepath: str, debug_state: DebugState
+) -> List[Term]:
+    # Reloads an edited file in place. Statements whose text is unchanged
+    # are not parsed again, only predicates whose clauses differ are
+    # rebuilt, and the directives of the file run again.
+    old = program.sources.get(filepath)
+    digest = source_digest(filepath)
+    if old is None:
+        return load_source(program, filepath, debug_state)
+    if old.digest == digest:
+        return []
+
+    known = old.clauses_by_digest()
+    cache = ClauseCache(digest)
+    directives = []
+    with open(filepath, "r", encoding="utf-8") as f:
+        for text, term in iter_file_statements(
+            f, skip=lambda text: statement_digest(text) in known
+        ):
+            if term is None:
+                statement = statement_digest(text)
+                key, data = known[statement]
+                cache.add_encoded(key, data, statement)
+            elif is_directive(term):
+                cache.add_directive(term)
+                directives.append(term)
+            else:
+                clause = clause_goals(term)
+                cache.add_clause(
+                    clause_key(clause), clause, statement_digest(text)
+                )
 
-    if current_statement.strip():
-        raise ErrPeriod(f"'{current_statement.strip()}'")
+    program.sources[filepath] = cache
+    for key in old.predicates.keys() | cache.predicates.keys():
+        if old.digests.get(key) != cache.digests.get(key):
+            program.rebuild(key)
+    cache.save(filepath)
 
-    clauses = []
-    for statement in statements:
-        validate_clause_syntax(statement)
-        try:
-            parsed = parse_string(statement)
-            clauses.extend(parsed)
-        except Exception as e:
-            raise ErrSyntax(f"'{statement}': {e}") from e
+    pending_goals = []
+    for term in directives:
+        load_directive(term, pending_goals, debug_state)
+    return pending_goals
+
+
+def parse_file_multiline(
+    filepath: str, debug_state
+) -> Tuple[Database, List[Term]]:
+    program = Database()
+    pending_goals = load_source(program, filepath, debug_state)
+    return program, pending_goals
 
-    return clauses, pending_goals
+
+def parse_files(
+    filepaths: List[str], debug_state, jobs: int = 1
+) -> Tuple[Database, List[Term]]:
+    program = Database()
+    pending_goals = load_sources(program, filepaths, debug_state, jobs)
+    return program, pending_goals
 
 
 def execute_pending_initializations(
@@ -183,7 +349,11 @@ def execute_pending_initializations(
 ):
     for goal in pending_goals:
         try:
-            if isinstance(goal, Struct) and goal.name == "," and goal.arity == 2:
+            if (
+                isinstance(goal, Struct)
+                and goal.name == ","
+                and goal.arity == 2
+            ):
                 flattened_goals = flatten_comma_structure(goal)
 
                 # execute all goals as a sequence
@@ -215,12 +385,28 @@ def validate_clause_syntax(statement: str) -> None:
         raise ErrOperator(statement, False)
 
 
-def execute(program: List[List[Term]], input_file: str) -> None:
-    current_file = None
-    debug_state = DebugState()
-    if input_file != "":
-        program, pending = parse_file_multiline(input_file, debug_state)
+def execute(
+    program: List[List[Term]],
+    input_files: List[str],
+    jobs: int = 1,
+    state: Optional[str] = None,
+    save_to: Optional[str] = None,
+) -> None:
+    # Starts from a saved state when one is given, consults the input files
+    # on top of it, and either writes the result to save_to or runs the
+    # interactive loop.
+    current_files = list(input_files)
+    if state is not None:
+        program, debug_state = load_state(state)
+    else:
+        debug_state = DebugState(RecordedDB())
+        program = Database(program)
+    if input_files:
+        pending = load_sources(program, input_files, debug_state, jobs)
         execute_pending_initializations(program, pending, debug_state)
+    if save_to is not None:
+        save_state(save_to, program, debug_state)
+        return
     while True:
         try:
             if debug_state.trace_mode:
@@ -240,25 +426,31 @@ def execute(program: List[List[Term]], input_file: str) -> None:
             continue
 
         if isinstance(cmd, Load):
-            print(f"{cmd.path}에서 적재했습니다")
+            for path in cmd.paths:
+                print(f"{path}에서 적재했습니다")
             try:
-                current_file = cmd.path
-                program, pending = parse_file_multiline(cmd.path, debug_state)
+                current_files = cmd.paths
+                program, pending = parse_files(cmd.paths, debug_state, jobs)
                 execute_pending_initializations(program, pending, debug_state)
 
             except ErrProlog as e:
                 handle_error(e, "parsing")
-            except FileNotFoundError:
-                handle_error(ErrFileNotFound(cmd.path), "file loading")
+            except FileNotFoundError as e:
+                handle_error(ErrFileNotFound(e.filename), "file loading")
         elif isinstance(cmd, Make):
-            if current_file:
+            if current_files:
                 try:
-                    program, p = parse_file_multiline(current_file, debug_state)
-                    print(f"{current_file}에서 재적재했습니다")
+                    pending = []
+                    for path in current_files:
+                        pending += reload_source(program, path, debug_state)
+                        print(f"{path}에서 재적재했습니다")
+                    execute_pending_initializations(
+                        program, pending, debug_state
+                    )
                 except ErrProlog as e:
                     handle_error(e, "reloading")
-                except FileNotFoundError:
-                    handle_error(ErrFileNotFound(current_file), "reloading")
+                except FileNotFoundError as e:
+                    handle_error(ErrFileNotFound(e.filename), "reloading")
             else:
                 print("재적재할 파일리 없습니다")
         elif isinstance(cmd, Trace):
@@ -268,17 +460,20 @@ def execute(program: List[List[Term]], input_file: str) -> None:
             debug_state.trace_mode = False
             print("참.")
         elif isinstance(cmd, Listing):
-            if current_file:
+            if current_files:
                 try:
-                    with open(current_file, "r", encoding="utf-8") as f:
-                        for line in f:
-                            if (cmd.predicate_name == "none") or (
-                                cmd.predicate_name in line
-                            ):
-                                print(line, end="")
-                        print("")
-                except FileNotFoundError:
-                    handle_error(ErrFileNotFound(current_file), "listing")
+                    for path in current_files:
+                        if path.endswith(FACT_FILE_SUFFIX):
+                            continue
+                        with open(path, "r", encoding="utf-8") as f:
+                            for line in f:
+                                if (cmd.predicate_name == "none") or (
+                                    cmd.predicate_name in line
+                                ):
+                                    print(line, end="")
+                            print("")
+                except FileNotFoundError as e:
+                    handle_error(ErrFileNotFound(e.filename), "listing")
             else:
                 print("목록할 파일이 없읍니다")
         elif isinstance(cmd, Halt):
@@ -304,7 +499,8 @@ def execute(program: List[List[Term]], input_file: str) -> None:
                     new_clauses = parse_string(clause_str)
 
                     if e.assert_type == "asserta":
-                        program = new_clauses + program
+                        for clause in reversed(new_clauses):
+                            program.insert_first(clause)
 
                     print("참")
 
@@ -318,35 +514,35 @@ def execute(program: List[List[Term]], input_file: str) -> None:
                 continue
 
 
-def print_result(result: bool, unifications: List[dict]) -> None:
-    if all(not unif for unif in unifications):
+def print_result(result: bool, unifications: Iterable[dict]) -> None:
+    # answers may be lazy: each is computed only before it is printed
+    unifications = iter(unifications)
+    first_unification = next(unifications, None)
+    if not first_unification:
         if result is True:
             print("참")
         else:
             print("거짓")
     else:
         # Print first solution
-        if unifications:
-            first_unification = unifications[0]
-            for key, value in first_unification.items():
-                formatted_value = format_term(value)
-                print(f"{key} = {formatted_value}", end="")
-                if len(first_unification) > 1:
-                    print("")
-
-            # If there are more solutions, handle them interactively
-            for i in range(1, len(unifications)):
-                try:
-                    user_input = input()
-                    if user_input != ";":
-                        return
-                    # Print next solution
-                    unification = unifications[i]
-                    for key, value in unification.items():
-                        formatted_value = format_term(value)
-                        print(f"{key} = {formatted_value}", end="")
-                        if len(first_unification) > 1:
-                            print("")
-                except EOFError:
+        for key, value in first_unification.items():
+            formatted_value = format_term(value)
+            print(f"{key} = {formatted_value}", end="")
+            if len(first_unification) > 1:
+                print("")
+
+        # If there are more solutions, handle them interactively
+        for unification in unifications:
+            try:
+                user_input = input()
+                if user_input != ";":
                     return
-            print("")
+                # Print next solution
+                for key, value in unification.items():
+                    formatted_value = format_term(value)
+                    print(f"{key} = {formatted_value}", end="")
+                    if len(first_unification) > 1:
+                        print("")
+            except EOFError:
+                return
+        print("")
@@ -0,0 +1,260 @@
+import itertools
+from typing import Dict, List, Tuple
+
+from PARSER.ast import Struct, Term, Variable
+from PARSER.Data.compare import compare_terms, term_key
+from PARSER.Data.list import PrologList, extract_list
+from SOLVER.unification import match_params, substitute_term
+from UTIL.err import ErrType, ErrUninstantiated, ErrUnknownPredicate
+
+# AVL trees in the library(assoc) layout: t is the empty tree and
+# t(Key, Value, Balance, Left, Right) a node, where Balance is <, = or >
+# as the depth of Left is less than, equal to or greater than Right.
+# Nodes are ordinary terms, so every update builds a new path and the
+# old tree stays valid on backtracking.
+
+EMPTY = Struct("t", 0, [])
+LEFT_LOW = Struct("<", 0, [])
+EVEN = Struct("=", 0, [])
+LEFT_HIGH = Struct(">", 0, [])
+
+
+def is_assoc(term: Term) -> bool:
+    return (
+        isinstance(term, Struct) and term.name == "t" and term.arity in (0, 5)
+    )
+
+
+def make_node(key, value, balance, left, right) -> Struct:
+    return Struct("t", 5, [key, value, balance, left, right])
+
+
+def check_assoc(term: Term, context: str) -> Struct:
+    if isinstance(term, Variable):
+        raise ErrUninstantiated(term.name, context)
+    if not is_assoc(term):
+        raise ErrType(str(term), "연관")
+    return term
+
+
+def check_key(key: Term, context: str) -> Term:
+    if isinstance(key, Variable):
+        raise ErrUninstantiated(key.name, context)
+    return key
+
+
+def get_assoc(key: Term, tree: Struct):
+    while tree.arity == 5:
+        k, v, _, left, right = tree.params
+        c = compare_terms(key, k)
+        if c == 0:
+            return v
+        tree = left if c < 0 else right
+    return None
+
+
+def put_assoc(key: Term, tree: Struct, value: Term) -> Struct:
+    return _insert(tree, key, value)[0]
+
+
+def _insert(tree: Struct, key: Term, value: Term) -> Tuple[Struct, bool]:
+    # returns the new tree and whether its depth grew
+    if tree.arity == 0:
+        return make_node(key, value, EVEN, EMPTY, EMPTY), True
+
+    k, v, balance, left, right = tree.params
+    c = compare_terms(key, k)
+    if c == 0:
+        return make_node(k, value, balance, left, right), False
+
+    if c < 0:
+        new_left, grew = _insert(left, key, value)
+        if not grew:
+            return make_node(k, v, balance, new_left, right), False
+        if balance.name == "<":
+            return make_node(k, v, EVEN, new_left, right), False
+        if balance.name == "=":
+            return make_node(k, v, LEFT_HIGH, new_left, right), True
+        return _rotate_right(k, v, new_left, right), False
+
+    new_right, grew = _insert(right, key, value)
+    if not grew:
+        return make_node(k, v, balance, left, new_right), False
+    if balance.name == ">":
+        return make_node(k, v, EVEN, left, new_right), False
+    if balance.name == "=":
+        return make_node(k, v, LEFT_LOW, left, new_right), True
+    return _rotate_left(k, v, left, new_right), False
+
+
+def _rotate_right(k, v, left: Struct, right: Struct) -> Struct:
+    lk, lv, lb, ll, lr = left.params
+    if lb.name == ">":
+        return make_node(lk, lv, EVEN, ll, make_node(k, v, EVEN, lr, right))
+    mk, mv, mb, ml, mr = lr.params
+    new_left_balance = LEFT_HIGH if mb.name == "<" else EVEN
+    new_right_balance = LEFT_LOW if mb.name == ">" else EVEN
+    return make_node(
+        mk,
+        mv,
+        EVEN,
+        make_node(lk, lv, new_left_balance, ll, ml),
+        make_node(k, v, new_right_balance, mr, right),
+    )
+
+
+def _rotate_left(k, v, left: Struct, right: Struct) -> Struct:
+    rk, rv, rb, rl, rr = right.params
+    if rb.name == "<":
+        return make_node(rk, rv, EVEN, make_node(k, v, EVEN, left, rl), rr)
+    mk, mv, mb, ml, mr = rl.params
+    new_left_balance = LEFT_HIGH if mb.name == "<" else EVEN
+    new_right_balance = LEFT_LOW if mb.name == ">" else EVEN
+    return make_node(
+        mk,
+        mv,
+        EVEN,
+        make_node(k, v, new_left_balance, left, ml),
+        make_node(rk, rv, new_right_balance, mr, rr),
+    )
+
+
+def build_assoc(pairs: List[Tuple[Term, Term]]) -> Struct:
+    # pairs must be sorted by key without duplicates
+    def build(lo: int, hi: int) -> Tuple[Struct, int]:
+        if lo >= hi:
+            return EMPTY, 0
+        mid = (lo + hi) // 2
+        left, left_depth = build(lo, mid)
+        right, right_depth = build(mid + 1, hi)
+        if left_depth < right_depth:
+            balance = LEFT_LOW
+        elif left_depth > right_depth:
+            balance = LEFT_HIGH
+        else:
+            balance = EVEN
+        key, value = pairs[mid]
+        node = make_node(key, value, balance, left, right)
+        return node, max(left_depth, right_depth) + 1
+
+    return build(0, len(pairs))[0]
+
+
+def assoc_items(tree: Struct) -> List[Tuple[Term, Term]]:
+    # in-order traversal without recursion
+    items = []
+    stack = []
+    while stack or tree.arity == 5:
+        if tree.arity == 5:
+            stack.append(tree)
+            tree = tree.params[3]
+        else:
+            node = stack.pop()
+            items.append((node.params[0], node.params[1]))
+            tree = node.params[4]
+    return items
+
+
+def handle_empty_assoc(
+    goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 1:
+        raise ErrUnknownPredicate("빈연관", len(goal.params))
+
+    success, new_unif = match_params([goal.params[0]], [EMPTY], unif)
+    return success, rest_goals, [new_unif] if success else []
+
+
+def handle_put_assoc(
+    goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 4:
+        raise ErrUnknownPredicate("연관넣기", len(goal.params))
+
+    key, tree, value, result = [substitute_term(unif, p) for p in goal.params]
+    key = check_key(key, "연관넣기")
+    tree = check_assoc(tree, "연관넣기")
+
+    new_tree = put_assoc(key, tree, value)
+    success, new_unif = match_params([result], [new_tree], unif)
+    return success, rest_goals, [new_unif] if success else []
+
+
+def handle_get_assoc(
+    goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 3:
+        raise ErrUnknownPredicate("연관찾기", len(goal.params))
+
+    key, tree, value = [substitute_term(unif, p) for p in goal.params]
+    key = check_key(key, "연관찾기")
+    tree = check_assoc(tree, "연관찾기")
+
+    found = get_assoc(key, tree)
+    if found is None:
+        return False, [], []
+    success, new_unif = match_params([value], [found], unif)
+    return success, rest_goals, [new_unif] if success else []
+
+
+def handle_list_to_assoc(
+    goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 2:
+        raise ErrUnknownPredicate("리스트연관", len(goal.params))
+
+    pairs_term = substitute_term(unif, goal.params[0])
+    result = goal.params[1]
+
+    if isinstance(pairs_term, Variable):
+        raise ErrUninstantiated(pairs_term.name, "리스트연관")
+    elements = extract_list(pairs_term)
+    if elements is None:
+        raise ErrType(str(pairs_term), "리스트")
+
+    pairs = []
+    for element in elements:
+        if not (
+            isinstance(element, Struct)
+            and element.name == "-"
+            and element.arity == 2
+        ):
+            raise ErrType(str(element), "키-값 쌍")
+        key = check_key(element.params[0], "리스트연관")
+        pairs.append((key, element.params[1]))
+
+    pairs.sort(key=lambda pair: term_key(pair[0]))
+    for (k1, _), (k2, _) in itertools.pairwise(pairs):
+        if compare_terms(k1, k2) == 0:
+            raise ErrType(str(k1), "중복 없는 키")
+
+    success, new_unif = match_params([result], [build_assoc(pairs)], unif)
+    return success, rest_goals, [new_unif] if success else []
+
+
+def handle_assoc_to_list(
+    goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 2:
+        raise ErrUnknownPredicate("연관리스트", len(goal.params))
+
+    tree = check_assoc(substitute_term(unif, goal.params[0]), "연관리스트")
+    pairs = [Struct("-", 2, [k, v]) for k, v in assoc_items(tree)]
+
+    result_list = PrologList(pairs).to_struct()
+    success, new_unif = match_params([goal.params[1]], [result_list], unif)
+    return success, rest_goals, [new_unif] if success else []
+
+
+def handle_assoc_to_keys(
+    goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 2:
+        raise ErrUnknownPredicate("연관키", len(goal.params))
+
+    tree = check_assoc(substitute_term(unif, goal.params[0]), "연관키")
+    keys = [k for k, _ in assoc_items(tree)]
+
+    result_list = PrologList(keys).to_struct()
+    success, new_unif = match_params([goal.params[1]], [result_list], unif)
+    return success, rest_goals, [new_unif] if success else []
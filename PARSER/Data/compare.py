@@ -0,0 +1,136 @@
+from fractions import Fraction
+from functools import cmp_to_key
+from typing import Dict, List, Optional, Tuple, Union
+
+from PARSER.ast import Struct, Term, Variable
+from SOLVER.unification import match_params, substitute_term
+from UTIL.err import ErrType, ErrUnknownPredicate
+
+# standard order of terms: Var < Number < Atom < String < Compound
+VAR, NUMBER, ATOM, STRING, COMPOUND = range(5)
+
+
+def number_value(term: Term) -> Optional[Union[int, float, Fraction]]:
+    if not isinstance(term, Struct) or term.arity != 0:
+        return None
+    name = term.name
+    if not name or not (name[0].isdigit() or name[0] in "+-."):
+        return None
+    try:
+        return int(name)
+    except ValueError:
+        pass
+    if "r" in name:
+        # rationals are written NrD, e.g. 1r3
+        numerator, _, denominator = name.partition("r")
+        try:
+            return Fraction(int(numerator), int(denominator))
+        except (ValueError, ZeroDivisionError):
+            return None
+    try:
+        return float(name)
+    except ValueError:
+        return None
+
+
+def term_category(term: Term) -> int:
+    if isinstance(term, Variable):
+        return VAR
+    if term.arity > 0:
+        return COMPOUND
+    if number_value(term) is not None:
+        return NUMBER
+    if len(term.name) >= 2 and term.name[0] == term.name[-1] == '"':
+        return STRING
+    return ATOM
+
+
+def atom_text(name: str) -> str:
+    if len(name) >= 2 and name[0] == name[-1] and name[0] in "'\"":
+        return name[1:-1]
+    return name
+
+
+def _cmp(a, b) -> int:
+    return (a > b) - (a < b)
+
+
+def compare_terms(a: Term, b: Term) -> int:
+    # walks both terms with an explicit stack, so long lists do not recurse
+    stack = [(a, b)]
+    while stack:
+        x, y = stack.pop()
+        if x is y:
+            continue
+        cx, cy = term_category(x), term_category(y)
+        if cx != cy:
+            return _cmp(cx, cy)
+
+        if cx == VAR:
+            c = _cmp(x.name, y.name)
+        elif cx == NUMBER:
+            vx, vy = number_value(x), number_value(y)
+            c = _cmp(vx, vy)
+            if c == 0:
+                # 1.0 @< 1
+                c = _cmp(isinstance(vy, float), isinstance(vx, float))
+        elif cx == COMPOUND:
+            c = _cmp(x.arity, y.arity) or _cmp(x.name, y.name)
+            if c == 0:
+                stack.extend(
+                    zip(reversed(x.params), reversed(y.params), strict=True)
+                )
+        else:
+            c = _cmp(atom_text(x.name), atom_text(y.name)) or _cmp(
+                x.name, y.name
+            )
+        if c:
+            return c
+    return 0
+
+
+term_key = cmp_to_key(compare_terms)
+
+
+ORDER_ATOMS = {-1: "<", 0: "=", 1: ">"}
+
+TERM_ORDER_TESTS = {
+    "==": lambda c: c == 0,
+    "\\==": lambda c: c != 0,
+    "@<": lambda c: c < 0,
+    "@>": lambda c: c > 0,
+    "@=<": lambda c: c <= 0,
+    "@>=": lambda c: c >= 0,
+}
+
+
+def handle_compare(
+    goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 3:
+        raise ErrUnknownPredicate("비교", len(goal.params))
+
+    order = substitute_term(unif, goal.params[0])
+    if not isinstance(order, Variable) and order.name not in ("<", "=", ">"):
+        raise ErrType(str(order), "순서")
+
+    a = substitute_term(unif, goal.params[1])
+    b = substitute_term(unif, goal.params[2])
+    result = Struct(ORDER_ATOMS[compare_terms(a, b)], 0, [])
+
+    success, new_unif = match_params([order], [result], unif)
+    return success, rest_goals, [new_unif] if success else []
+
+
+def handle_term_order(
+    goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 2:
+        raise ErrUnknownPredicate(goal.name, len(goal.params))
+
+    a = substitute_term(unif, goal.params[0])
+    b = substitute_term(unif, goal.params[1])
+
+    if TERM_ORDER_TESTS[goal.name](compare_terms(a, b)):
+        return True, rest_goals, [unif]
+    return False, rest_goals, []
@@ -0,0 +1,217 @@
+import csv
+import itertools
+import re
+from typing import Callable, Dict, List, Tuple
+
+from PARSER.ast import Struct, Term, Variable
+from PARSER.Data.compare import atom_text
+from PARSER.Data.list import list_elements
+from SOLVER.database import Database
+from SOLVER.facts import FactTable
+from SOLVER.unification import substitute_term
+from UTIL.debug import DebugState
+from UTIL.err import (
+    ErrFileNotFound,
+    ErrSyntax,
+    ErrType,
+    ErrUninstantiated,
+    ErrUnknownPredicate,
+)
+
+# csv_load(File, Name, Options) reads a CSV or TSV file straight into facts
+# Name(Col1, ..., ColN), one per row, without going through the parser.
+# Fields become the terms the parser would read for them: numbers, plain
+# atoms, and quoted atoms for anything else. Equal values share one term.
+# Options:
+#   header(true)           skip the first row
+#   separator(C)           the field separator, by default a tab for
+#                          .tsv and .tab files and a comma otherwise
+#   types([T1, ..., TN])   auto, atom, integer, number or string per column
+#   index([I1, ...])       hash the facts on these columns, counted from 1
+
+PLAIN_ATOM = re.compile(r"[^\W\d_]\w*")
+INTEGER = re.compile(r"-?\d+")
+NUMBER = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?")
+
+TYPE_NAMES = {
+    "auto": "auto",
+    "자동": "auto",
+    "atom": "atom",
+    "상수": "atom",
+    "integer": "integer",
+    "정수": "integer",
+    "number": "number",
+    "수": "number",
+    "string": "string",
+    "문자열": "string",
+}
+
+TRUTH_NAMES = {"true": True, "참": True, "false": False, "거짓": False}
+
+
+class CsvOptions:
+    def __init__(self, path: str):
+        self.header = False
+        self.separator = "\t" if path.endswith((".tsv", ".tab")) else ","
+        self.types: List[str] = []
+        self.index: List[int] = []
+
+
+def atom_name(text: str) -> str:
+    if PLAIN_ATOM.fullmatch(text) and not text[0].isupper():
+        return text
+    return "'" + text.replace("'", "''") + "'"
+
+
+def field_name(text: str, kind: str) -> str:
+    # the name of the atom a field of the given type stands for
+    text = text.strip()
+    if kind == "string":
+        return '"' + text.replace('"', '""') + '"'
+    if kind != "atom" and INTEGER.fullmatch(text):
+        return str(int(text))
+    if kind in ("auto", "number") and NUMBER.fullmatch(text):
+        return text
+    if kind == "auto" or kind == "atom":
+        return atom_name(text)
+    raise ErrType(text, "정수" if kind == "integer" else "수")
+
+
+def field_converter(
+    kind: str, atoms: Dict[str, Struct]
+) -> Callable[[str], Struct]:
+    # remembers each field's term, so repeated values cost one lookup
+    seen: Dict[str, Struct] = {}
+
+    def convert(text: str) -> Struct:
+        term = seen.get(text)
+        if term is None:
+            name = field_name(text, kind)
+            term = atoms.get(name)
+            if term is None:
+                term = atoms[name] = Struct(name, 0, [])
+            seen[text] = term
+        return term
+
+    return convert
+
+
+def option_list(term: Term, context: str) -> List[Term]:
+    elements = list_elements(term)
+    if elements is None:
+        # a single value stands for a list of one
+        elements = [term]
+    for element in elements:
+        if isinstance(element, Variable):
+            raise ErrUninstantiated(element.name, context)
+    return elements
+
+
+def parse_options(options: Term, path: str) -> CsvOptions:
+    result = CsvOptions(path)
+    for option in option_list(options, "표적재"):
+        if not isinstance(option, Struct) or option.arity != 1:
+            raise ErrType(str(option), "표적재 옵션")
+        value = option.params[0]
+        if isinstance(value, Variable):
+            raise ErrUninstantiated(value.name, "표적재")
+        if option.name in ("header", "머리줄") and value.name in TRUTH_NAMES:
+            result.header = TRUTH_NAMES[value.name]
+        elif option.name in ("separator", "구분자"):
+            separator = atom_text(value.name).replace("\\t", "\t")
+            if len(separator) != 1:
+                raise ErrType(value.name, "한 글자 구분자")
+            result.separator = separator
+        elif option.name in ("types", "형식"):
+            for kind in option_list(value, "표적재"):
+                if kind.name not in TYPE_NAMES:
+                    raise ErrType(str(kind), "열 형식")
+                result.types.append(TYPE_NAMES[kind.name])
+        elif option.name in ("index", "색인"):
+            for column in option_list(value, "표적재"):
+                if not INTEGER.fullmatch(column.name):
+                    raise ErrType(str(column), "열 번호")
+                result.index.append(int(column.name))
+        else:
+            raise ErrType(str(option), "표적재 옵션")
+    return result
+
+
+def handle_csv_load(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 3:
+        raise ErrUnknownPredicate("표적재", len(goal.params))
+
+    file_term, name_term, options_term = [
+        substitute_term(unif, p) for p in goal.params
+    ]
+    for term in (file_term, name_term):
+        if isinstance(term, Variable):
+            raise ErrUninstantiated(term.name, "표적재")
+        if term.arity != 0:
+            raise ErrType(str(term), "원자")
+    if not isinstance(program, Database):
+        # a directive runs before the file's clauses are in place
+        raise ErrType(str(goal), "초기화 목표나 질의")
+
+    path = atom_text(file_term.name)
+    options = parse_options(options_term, path)
+
+    try:
+        f = open(path, "r", encoding="utf-8", newline="")
+    except FileNotFoundError as e:
+        raise ErrFileNotFound(path) from e
+    with f:
+        rows = csv.reader(f, delimiter=options.separator)
+        if options.header:
+            next(rows, None)
+        first = next((row for row in rows if row), None)
+        if first is None:
+            return True, rest_goals, [unif]
+
+        arity = len(first)
+        types = options.types or ["auto"] * arity
+        if len(types) != arity:
+            raise ErrType(f"{len(types)}개 형식", f"{arity}개 열")
+        for column in options.index:
+            if not 1 <= column <= arity:
+                raise ErrType(str(column), f"1부터 {arity}까지의 열 번호")
+
+        converters = [field_converter(kind, program.atoms) for kind in types]
+        name = name_term.name
+
+        # the rows are read into a table of their own, so a bad row leaves
+        # the program as it was
+        staged = FactTable(name, arity, program.symbols)
+        for row in itertools.chain([first], rows):
+            if not row:
+                continue
+            if len(row) != arity:
+                raise ErrSyntax(
+                    f"{len(row)}개 열, {arity}개가 필요합니다",
+                    rows.line_num,
+                )
+            staged.append(
+                [c(field) for c, field in zip(converters, row, strict=True)]
+            )
+
+        key = (name, arity)
+        definitions = (
+            program.predicates,
+            program.encoded,
+            program.tables,
+            program.externals,
+        )
+        if any(key in d for d in definitions):
+            program.extend(key, staged.all_rows())
+        else:
+            program.attach(key, staged)
+        for column in options.index:
+            program.add_index(key, column - 1)
+
+    return True, rest_goals, [unif]
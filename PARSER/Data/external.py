@@ -0,0 +1,194 @@
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple, Union
+
+from PARSER.ast import Struct, Term, Variable
+from PARSER.Data.compare import atom_text
+from PARSER.Data.csv_import import INTEGER, NUMBER, atom_name
+from PARSER.Data.fact_file import (
+    check_program,
+    file_argument,
+    predicate_indicator,
+)
+from SOLVER.unification import match_params, substitute_term
+from UTIL.debug import DebugState
+from UTIL.err import (
+    ErrFileNotFound,
+    ErrType,
+    ErrUninstantiated,
+    ErrUnknownPredicate,
+)
+
+# external(Name/Arity, sqlite(File, Table)) declares that the facts of
+# Name/Arity are the rows of Table in the SQLite database File, which is
+# opened read-only and never loaded. A call becomes a query whose WHERE
+# clause holds the arguments the call binds, so SQLite answers it through
+# the table's own indexes on those columns, and rows are read from the
+# cursor one at a time as execution backtracks into the call.
+#
+# Values become the terms csv_load would read for them: integers and
+# reals are numbers, text is an atom, quoted when it needs to be, and NULL
+# is the atom '$null$'.
+
+NULL_ATOM = "'$null$'"
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def sql_value(term: Struct):
+    # the value an atom stands for in the database
+    name = term.name
+    if INTEGER.fullmatch(name):
+        return int(name)
+    if NUMBER.fullmatch(name):
+        return float(name)
+    if name[0] == "'":
+        return atom_text(name).replace("''", "'")
+    if name[0] == '"':
+        return atom_text(name).replace('""', '"')
+    return name
+
+
+class SqliteTable:
+    def __init__(
+        self, arity: int, path: str, table: str, atoms: Dict[str, Struct]
+    ):
+        if not os.path.isfile(path):
+            raise ErrFileNotFound(path)
+        uri = Path(path).absolute().as_uri() + "?mode=ro"
+        self.connection = sqlite3.connect(uri, uri=True)
+        try:
+            columns = [
+                row[1]
+                for row in self.connection.execute(
+                    f"PRAGMA table_info({quote_identifier(table)})"
+                )
+            ]
+        except sqlite3.DatabaseError as e:
+            raise ErrType(path, "SQLite 데이터베이스") from e
+        if not columns:
+            raise ErrType(table, "SQLite 테이블")
+        if len(columns) != arity:
+            raise ErrType(f"{len(columns)}개 열", f"{arity}개 열")
+
+        self.path = path
+        self.table = table
+        self.columns = [quote_identifier(c) for c in columns]
+        self.select = (
+            f"SELECT {', '.join(self.columns)} FROM {quote_identifier(table)}"
+        )
+        self.atoms = atoms
+        # the query for each shape of call
+        self.queries: Dict[Tuple[Tuple[int, Union[str, int]], ...], str] = {}
+
+    def query(self, shape: Tuple[Tuple[int, Union[str, int]], ...]) -> str:
+        # shape holds a condition per constrained column: "=" for a value,
+        # "null" for NULL, or the earlier column sharing its variable
+        query = self.queries.get(shape)
+        if query is None:
+            conditions = []
+            for position, condition in shape:
+                column = self.columns[position]
+                if condition == "=":
+                    conditions.append(f"{column} = ?")
+                elif condition == "null":
+                    conditions.append(f"{column} IS NULL")
+                else:
+                    conditions.append(f"{column} IS {self.columns[condition]}")
+            query = self.select
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            self.queries[shape] = query
+        return query
+
+    def term(self, value) -> Struct:
+        if value is None:
+            name = NULL_ATOM
+        elif isinstance(value, str):
+            name = atom_name(value)
+        elif isinstance(value, (int, float)):
+            name = repr(value)
+        else:
+            raise ErrType(repr(value), "수나 문자열 값")
+        # rows are not interned, as a table may be larger than memory
+        return self.atoms.get(name) or Struct(name, 0, [])
+
+    def solutions(
+        self, goal: Struct, unif: Dict[str, Term]
+    ) -> Iterator[Dict[str, Term]]:
+        shape = []
+        values = []
+        variables: Dict[str, int] = {}
+        for position, arg in enumerate(goal.params):
+            while isinstance(arg, Variable) and arg.name in unif:
+                arg = unif[arg.name]
+            if isinstance(arg, Variable):
+                if arg.name in variables:
+                    shape.append((position, variables[arg.name]))
+                else:
+                    variables[arg.name] = position
+            elif arg.arity > 0:
+                # every value in the table is an atom
+                return iter(())
+            elif arg.name == NULL_ATOM:
+                shape.append((position, "null"))
+            else:
+                shape.append((position, "="))
+                values.append(sql_value(arg))
+
+        try:
+            cursor = self.connection.execute(self.query(tuple(shape)), values)
+        except sqlite3.DatabaseError as e:
+            raise ErrType(str(goal), "SQLite 질의") from e
+        return self.unify_rows(goal.params, cursor, unif)
+
+    def unify_rows(
+        self, params: List[Term], cursor, unif: Dict[str, Term]
+    ) -> Iterator[Dict[str, Term]]:
+        term = self.term
+        for row in cursor:
+            success, new_unif = match_params(
+                params, [term(value) for value in row], unif
+            )
+            if success:
+                yield new_unif
+
+
+def external_source(
+    spec: Term, arity: int, atoms: Dict[str, Struct]
+) -> SqliteTable:
+    if isinstance(spec, Variable):
+        raise ErrUninstantiated(spec.name, "외부")
+    if spec.name != "sqlite" or spec.arity != 2:
+        raise ErrType(str(spec), "sqlite(파일, 테이블)")
+    path = file_argument(spec.params[0], "외부")
+    table = spec.params[1]
+    if isinstance(table, Variable):
+        raise ErrUninstantiated(table.name, "외부")
+    if table.arity != 0:
+        raise ErrType(str(table), "테이블 이름")
+    return SqliteTable(arity, path, atom_text(table.name), atoms)
+
+
+def handle_external(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    # external(Name/Arity, sqlite(File, Table))
+    if len(goal.params) != 2:
+        raise ErrUnknownPredicate("외부", len(goal.params))
+    check_program(program, goal)
+
+    indicator, spec = [substitute_term(unif, p) for p in goal.params]
+    name, arity = predicate_indicator(indicator, "외부")
+    if arity == 0:
+        raise ErrType(str(indicator), "인수가 있는 술어")
+    source = external_source(spec, arity, program.atoms)
+    program.add_external((name, arity), source.solutions)
+    return True, rest_goals, [unif]
@@ -0,0 +1,317 @@
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from PARSER.ast import Struct, Term, Variable
+from PARSER.Data.compare import atom_text
+from PARSER.serialize import decode_term, encode_term
+from SOLVER.database import Database
+from SOLVER.facts import ColumnTable, FactTable, SymbolTable, is_fact
+from SOLVER.unification import substitute_term
+from UTIL.debug import DebugState
+from UTIL.err import (
+    ErrFileNotFound,
+    ErrType,
+    ErrUninstantiated,
+    ErrUnknownPredicate,
+)
+
+# A fact table file (.kft) holds one predicate of ground facts laid out so
+# it can be mapped read-only and queried where it lies: attaching reads the
+# header and nothing else, and processes mapping the same file share its
+# pages. After the header, each section starting on an 8-byte boundary:
+#
+#   symbol offsets   u64 x (symbols + 1)   where each symbol's bytes start
+#   symbol slots     u32 x slots           open-addressed hash of the
+#                                          symbols, 0 or symbol id + 1
+#   columns          i32 x rows, per argument, the symbol of each fact
+#   indexes          per argument, u32 x (symbols + 1) bucket starts and
+#                    u32 x rows, the rows grouped by symbol in row order
+#   symbol bytes     each symbol's term as marshal version 2 data of its
+#                    clause cache encoding (see serialize.py), with every
+#                    proper list stored flat
+#
+# Numbers are in the byte order of the machine that wrote the file, which
+# the header records.
+
+FACT_FILE_SUFFIX = ".kft"
+MAGIC = b"KPLFACTS"
+FILE_VERSION = 2
+HEADER = struct.Struct("<8sIIQQQI")  # magic, version, arity, rows,
+#                                      symbols, slots, name length
+BYTE_ORDERS = {"little": 0, "big": 1}
+
+
+def flat_lists(data):
+    # An encoded term with each list flat. A list built from cons cells,
+    # or ending in an ArrayList, is encoded in parts, so an equal ArrayList
+    # would otherwise give different bytes.
+    kind = type(data)
+    if kind is str:
+        return data
+    if kind is list:
+        return [flat_lists(d) for d in data]
+    if data[0] is None:
+        tail = flat_lists(data[1])
+        elements = [flat_lists(d) for d in data[2:]]
+        if tail == "[]":
+            return elements
+        if type(tail) is list:
+            return elements + tail
+        return (None, tail, *elements)
+    return (data[0], *[flat_lists(d) for d in data[1:]])
+
+
+def symbol_bytes(term: Term) -> bytes:
+    # version 2 never shares repeated objects, so equal terms always give
+    # equal bytes
+    return marshal.dumps(flat_lists(encode_term(term)), 2)
+
+
+def symbol_hash(data) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest())
+
+
+def aligned(size: int) -> int:
+    return (size + 7) & ~7
+
+
+def hash_slots(blobs: List[bytes]) -> array:
+    size = 8
+    while size < 2 * len(blobs):
+        size *= 2
+    slots = array("I", bytes(4 * size))
+    for symbol, blob in enumerate(blobs):
+        slot = symbol_hash(blob) & (size - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (size - 1)
+        slots[slot] = symbol + 1
+    return slots
+
+
+def column_index(column: Sequence[int], symbols: int) -> Tuple[array, array]:
+    # a counting sort of the rows by symbol, stable so each bucket keeps
+    # source order
+    starts = array("I", bytes(4 * (symbols + 1)))
+    for symbol in column:
+        starts[symbol + 1] += 1
+    for symbol in range(symbols):
+        starts[symbol + 1] += starts[symbol]
+    rows = array("I", bytes(4 * len(column)))
+    filled = array("I", starts[:-1])
+    for row, symbol in enumerate(column):
+        rows[filled[symbol]] = row
+        filled[symbol] += 1
+    return starts, rows
+
+
+def write_fact_file(path: str, table: FactTable) -> None:
+    # the table is written with its own symbols, numbered from 0
+    local = FactTable(table.name, table.arity, SymbolTable())
+    for row in range(len(table)):
+        local.append(table.clause(row)[0].params)
+
+    blobs = [symbol_bytes(term) for term in local.symbols.terms]
+    offsets = array("Q", [0])
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+    slots = hash_slots(blobs)
+    name = table.name.encode()
+
+    sections = [offsets, slots]
+    sections += [array("i", column) for column in local.columns]
+    for column in local.columns:
+        sections += column_index(column, len(blobs))
+
+    temp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp, "wb") as f:
+            header = HEADER.pack(
+                MAGIC,
+                FILE_VERSION | BYTE_ORDERS[sys.byteorder] << 16,
+                table.arity,
+                len(local),
+                len(blobs),
+                len(slots),
+                len(name),
+            )
+            f.write(header + name)
+            for section in sections:
+                f.write(bytes(aligned(f.tell()) - f.tell()))
+                section.tofile(f)
+            f.write(bytes(aligned(f.tell()) - f.tell()))
+            for blob in blobs:
+                f.write(blob)
+        os.replace(temp, path)
+    finally:
+        if os.path.exists(temp):
+            os.remove(temp)
+
+
+class MappedFactTable(ColumnTable):
+    # a fact table file mapped into memory; read-only, so asserting into
+    # its predicate turns it back into clauses first
+
+    def __init__(self, path: str, atoms: Dict[str, Struct]):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.map)
+        try:
+            magic, version, arity, rows, symbols, slots, name_length = (
+                HEADER.unpack_from(view)
+            )
+        except struct.error:
+            raise ErrType(path, "사실표 파일") from None
+        if (
+            magic != MAGIC
+            or version != FILE_VERSION | BYTE_ORDERS[sys.byteorder] << 16
+        ):
+            raise ErrType(path, "사실표 파일")
+
+        position = HEADER.size
+        self.name = bytes(view[position : position + name_length]).decode()
+        self.arity = arity
+        self.atoms = atoms
+        self.decoded: Dict[int, Term] = {}
+        position += name_length
+
+        def section(kind: str, count: int) -> memoryview:
+            nonlocal position
+            start = aligned(position)
+            position = start + count * array(kind).itemsize
+            return view[start:position].cast(kind)
+
+        self.offsets = section("Q", symbols + 1)
+        self.slots = section("I", slots)
+        self.columns = [section("i", rows) for _ in range(arity)]
+        self.indexes = [
+            (section("I", symbols + 1), section("I", rows))
+            for _ in range(arity)
+        ]
+        self.blob = view[aligned(position) :]
+
+    def symbol_data(self, symbol: int) -> memoryview:
+        return self.blob[self.offsets[symbol] : self.offsets[symbol + 1]]
+
+    def find_symbol(self, term: Term) -> Optional[int]:
+        try:
+            data = symbol_bytes(term)
+        except (ValueError, RecursionError):
+            return None
+        mask = len(self.slots) - 1
+        slot = symbol_hash(data) & mask
+        while self.slots[slot]:
+            symbol = self.slots[slot] - 1
+            if self.symbol_data(symbol) == data:
+                return symbol
+            slot = (slot + 1) & mask
+        return None
+
+    def term(self, symbol: int) -> Term:
+        term = self.decoded.get(symbol)
+        if term is None:
+            data = marshal.loads(self.symbol_data(symbol))
+            term = self.decoded[symbol] = decode_term(data, self.atoms)
+        return term
+
+    def bucket(self, position: int, symbol: int) -> Sequence[int]:
+        starts, rows = self.indexes[position]
+        return rows[starts[symbol] : starts[symbol + 1]]
+
+    def index(self, position: int) -> None:
+        # every column's index was written with the file
+        pass
+
+
+def attach_fact_file(program: Database, path: str) -> Tuple[str, int]:
+    try:
+        table = MappedFactTable(path, program.atoms)
+    except FileNotFoundError as e:
+        raise ErrFileNotFound(path) from e
+    except ValueError:
+        # an empty file cannot be mapped
+        raise ErrType(path, "사실표 파일") from None
+    program.attach((table.name, table.arity), table)
+    return table.name, table.arity
+
+
+def predicate_indicator(term: Term, context: str) -> Tuple[str, int]:
+    if isinstance(term, Variable):
+        raise ErrUninstantiated(term.name, context)
+    if (
+        term.name != "/"
+        or term.arity != 2
+        or isinstance(term.params[0], Variable)
+        or term.params[0].arity != 0
+        or not term.params[1].name.isdigit()
+    ):
+        raise ErrType(str(term), "술어 지시자")
+    return term.params[0].name, int(term.params[1].name)
+
+
+def file_argument(term: Term, context: str) -> str:
+    if isinstance(term, Variable):
+        raise ErrUninstantiated(term.name, context)
+    if term.arity != 0:
+        raise ErrType(str(term), "파일 이름")
+    return atom_text(term.name)
+
+
+def check_program(program, goal: Struct) -> None:
+    if not isinstance(program, Database):
+        # a directive runs before the file's clauses are in place
+        raise ErrType(str(goal), "초기화 목표나 질의")
+
+
+def handle_fact_table_save(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    # fact_table_save(Name/Arity, File)
+    if len(goal.params) != 2:
+        raise ErrUnknownPredicate("사실표저장", len(goal.params))
+    check_program(program, goal)
+
+    indicator, file_term = [substitute_term(unif, p) for p in goal.params]
+    name, arity = predicate_indicator(indicator, "사실표저장")
+    path = file_argument(file_term, "사실표저장")
+    if arity == 0:
+        raise ErrType(str(indicator), "인수가 있는 술어")
+
+    table = FactTable(name, arity, SymbolTable())
+    for clause in program.clauses(name, arity):
+        if not is_fact(clause):
+            # a table only holds ground facts, so nv(X, 1) cannot be saved
+            raise ErrType(str(clause[0]), "변수 없는 사실")
+        table.append(clause[0].params)
+    try:
+        write_fact_file(path, table)
+    except (OSError, ValueError) as e:
+        raise ErrFileNotFound(path) from e
+    return True, rest_goals, [unif]
+
+
+def handle_fact_table_attach(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    # fact_table_attach(File)
+    if len(goal.params) != 1:
+        raise ErrUnknownPredicate("사실표연결", len(goal.params))
+    check_program(program, goal)
+
+    path = file_argument(substitute_term(unif, goal.params[0]), "사실표연결")
+    attach_fact_file(program, path)
+    return True, rest_goals, [unif]
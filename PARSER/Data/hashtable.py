@@ -0,0 +1,225 @@
+from typing import Dict, List, Tuple
+
+from PARSER.ast import Struct, Term, Variable, is_ground
+from PARSER.Data.list import PrologList
+from SOLVER.unification import match_params, substitute_term
+from UTIL.debug import DebugState
+from UTIL.err import ErrType, ErrUninstantiated, ErrUnknownPredicate
+
+# Hash tables live in debug_state.hash_tables and are reached through a
+# '$ht'(Id) handle, so they survive across goals. Keys must be ground and
+# are hashed with Struct's cached structural hash. ht_put/ht_del are undone
+# when execution backtracks past them; nb_ht_put/nb_ht_del are destructive.
+
+_MISSING = object()
+
+
+def get_table(handle: Term, debug_state: DebugState, context: str) -> Dict:
+    if isinstance(handle, Variable):
+        raise ErrUninstantiated(handle.name, context)
+    table = None
+    if (
+        isinstance(handle, Struct)
+        and handle.name == "$ht"
+        and handle.arity == 1
+        and handle.params[0].name.isdigit()
+    ):
+        table = debug_state.hash_tables.get(int(handle.params[0].name))
+    if table is None:
+        raise ErrType(str(handle), "해시 테이블")
+    return table
+
+
+def check_key(key: Term, context: str) -> Term:
+    # a partially bound key would hash differently once bound further, so
+    # it is an instantiation error rather than a silent miss
+    if not is_ground(key):
+        raise ErrUninstantiated(str(key), context)
+    return key
+
+
+def set_entry(
+    table: Dict, key: Term, value, debug_state: DebugState, trailed: bool
+) -> None:
+    old = table.get(key, _MISSING)
+    if value is _MISSING:
+        del table[key]
+    else:
+        table[key] = value
+    if trailed:
+        debug_state.trail.append(lambda: restore_entry(table, key, old))
+
+
+def restore_entry(table: Dict, key: Term, old) -> None:
+    if old is _MISSING:
+        table.pop(key, None)
+    else:
+        table[key] = old
+
+
+def handle_ht_new(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 1:
+        raise ErrUnknownPredicate("해시생성", len(goal.params))
+
+    table_id = len(debug_state.hash_tables) + 1
+    debug_state.hash_tables[table_id] = {}
+    handle = Struct("$ht", 1, [Struct(str(table_id), 0, [])])
+
+    success, new_unif = match_params([goal.params[0]], [handle], unif)
+    return success, rest_goals, [new_unif] if success else []
+
+
+def put_entry(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    debug_state: DebugState,
+    trailed: bool,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 3:
+        raise ErrUnknownPredicate(goal.name, len(goal.params))
+
+    handle, key, value = [substitute_term(unif, p) for p in goal.params]
+    table = get_table(handle, debug_state, goal.name)
+    key = check_key(key, goal.name)
+
+    set_entry(table, key, value, debug_state, trailed)
+    return True, rest_goals, [unif]
+
+
+def delete_entry(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    debug_state: DebugState,
+    trailed: bool,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 3:
+        raise ErrUnknownPredicate(goal.name, len(goal.params))
+
+    handle, key, value = [substitute_term(unif, p) for p in goal.params]
+    table = get_table(handle, debug_state, goal.name)
+    key = check_key(key, goal.name)
+
+    old = table.get(key, _MISSING)
+    if old is _MISSING:
+        return False, [], []
+    success, new_unif = match_params([value], [old], unif)
+    if not success:
+        return False, [], []
+
+    set_entry(table, key, _MISSING, debug_state, trailed)
+    return True, rest_goals, [new_unif]
+
+
+def handle_ht_put(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    return put_entry(goal, rest_goals, unif, debug_state, trailed=True)
+
+
+def handle_nb_ht_put(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    return put_entry(goal, rest_goals, unif, debug_state, trailed=False)
+
+
+def handle_ht_del(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    return delete_entry(goal, rest_goals, unif, debug_state, trailed=True)
+
+
+def handle_nb_ht_del(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    return delete_entry(goal, rest_goals, unif, debug_state, trailed=False)
+
+
+def handle_ht_get(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 3:
+        raise ErrUnknownPredicate("해시찾기", len(goal.params))
+
+    handle, key, value = [substitute_term(unif, p) for p in goal.params]
+    table = get_table(handle, debug_state, "해시찾기")
+
+    # an unbound key enumerates every entry
+    if isinstance(key, Variable):
+        all_solutions = []
+        for k, v in list(table.items()):
+            success, new_unif = match_params([key, value], [k, v], unif)
+            if success:
+                all_solutions.append(new_unif)
+        return len(all_solutions) > 0, rest_goals, all_solutions
+
+    key = check_key(key, "해시찾기")
+    found = table.get(key, _MISSING)
+    if found is _MISSING:
+        return False, [], []
+    success, new_unif = match_params([value], [found], unif)
+    return success, rest_goals, [new_unif] if success else []
+
+
+def handle_ht_pairs(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 2:
+        raise ErrUnknownPredicate("해시쌍들", len(goal.params))
+
+    handle = substitute_term(unif, goal.params[0])
+    table = get_table(handle, debug_state, "해시쌍들")
+
+    pairs = [Struct("-", 2, [k, v]) for k, v in table.items()]
+    result_list = PrologList(pairs).to_struct()
+    success, new_unif = match_params([goal.params[1]], [result_list], unif)
+    return success, rest_goals, [new_unif] if success else []
+
+
+def handle_ht_size(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 2:
+        raise ErrUnknownPredicate("해시크기", len(goal.params))
+
+    handle = substitute_term(unif, goal.params[0])
+    table = get_table(handle, debug_state, "해시크기")
+
+    size = Struct(str(len(table)), 0, [])
+    success, new_unif = match_params([goal.params[1]], [size], unif)
+    return success, rest_goals, [new_unif] if success else []
@@ -1,5 +1,6 @@
 import itertools
-from typing import Dict, List, Tuple
+from collections import Counter
+from typing import Dict, Iterator, List, Tuple
 
 from UTIL.err import (
     ErrInfiniteGeneration,
@@ -8,7 +9,8 @@ from UTIL.err import (
     ErrUninstantiated,
     ErrUnknownPredicate,
 )
-from PARSER.ast import Struct, Term, Variable
+from PARSER.ast import ArrayList, Struct, Term, Variable, is_ground
+from PARSER.Data.compare import compare_terms, term_key
 from SOLVER.unification import match_params, substitute_term
 
 
@@ -24,6 +26,10 @@ class PrologList(Term):
             else:
                 return self.tail
 
+        # proper ground lists stay flat; see ArrayList
+        if self.tail is None and all(is_ground(e) for e in self.elements):
+            return ArrayList(tuple(self.elements))
+
         result = self.tail if self.tail else Struct("[]", 0, [])
 
         for element in reversed(self.elements):
@@ -44,6 +50,54 @@ class PrologList(Term):
         return result
 
 
+def split_list(term: Term) -> Tuple[List[Term], Term]:
+    # elements of the leading cons cells, and the term that ends them
+    # ([] for a proper list, a variable for a partial one)
+    elements = []
+    while True:
+        if isinstance(term, ArrayList):
+            elements.extend(term.elements())
+            return elements, Struct("[]", 0, [])
+        if not is_list_cons(term):
+            return elements, term
+        elements.append(term.params[0])
+        term = term.params[1]
+
+
+def list_suffix(term: Term, n: int) -> Term:
+    # the tail of a proper list after its first n elements
+    while n > 0:
+        if isinstance(term, ArrayList):
+            if n < len(term):
+                return ArrayList(term.items, term.start + n)
+            return Struct("[]", 0, [])
+        term = term.params[1]
+        n -= 1
+    return term
+
+
+def append_splits(
+    end: Term,
+    l2: Term,
+    whole: List[Term],
+    start: int,
+    l3: Term,
+    unif: Dict[str, Term],
+) -> Iterator[Dict[str, Term]]:
+    # The open end of the first list takes each run of elements from start
+    # on and the second list the rest of the third. The rest is advanced a
+    # cell per split, and each run is built only when execution backtracks
+    # for it.
+    back = list_suffix(l3, start)
+    for i in range(start, len(whole) + 1):
+        front = PrologList(whole[start:i]).to_struct()
+        success, new_unif = match_params([end, l2], [front, back], unif)
+        if success:
+            yield new_unif
+        if i < len(whole):
+            back = list_suffix(back, 1)
+
+
 def handle_list_append(
     goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
 ) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
@@ -55,10 +109,27 @@ def handle_list_append(
     l2 = substitute_term(unif, l2)
     l3 = substitute_term(unif, l3)
 
-    if is_empty_list(l1):
-        success, new_unif = match_params([l2], [l3], unif)
+    prefix, end = split_list(l1)
+
+    # proper first list: build the whole result in one step, consing the
+    # prefix onto l2 so the second list is shared rather than copied
+    if is_empty_list(end):
+        result = PrologList(prefix, l2).to_struct()
+        success, new_unif = match_params([l3], [result], unif)
         return success, rest_goals, [new_unif] if success else []
 
+    # partial first list against a proper third list: enumerate the splits
+    whole, whole_end = split_list(l3)
+    if is_empty_list(whole_end):
+        if len(prefix) > len(whole):
+            return False, rest_goals, []
+        success, new_unif = match_params(prefix, whole[: len(prefix)], unif)
+        if not success:
+            return False, rest_goals, []
+        splits = append_splits(end, l2, whole, len(prefix), l3, new_unif)
+        return True, rest_goals, splits
+
+    # both open: step one cell at a time as the relational definition does
     if is_list_cons(l1):
         head1, tail1 = get_head_tail(l1)
 
@@ -127,6 +198,8 @@ def count_list_length(list_term: Term) -> int:
         raise ErrList()
 
     while True:
+        if isinstance(list_term, ArrayList):
+            return count + len(list_term)
         if isinstance(list_term, Struct):
             if list_term.name == "[]":
                 return count
@@ -160,11 +233,12 @@ def handle_list_permutation(
         list1_extr = extract_list(list1)
         list2_extr = extract_list(list2)
 
+        # both bound: a permutation is the same multiset of elements
         if list1_extr is not None and list2_extr is not None:
-            permutations = list(itertools.permutations(list1_extr))
-            for permutation in permutations:
-                if list2_extr == list(permutation):
-                    return True, rest_goals, [unif]
+            if len(list1_extr) == len(list2_extr) and Counter(
+                list1_extr
+            ) == Counter(list2_extr):
+                return True, rest_goals, [unif]
         return False, [], []
 
     if isinstance(list2, Variable):
@@ -194,6 +268,9 @@ def handle_list_permutation(
 def extract_list(term: Term) -> List:
     res = []
     while True:
+        if isinstance(term, ArrayList):
+            res.extend(term.items[term.start :])
+            return res
         if isinstance(term, Struct):
             if term.name == "[]":
                 return res
@@ -203,10 +280,28 @@ def extract_list(term: Term) -> List:
                     res.append(left)
                 else:
                     return None
+            else:
+                return None
         else:
             return None
 
 
+def list_elements(term: Term) -> List:
+    # like extract_list, but unbound elements are kept
+    res = []
+    while isinstance(term, Struct):
+        if isinstance(term, ArrayList):
+            res.extend(term.items[term.start :])
+            return res
+        if term.name == "[]" and term.arity == 0:
+            return res
+        if term.name != "." or term.arity != 2:
+            return None
+        res.append(term.params[0])
+        term = term.params[1]
+    return None
+
+
 def handle_is_list(
     goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
 ) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
@@ -300,12 +395,28 @@ def handle_subtract(
     if set_elements is None or delete_elements is None:
         return False, [], []
 
+    # ground elements unify exactly when they are equal, so they are looked
+    # up in a hash set; only elements with variables need unification
+    ground_deletes = set()
+    open_deletes = []
+    for delete_elem in delete_elements:
+        if is_ground(delete_elem):
+            ground_deletes.add(delete_elem)
+        else:
+            open_deletes.append(delete_elem)
+
     result_elements = []
 
     for set_elem in set_elements:
-        should_keep = True
+        if is_ground(set_elem):
+            if set_elem in ground_deletes:
+                continue
+            candidates = open_deletes
+        else:
+            candidates = itertools.chain(open_deletes, ground_deletes)
 
-        for delete_elem in delete_elements:
+        should_keep = True
+        for delete_elem in candidates:
             success, temp_unif = match_params([set_elem], [delete_elem], {})
             if success:
                 should_keep = False
@@ -371,31 +482,24 @@ def handle_memberchk(
     if isinstance(list_term, Variable):
         raise ErrInfiniteGeneration(goal)
 
-    all_elements = []
+    # commits to the first element that unifies
     current = list_term
-
-    while True:
-        if is_empty_list(current):
-            break
-        elif is_list_cons(current):
-            head, tail = get_head_tail(current)
-            all_elements.append(head)
-            current = tail
+    while not is_empty_list(current):
+        if is_list_cons(current):
+            head, current = get_head_tail(current)
         else:
-            all_elements.append(current)
-            break
-
-    all_solutions = []
-    for elem in all_elements:
-        success, new_unif = match_params([element], [elem], unif)
+            head, current = current, Struct("[]", 0, [])
+        success, new_unif = match_params([element], [head], unif)
         if success:
-            all_solutions.append(new_unif)
-    return len(all_solutions) > 0, rest_goals, all_solutions
+            return True, rest_goals, [new_unif]
+    return False, rest_goals, []
 
 
 def handle_sort(
     goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
 ) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if goal.arity == 4 and len(goal.params) == 4:
+        return handle_sort4(goal, rest_goals, unif)
     if len(goal.params) != 2 or goal.arity != 2:
         raise ErrUnknownPredicate("정렬", len(goal.params))
 
@@ -406,35 +510,99 @@ def handle_sort(
     if isinstance(input_list, Variable):
         return False, rest_goals, []
 
-    extracted = extract_list(input_list)
+    extracted = list_elements(input_list)
     if extracted is None:
         return False, rest_goals, []
 
+    sorted_list = PrologList(sort_unique(extracted)).to_struct()
+    success, new_unif = match_params([output_list], [sorted_list], unif)
+    return success, rest_goals, [new_unif] if success else []
+
+
+def sort_unique(elements: List[Term]) -> List[Term]:
+    # standard order, dropping elements equal to their predecessor
+    result = []
+    for element in sorted(elements, key=term_key):
+        if not result or compare_terms(result[-1], element) != 0:
+            result.append(element)
+    return result
+
+
+def sorted_input(goal: Struct, unif: Dict[str, Term], context: str) -> List:
+    input_list = substitute_term(unif, goal.params[-2])
+    if isinstance(input_list, Variable):
+        raise ErrUninstantiated(input_list.name, context)
+    elements = list_elements(input_list)
+    if elements is None:
+        raise ErrType(str(input_list), "리스트")
+    return elements
+
+
+def handle_msort(
+    goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 2:
+        raise ErrUnknownPredicate("모두정렬", len(goal.params))
+
+    elements = sorted_input(goal, unif, "모두정렬")
+    sorted_list = PrologList(sorted(elements, key=term_key)).to_struct()
+    success, new_unif = match_params([goal.params[1]], [sorted_list], unif)
+    return success, rest_goals, [new_unif] if success else []
+
+
+def handle_sort4(
+    goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    # sort(Key, Order, List, Sorted): Key 0 sorts on whole elements, N on
+    # their N-th argument; @< and @> drop duplicate keys, @=< and @>= keep
+    # them in their original order
+    key_term = substitute_term(unif, goal.params[0])
+    order = substitute_term(unif, goal.params[1])
+    for term in (key_term, order):
+        if isinstance(term, Variable):
+            raise ErrUninstantiated(term.name, "정렬")
+    if order.name not in ("@<", "@=<", "@>", "@>="):
+        raise ErrType(str(order), "정렬 순서")
     try:
-        sortable_items = []
-        for item in extracted:
-            if isinstance(item, Struct) and item.arity == 0:
-                try:
-                    sortable_items.append((float(item.name), item))
-                except ValueError:
-                    sortable_items.append((item.name, item))
-            else:
-                sortable_items.append((str(item), item))
-
-        sorted_unique = []
-        seen = set()
-        for key, item in sorted(sortable_items, key=lambda x: x[0]):
-            item_str = str(item)
-            if item_str not in seen:
-                seen.add(item_str)
-                sorted_unique.append(item)
-
-        sorted_list = PrologList(sorted_unique).to_struct()
-        success, new_unif = match_params([output_list], [sorted_list], unif)
-        return success, rest_goals, [new_unif] if success else []
+        key_index = int(key_term.name)
+    except ValueError as e:
+        raise ErrType(str(key_term), "정수") from e
+    if key_index < 0:
+        raise ErrType(str(key_term), "0 이상의 정수")
+
+    elements = sorted_input(goal, unif, "정렬")
+
+    def sort_key(element: Term) -> Term:
+        if key_index == 0:
+            return element
+        if not isinstance(element, Struct) or element.arity < key_index:
+            raise ErrType(str(element), f"인수가 {key_index}개 이상인 항")
+        return element.params[key_index - 1]
+
+    keys = [sort_key(element) for element in elements]
+    descending = order.name in ("@>", "@>=")
+    # reverse=True still keeps elements with equal keys in input order
+    order_index = sorted(
+        range(len(elements)),
+        key=lambda i: term_key(keys[i]),
+        reverse=descending,
+    )
 
-    except Exception:
-        return False, rest_goals, []
+    result = []
+    last_key = None
+    for i in order_index:
+        if (
+            order.name in ("@<", "@>")
+            and result
+            and compare_terms(last_key, keys[i]) == 0
+        ):
+            continue
+        result.append(elements[i])
+        last_key = keys[i]
+
+    sorted_list = PrologList(result).to_struct()
+    success, new_unif = match_params([goal.params[3]], [sorted_list], unif)
+    return success, rest_goals, [new_unif] if success else []
 
 
 def handle_keysort(
@@ -450,49 +618,20 @@ def handle_keysort(
     if isinstance(input_list, Variable):
         return False, rest_goals, []
 
-    extracted = extract_list(input_list)
+    extracted = list_elements(input_list)
     if extracted is None:
         return False, rest_goals, []
 
-    try:
-        sortable_pairs = []
-        for item in extracted:
-            if (
-                isinstance(item, Struct)
-                and item.name == "-"
-                and item.arity == 2
-            ):
-                key, value = item.params
-                if isinstance(key, Struct) and key.arity == 0:
-                    try:
-                        # try numeric sorting first
-                        sortable_pairs.append((float(key.name), item))
-                    except ValueError:
-                        # fall back to lexicographic sorting
-                        sortable_pairs.append((key.name, item))
-                else:
-                    # for complex keys, sort by string representation
-                    sortable_pairs.append((str(key), item))
-            else:
-                # if not a key-value pair, treat the whole item as key
-                if isinstance(item, Struct) and item.arity == 0:
-                    try:
-                        sortable_pairs.append((float(item.name), item))
-                    except ValueError:
-                        sortable_pairs.append((item.name, item))
-                else:
-                    sortable_pairs.append((str(item), item))
-
-        sorted_items = [
-            item for key, item in sorted(sortable_pairs, key=lambda x: x[0])
-        ]
+    def pair_key(item: Term) -> Term:
+        # if not a key-value pair, treat the whole item as key
+        if isinstance(item, Struct) and item.name == "-" and item.arity == 2:
+            return term_key(item.params[0])
+        return term_key(item)
 
-        sorted_list = PrologList(sorted_items).to_struct()
-        success, new_unif = match_params([output_list], [sorted_list], unif)
-        return success, rest_goals, [new_unif] if success else []
-
-    except Exception:
-        return False, rest_goals, []
+    # a stable sort, so pairs with equal keys keep their order
+    sorted_list = PrologList(sorted(extracted, key=pair_key)).to_struct()
+    success, new_unif = match_params([output_list], [sorted_list], unif)
+    return success, rest_goals, [new_unif] if success else []
 
 
 def handle_atom_chars(
@@ -677,11 +816,33 @@ def flatten_recursive(term: Term) -> List[Term]:
     return result
 
 
+INFINITE_BOUNDS = ("inf", "infinite", "무한")
+
+
+def integer_value(term: Term, context: str) -> int:
+    if isinstance(term, Variable):
+        raise ErrUninstantiated(term.name, context)
+    try:
+        return int(term.name)
+    except ValueError as e:
+        raise ErrType(term.name, "정수") from e
+
+
+def between_solutions(
+    value: Variable, low: int, high, unif: Dict[str, Term]
+) -> Iterator[Dict[str, Term]]:
+    # one binding per answer, made only when execution backtracks for it
+    numbers = itertools.count(low) if high is None else range(low, high + 1)
+    for i in numbers:
+        success, new_unif = match_params([value], [Struct(str(i), 0, [])], unif)
+        if success:
+            yield new_unif
+
+
 def handle_between(
     goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
 ) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
     if len(goal.params) != 3 or goal.arity != 3:
-        print(goal.params)
         raise ErrUnknownPredicate("이내", len(goal.params))
 
     low_term, high_term, value = goal.params
@@ -689,107 +850,42 @@ def handle_between(
     high_term = substitute_term(unif, high_term)
     value = substitute_term(unif, value)
 
-    if isinstance(low_term, Variable):
-        raise ErrUninstantiated(low_term.name, "이내")
-    if isinstance(high_term, Variable):
-        raise ErrUninstantiated(high_term.name, "이내")
-
-    try:
-        low_int = int(low_term.name)
-    except ValueError as e:
-        raise ErrType(low_term.name, "정수") from e
-
-    try:
-        high_int = int(high_term.name)
-    except ValueError as e:
-        raise ErrType(high_term.name, "정수") from e
+    low_int = integer_value(low_term, "이내")
+    if isinstance(high_term, Struct) and high_term.name in INFINITE_BOUNDS:
+        high_int = None
+    else:
+        high_int = integer_value(high_term, "이내")
 
     if isinstance(value, Variable):
-        all_solutions = []
-        for i in range(low_int, high_int + 1):
-            value_term = Struct(str(i), 0, [])
-            success, new_unif = match_params([value], [value_term], unif)
-            if success:
-                all_solutions.append(new_unif)
-        return len(all_solutions) > 0, rest_goals, all_solutions
-    else:
-        try:
-            value_int = int(value.name)
-        except ValueError as e:
-            raise ErrType(value.name, "정수") from e
+        if high_int is not None and low_int > high_int:
+            return False, rest_goals, []
+        return (
+            True,
+            rest_goals,
+            between_solutions(value, low_int, high_int, unif),
+        )
 
-        if low_int <= value_int <= high_int:
-            return True, rest_goals, [unif]
-        else:
-            return False, rest_goals, [unif]
+    value_int = integer_value(value, "이내")
+    if low_int <= value_int and (high_int is None or value_int <= high_int):
+        return True, rest_goals, [unif]
+    return False, rest_goals, []
 
 
-def handle_ord_subset(
+def handle_numlist(
     goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
 ) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
-    if len(goal.params) != 2 or goal.arity != 2:
-        raise ErrUnknownPredicate("서열부분집합", len(goal.params))
-
-    subset, setParam = goal.params
-    subset = substitute_term(unif, subset)
-    setParam = substitute_term(unif, setParam)
-
-    if isinstance(subset, Variable) and isinstance(setParam, Variable):
-        raise ErrUninstantiated(
-            f"{subset.name}, {setParam.name}", "서열부분집합"
-        )
-
-    if isinstance(subset, Variable):
-        if not (is_list_cons(setParam) or is_empty_list(setParam)):
-            raise ErrUninstantiated(
-                setParam.name
-                if isinstance(setParam, Variable)
-                else str(setParam),
-                "서열부분집합",
-            )
-        empty_struct = Struct("[]", 0, [])
-        success, new_unif = match_params([subset], [empty_struct], unif)
-        return success, rest_goals, [new_unif] if success else []
-
-    elif isinstance(setParam, Variable):
-        if not (is_list_cons(subset) or is_empty_list(subset)):
-            raise ErrUninstantiated(
-                subset.name if isinstance(subset, Variable) else str(subset),
-                "서열부분집합",
-            )
-
-        # ord_subset([1,2,3], X) - should return X = [1,2,3|_]
-        if is_empty_list(subset):
-            # empty subset can match any list
-            return True, rest_goals, [unif]
-        else:
-            # create a list structure [1,2,3|_] where _ is a variable
-            subset_elements = extract_list(subset)
-            if subset_elements is None:
-                raise ErrUninstantiated(str(subset), "서열부분집합")
-
-            tail_var = Variable("_")  # FIXME is hard coded right now
-            result_list = PrologList(subset_elements, tail_var).to_struct()
-            success, new_unif = match_params([setParam], [result_list], unif)
-            return success, rest_goals, [new_unif] if success else []
+    if len(goal.params) != 3:
+        raise ErrUnknownPredicate("수목록", len(goal.params))
 
-    # both instantiated - check if subset is ordered subsequence of setParam
-    else:
-        if not (is_list_cons(subset) or is_empty_list(subset)):
-            raise ErrUninstantiated(str(subset), "서열부분집합")
-        if not (is_list_cons(setParam) or is_empty_list(setParam)):
-            raise ErrUninstantiated(str(setParam), "서열부분집합")
+    low_int = integer_value(substitute_term(unif, goal.params[0]), "수목록")
+    high_int = integer_value(substitute_term(unif, goal.params[1]), "수목록")
+    if low_int > high_int:
+        return False, rest_goals, []
 
-        subset_elements = extract_list(subset)
-        setParam_elements = extract_list(setParam)
-
-        if subset_elements is None or setParam_elements is None:
-            raise ErrUninstantiated("invalid list structure", "서열부분집합")
-
-        if is_ordered_subsequence(subset_elements, setParam_elements):
-            return True, rest_goals, [unif]
-        else:
-            return False, rest_goals, []
+    numbers = [Struct(str(i), 0, []) for i in range(low_int, high_int + 1)]
+    result_list = ArrayList(tuple(numbers))
+    success, new_unif = match_params([goal.params[2]], [result_list], unif)
+    return success, rest_goals, [new_unif] if success else []
 
 
 def handle_select(
@@ -834,24 +930,6 @@ def handle_select(
     return len(all_solutions) > 0, rest_goals, all_solutions
 
 
-def is_ordered_subsequence(subseq, seq):
-    if not subseq:
-        return True
-    if not seq:
-        return False
-
-    sub_idx = 0
-    for item in seq:
-        if sub_idx < len(subseq):
-            success, _ = match_params([subseq[sub_idx]], [item], {})
-            if success:
-                sub_idx += 1
-                if sub_idx == len(subseq):
-                    return True
-
-    return sub_idx == len(subseq)
-
-
 def generate_list(n: int) -> Term:
     if n == 0:
         return Struct("[]", 0, [])
@@ -878,6 +956,30 @@ def get_head_tail(term: Term) -> Tuple[Term, Term]:
     raise ErrList()
 
 
+def last_solutions(
+    items: List[Term],
+    end: Variable,
+    element: Term,
+    unif: Dict[str, Term],
+    goal: Struct,
+) -> Iterator[Dict[str, Term]]:
+    # a partial list closed after each of its known elements in turn, and
+    # then after one more unknown element at a time, without end
+    if items:
+        success, new_unif = match_params(
+            [end, element], [Struct("[]", 0, []), items[-1]], unif
+        )
+        if success:
+            yield new_unif
+    filler = []
+    for i in itertools.count():
+        closed = PrologList(filler + [element]).to_struct()
+        success, new_unif = match_params([end], [closed], unif)
+        if success:
+            yield new_unif
+        filler.append(Variable(f"_G{id(goal)}_{i}"))
+
+
 def handle_last(
     goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
 ) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
@@ -888,29 +990,49 @@ def handle_last(
     element = substitute_term(unif, element)
     list_term = substitute_term(unif, list_term)
 
-    if not isinstance(list_term, Variable):
-        if is_empty_list(list_term):
-            return False, rest_goals, []
-
-        list_elements = extract_list(list_term)
-        if list_elements is None or len(list_elements) == 0:
-            return False, rest_goals, []
-
-        last_element = list_elements[-1]
+    if isinstance(list_term, ArrayList):
+        last_element = list_term.items[-1]
         success, new_unif = match_params([element], [last_element], unif)
         return success, rest_goals, [new_unif] if success else []
 
-    elif not isinstance(element, Variable) and isinstance(list_term, Variable):
-        result_list = Struct(".", 2, [element, Struct("[]", 0, [])])
-        success, new_unif = match_params([list_term], [result_list], unif)
-        return success, rest_goals, [new_unif] if success else []
-
-    elif isinstance(element, Variable) and isinstance(list_term, Variable):
-        result_list = Struct(".", 2, [element, Struct("[]", 0, [])])
-        success, new_unif = match_params([list_term], [result_list], unif)
-        return success, rest_goals, [new_unif] if success else []
+    items, end = split_list(list_term)
+    if isinstance(end, Variable):
+        return True, rest_goals, last_solutions(items, end, element, unif, goal)
+    if not is_empty_list(end) or not items:
+        return False, rest_goals, []
 
-    return False, rest_goals, []
+    success, new_unif = match_params([element], [items[-1]], unif)
+    return success, rest_goals, [new_unif] if success else []
+
+
+def nth0_solutions(
+    index: Variable,
+    list_term: Term,
+    element: Term,
+    unif: Dict[str, Term],
+    goal: Struct,
+) -> Iterator[Dict[str, Term]]:
+    # each position whose element unifies, in order; a partial list grows
+    # one unknown element at a time, without end
+    items, end = split_list(list_term)
+    for i, item in enumerate(items):
+        success, new_unif = match_params(
+            [index, element], [Struct(str(i), 0, []), item], unif
+        )
+        if success:
+            yield new_unif
+    if not isinstance(end, Variable):
+        return
+    filler = []
+    for i in itertools.count(len(items)):
+        tail = Variable(f"_T{id(goal)}_{i}")
+        cells = PrologList(filler + [element], tail).to_struct()
+        success, new_unif = match_params(
+            [end, index], [cells, Struct(str(i), 0, [])], unif
+        )
+        if success:
+            yield new_unif
+        filler.append(Variable(f"_G{id(goal)}_{i}"))
 
 
 def handle_nth0(
@@ -935,6 +1057,13 @@ def handle_nth0(
         if index < 0:
             return False, rest_goals, []
 
+        if isinstance(list_term, ArrayList):
+            if index >= len(list_term):
+                return False, rest_goals, []
+            target_element = list_term.nth(index)
+            success, new_unif = match_params([element], [target_element], unif)
+            return success, rest_goals, [new_unif] if success else []
+
         list_elements = extract_list(list_term)
         if list_elements is None:
             return False, rest_goals, []
@@ -946,27 +1075,9 @@ def handle_nth0(
         success, new_unif = match_params([element], [target_element], unif)
         return success, rest_goals, [new_unif] if success else []
 
-    if (
-        isinstance(index_term, Variable)
-        and not isinstance(list_term, Variable)
-        and not isinstance(element, Variable)
-    ):
-        list_elements = extract_list(list_term)
-        if list_elements is None:
-            return False, rest_goals, []
-
-        all_solutions = []
-        for i, list_elem in enumerate(list_elements):
-            success, elem_unif = match_params([element], [list_elem], unif)
-            if success:
-                index_struct = Struct(str(i), 0, [])
-                success, final_unif = match_params(
-                    [index_term], [index_struct], elem_unif
-                )
-                if success:
-                    all_solutions.append(final_unif)
-
-        return len(all_solutions) > 0, rest_goals, all_solutions
+    if isinstance(index_term, Variable):
+        solutions = nth0_solutions(index_term, list_term, element, unif, goal)
+        return True, rest_goals, solutions
 
     if (
         not isinstance(index_term, Variable)
@@ -1017,3 +1128,42 @@ def handle_nth0(
         return success, rest_goals, [new_unif] if success else []
 
     return False, rest_goals, []
+
+
+def nth1_solutions(
+    index: Variable,
+    index0: Variable,
+    solutions: Iterator[Dict[str, Term]],
+) -> Iterator[Dict[str, Term]]:
+    for u in solutions:
+        index1 = Struct(str(int(u[index0.name].name) + 1), 0, [])
+        success, new_unif = match_params([index], [index1], u)
+        if success:
+            del new_unif[index0.name]
+            yield new_unif
+
+
+def handle_nth1(
+    goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 3 or goal.arity != 3:
+        raise ErrUnknownPredicate("nth1", len(goal.params))
+
+    # nth1(I, L, E) is nth0(I - 1, L, E) with the index shifted both ways
+    index_term, list_term, element = goal.params
+    index_term = substitute_term(unif, index_term)
+
+    if isinstance(index_term, Variable):
+        index0 = Variable(f"_I{id(goal)}")
+        list_term = substitute_term(unif, list_term)
+        element = substitute_term(unif, element)
+        solutions = nth0_solutions(index0, list_term, element, unif, goal)
+        return True, rest_goals, nth1_solutions(index_term, index0, solutions)
+
+    try:
+        index0 = Struct(str(int(index_term.name) - 1), 0, [])
+    except (ValueError, AttributeError):
+        return False, rest_goals, []
+    return handle_nth0(
+        Struct("nth0", 3, [index0, list_term, element]), rest_goals, unif
+    )
@@ -0,0 +1,236 @@
+from typing import Dict, List, Tuple
+
+from PARSER.ast import Struct, Term, Variable
+from PARSER.Data.compare import compare_terms
+from PARSER.Data.list import (
+    PrologList,
+    extract_list,
+    is_empty_list,
+    is_list_cons,
+    list_elements,
+    sort_unique,
+)
+from SOLVER.unification import match_params, substitute_term
+from UTIL.err import ErrType, ErrUninstantiated, ErrUnknownPredicate
+
+# Ordered sets are proper lists sorted in standard order without
+# duplicates. Every binary operation is a single merge over both lists.
+
+
+def ord_set_elements(term: Term, context: str) -> List[Term]:
+    if isinstance(term, Variable):
+        raise ErrUninstantiated(term.name, context)
+    elements = list_elements(term)
+    if elements is None:
+        raise ErrType(str(term), "리스트")
+    return elements
+
+
+def ord_union(xs: List[Term], ys: List[Term]) -> List[Term]:
+    result = []
+    i = j = 0
+    while i < len(xs) and j < len(ys):
+        c = compare_terms(xs[i], ys[j])
+        if c < 0:
+            result.append(xs[i])
+            i += 1
+        elif c > 0:
+            result.append(ys[j])
+            j += 1
+        else:
+            result.append(xs[i])
+            i += 1
+            j += 1
+    result.extend(xs[i:])
+    result.extend(ys[j:])
+    return result
+
+
+def ord_intersection(xs: List[Term], ys: List[Term]) -> List[Term]:
+    result = []
+    i = j = 0
+    while i < len(xs) and j < len(ys):
+        c = compare_terms(xs[i], ys[j])
+        if c < 0:
+            i += 1
+        elif c > 0:
+            j += 1
+        else:
+            result.append(xs[i])
+            i += 1
+            j += 1
+    return result
+
+
+def ord_subtract(xs: List[Term], ys: List[Term]) -> List[Term]:
+    result = []
+    i = j = 0
+    while i < len(xs) and j < len(ys):
+        c = compare_terms(xs[i], ys[j])
+        if c < 0:
+            result.append(xs[i])
+            i += 1
+        elif c > 0:
+            j += 1
+        else:
+            i += 1
+            j += 1
+    result.extend(xs[i:])
+    return result
+
+
+def ord_subset(xs: List[Term], ys: List[Term]) -> bool:
+    j = 0
+    for x in xs:
+        while True:
+            if j >= len(ys):
+                return False
+            c = compare_terms(x, ys[j])
+            j += 1
+            if c == 0:
+                break
+            if c < 0:
+                return False
+    return True
+
+
+def ord_memberchk(element: Term, term: Term) -> bool:
+    # walks the cons cells directly and stops once past the element
+    while is_list_cons(term):
+        c = compare_terms(element, term.params[0])
+        if c == 0:
+            return True
+        if c < 0:
+            return False
+        term = term.params[1]
+    return False
+
+
+def unify_result(
+    result: Term,
+    elements: List[Term],
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    result_list = PrologList(elements).to_struct()
+    success, new_unif = match_params([result], [result_list], unif)
+    return success, rest_goals, [new_unif] if success else []
+
+
+def handle_list_to_ord_set(
+    goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 2:
+        raise ErrUnknownPredicate("서열집합", len(goal.params))
+
+    elements = ord_set_elements(
+        substitute_term(unif, goal.params[0]), "서열집합"
+    )
+    return unify_result(goal.params[1], sort_unique(elements), rest_goals, unif)
+
+
+def handle_ord_union(
+    goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 3:
+        raise ErrUnknownPredicate("서열합집합", len(goal.params))
+
+    xs = ord_set_elements(substitute_term(unif, goal.params[0]), "서열합집합")
+    ys = ord_set_elements(substitute_term(unif, goal.params[1]), "서열합집합")
+    return unify_result(goal.params[2], ord_union(xs, ys), rest_goals, unif)
+
+
+def handle_ord_intersection(
+    goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 3:
+        raise ErrUnknownPredicate("서열교집합", len(goal.params))
+
+    xs = ord_set_elements(substitute_term(unif, goal.params[0]), "서열교집합")
+    ys = ord_set_elements(substitute_term(unif, goal.params[1]), "서열교집합")
+    return unify_result(
+        goal.params[2], ord_intersection(xs, ys), rest_goals, unif
+    )
+
+
+def handle_ord_subtract(
+    goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 3:
+        raise ErrUnknownPredicate("서열차집합", len(goal.params))
+
+    xs = ord_set_elements(substitute_term(unif, goal.params[0]), "서열차집합")
+    ys = ord_set_elements(substitute_term(unif, goal.params[1]), "서열차집합")
+    return unify_result(goal.params[2], ord_subtract(xs, ys), rest_goals, unif)
+
+
+def handle_ord_memberchk(
+    goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 2:
+        raise ErrUnknownPredicate("서열원소점검", len(goal.params))
+
+    element = substitute_term(unif, goal.params[0])
+    set_term = substitute_term(unif, goal.params[1])
+    if isinstance(set_term, Variable):
+        raise ErrUninstantiated(set_term.name, "서열원소점검")
+
+    if ord_memberchk(element, set_term):
+        return True, rest_goals, [unif]
+    return False, rest_goals, []
+
+
+def handle_ord_subset(
+    goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 2 or goal.arity != 2:
+        raise ErrUnknownPredicate("서열부분집합", len(goal.params))
+
+    subset, setParam = goal.params
+    subset = substitute_term(unif, subset)
+    setParam = substitute_term(unif, setParam)
+
+    if isinstance(subset, Variable) and isinstance(setParam, Variable):
+        raise ErrUninstantiated(
+            f"{subset.name}, {setParam.name}", "서열부분집합"
+        )
+
+    if isinstance(subset, Variable):
+        if not (is_list_cons(setParam) or is_empty_list(setParam)):
+            raise ErrUninstantiated(str(setParam), "서열부분집합")
+        empty_struct = Struct("[]", 0, [])
+        success, new_unif = match_params([subset], [empty_struct], unif)
+        return success, rest_goals, [new_unif] if success else []
+
+    elif isinstance(setParam, Variable):
+        if not (is_list_cons(subset) or is_empty_list(subset)):
+            raise ErrUninstantiated(str(subset), "서열부분집합")
+
+        # ord_subset([1,2,3], X) - should return X = [1,2,3|_]
+        if is_empty_list(subset):
+            # empty subset can match any list
+            return True, rest_goals, [unif]
+        else:
+            # create a list structure [1,2,3|_] where _ is a variable
+            subset_elements = extract_list(subset)
+            if subset_elements is None:
+                raise ErrUninstantiated(str(subset), "서열부분집합")
+
+            tail_var = Variable("_")  # FIXME is hard coded right now
+            result_list = PrologList(subset_elements, tail_var).to_struct()
+            success, new_unif = match_params([setParam], [result_list], unif)
+            return success, rest_goals, [new_unif] if success else []
+
+    # both instantiated - merge the two ordered lists
+    else:
+        subset_elements = list_elements(subset)
+        set_elements = list_elements(setParam)
+        if subset_elements is None:
+            raise ErrUninstantiated(str(subset), "서열부분집합")
+        if set_elements is None:
+            raise ErrUninstantiated(str(setParam), "서열부분집합")
+
+        if ord_subset(subset_elements, set_elements):
+            return True, rest_goals, [unif]
+        else:
+            return False, rest_goals, []
@@ -0,0 +1,187 @@
+import heapq
+from typing import Dict, Iterator, Optional, Tuple
+
+from PARSER.ast import Struct, Term
+
+
+class _Record:
+    __slots__ = ("ref_id", "key", "term", "seq", "links")
+
+    def __init__(self, ref_id: int, key: str, term: Term, seq: int):
+        self.ref_id = ref_id
+        self.key = key
+        self.term = term
+        self.seq = seq
+        self.links = []  # one _Link per chain this record lives in
+
+
+class _Link:
+    __slots__ = ("record", "chain", "prev", "next")
+
+    def __init__(self, record: _Record, chain: "_Chain"):
+        self.record = record
+        self.chain = chain
+        self.prev = None
+        self.next = None
+
+
+class _Chain:
+    # doubly linked list of records, kept in seq order
+    def __init__(self):
+        self.head: Optional[_Link] = None
+        self.tail: Optional[_Link] = None
+        self.size = 0
+
+    def push_front(self, record: _Record) -> None:
+        link = _Link(record, self)
+        link.next = self.head
+        if self.head is not None:
+            self.head.prev = link
+        else:
+            self.tail = link
+        self.head = link
+        self.size += 1
+        record.links.append(link)
+
+    def push_back(self, record: _Record) -> None:
+        link = _Link(record, self)
+        link.prev = self.tail
+        if self.tail is not None:
+            self.tail.next = link
+        else:
+            self.head = link
+        self.tail = link
+        self.size += 1
+        record.links.append(link)
+
+    def unlink(self, link: _Link) -> None:
+        if link.prev is not None:
+            link.prev.next = link.next
+        else:
+            self.head = link.next
+        if link.next is not None:
+            link.next.prev = link.prev
+        else:
+            self.tail = link.prev
+        link.prev = link.next = None
+        self.size -= 1
+
+    def __iter__(self) -> Iterator[_Record]:
+        link = self.head
+        while link is not None:
+            nxt = link.next
+            yield link.record
+            link = nxt
+
+
+class _KeyEntry:
+    def __init__(self):
+        self.all = _Chain()
+        self.buckets: Dict[Tuple, _Chain] = {}  # first-argument index
+        self.wild = _Chain()  # records the index cannot classify
+
+
+def index_key(term: Term) -> Optional[Tuple]:
+    # functor plus first-argument functor; None when the first argument is
+    # unbound (or the term itself is a variable) and so matches anything
+    if not isinstance(term, Struct):
+        return None
+    if term.arity == 0:
+        return (term.name, 0)
+    first = term.params[0]
+    if not isinstance(first, Struct):
+        return None
+    return (term.name, term.arity, first.name, first.arity)
+
+
+class RecordedDB:
+    def __init__(self):
+        self.keys: Dict[str, _KeyEntry] = {}
+        self.refs: Dict[int, _Record] = {}
+        self.counter = 0
+        self.front_seq = 0
+        self.back_seq = 0
+
+    def record(
+        self,
+        key: str,
+        term: Term,
+        at_end: bool = False,
+        ref_id: Optional[int] = None,
+    ) -> int:
+        # ref_id is given only when restoring a saved record
+        if ref_id is None:
+            self.counter += 1
+            ref_id = self.counter
+        if at_end:
+            self.back_seq += 1
+            seq = self.back_seq
+        else:
+            self.front_seq -= 1
+            seq = self.front_seq
+
+        entry = self.keys.get(key)
+        if entry is None:
+            entry = self.keys[key] = _KeyEntry()
+
+        idx = index_key(term)
+        if idx is None:
+            bucket = entry.wild
+        else:
+            bucket = entry.buckets.get(idx)
+            if bucket is None:
+                bucket = entry.buckets[idx] = _Chain()
+
+        rec = _Record(ref_id, key, term, seq)
+        for chain in (entry.all, bucket):
+            if at_end:
+                chain.push_back(rec)
+            else:
+                chain.push_front(rec)
+        self.refs[ref_id] = rec
+        return ref_id
+
+    def erase(self, ref_id: int) -> bool:
+        rec = self.refs.pop(ref_id, None)
+        if rec is None:
+            return False
+        for link in rec.links:
+            link.chain.unlink(link)
+        rec.links = []
+
+        entry = self.keys[rec.key]
+        if entry.all.size == 0:
+            del self.keys[rec.key]
+        else:
+            idx = index_key(rec.term)
+            if idx is not None and entry.buckets[idx].size == 0:
+                del entry.buckets[idx]
+        return True
+
+    def candidates(self, key: str, pattern: Term) -> Iterator[Tuple[int, Term]]:
+        # records under key that may unify with pattern, in recorded order
+        entry = self.keys.get(key)
+        if entry is None:
+            return
+        idx = index_key(pattern)
+        if idx is None:
+            records = iter(entry.all)
+        else:
+            bucket = entry.buckets.get(idx)
+            if bucket is None:
+                records = iter(entry.wild)
+            elif entry.wild.size == 0:
+                records = iter(bucket)
+            else:
+                records = heapq.merge(bucket, entry.wild, key=lambda r: r.seq)
+        for rec in records:
+            yield rec.ref_id, rec.term
+
+    def records(self) -> Iterator[Tuple[int, str, Term]]:
+        # every record as (ref_id, key, term), each key's in recorded order
+        for key, entry in self.keys.items():
+            for rec in entry.all:
+                yield rec.ref_id, key, rec.term
+
+    def __len__(self) -> int:
+        return len(self.refs)
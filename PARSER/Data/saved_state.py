@@ -0,0 +1,196 @@
+import marshal
+import os
+from typing import Dict, List, Tuple
+
+from PARSER.ast import Struct, Term
+from PARSER.Data.external import SqliteTable
+from PARSER.Data.fact_file import (
+    MappedFactTable,
+    check_program,
+    file_argument,
+)
+from PARSER.Data.recorded import RecordedDB
+from PARSER.serialize import (
+    INTERPRETER_VERSION,
+    decode_term,
+    encode_clause,
+    encode_term,
+)
+from SOLVER.database import Database
+from SOLVER.facts import FactTable
+from SOLVER.unification import substitute_term
+from UTIL.debug import DebugState
+from UTIL.err import (
+    ErrFileNotFound,
+    ErrType,
+    ErrUnknownPredicate,
+)
+
+# A saved state is an image of a loaded program, written by qsave(File)
+# or `main.py --save-state File` and restored by `main.py --state File`
+# without parsing anything. It holds, as marshal data in the clause cache
+# encoding (see serialize.py):
+#   the interned atoms
+#   each predicate's clauses, which stay encoded until first called
+#   the declared argument indexes
+#   fact tables: the shared symbols and each table's columns, or the file
+#                a mapped table was attached from
+#   external predicates, as the database and table each one reads
+#   the recorded database and the hash tables
+# Built hash indexes are not saved; they are rebuilt on first use, as they
+# are after any load. Nor is which files were consulted, so make has
+# nothing to reload after a restore.
+
+STATE_MAGIC = "k-prolog state"
+
+
+def encode_state(program: Database, debug_state: DebugState) -> tuple:
+    predicates = []
+    for key in dict.fromkeys([*program.predicates, *program.encoded]):
+        clauses = [encode_clause(c) for c in program.predicates.get(key, [])]
+        predicates.append((key, clauses + program.encoded.get(key, [])))
+
+    tables = []
+    for key, table in program.tables.items():
+        if isinstance(table, FactTable):
+            columns = [column.tobytes() for column in table.columns]
+            tables.append((key, "facts", columns))
+        elif isinstance(table, MappedFactTable):
+            tables.append((key, "mapped", os.path.abspath(table.path)))
+
+    externals = []
+    for key, solutions in program.externals.items():
+        source = getattr(solutions, "__self__", None)
+        if isinstance(source, SqliteTable):
+            path = os.path.abspath(source.path)
+            externals.append((key, path, source.table))
+
+    recorded = debug_state.recorded_db
+    return (
+        STATE_MAGIC,
+        INTERPRETER_VERSION,
+        list(program.atoms),
+        predicates,
+        [(key, sorted(c)) for key, c in program.index_columns.items()],
+        [encode_term(t) for t in program.symbols.terms],
+        tables,
+        externals,
+        recorded.counter,
+        [
+            (ref_id, key, encode_term(term))
+            for ref_id, key, term in recorded.records()
+        ],
+        [
+            (table_id, [(encode_term(k), encode_term(v)) for k, v in t.items()])
+            for table_id, t in debug_state.hash_tables.items()
+        ],
+        debug_state.seq,
+    )
+
+
+def save_state(path: str, program: Database, debug_state: DebugState) -> None:
+    # written beside the target and renamed, like a clause cache
+    try:
+        data = marshal.dumps(encode_state(program, debug_state))
+    except (ValueError, RecursionError) as e:
+        raise ErrType(path, "저장할 수 있는 상태") from e
+    temp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp, "wb") as f:
+            f.write(data)
+        os.replace(temp, path)
+    except OSError as e:
+        raise ErrFileNotFound(path) from e
+    finally:
+        if os.path.exists(temp):
+            os.remove(temp)
+
+
+def load_state(path: str) -> Tuple[Database, DebugState]:
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        raise ErrFileNotFound(path) from e
+    try:
+        state = marshal.loads(data)
+    except (EOFError, ValueError, TypeError):
+        state = None
+    if (
+        not isinstance(state, tuple)
+        or len(state) != 12
+        or state[:2] != (STATE_MAGIC, INTERPRETER_VERSION)
+    ):
+        raise ErrType(path, "저장 상태 파일")
+    (
+        _,
+        _,
+        atom_names,
+        predicates,
+        index_columns,
+        symbols,
+        tables,
+        externals,
+        counter,
+        records,
+        hash_tables,
+        seq,
+    ) = state
+
+    program = Database()
+    atoms = program.atoms
+    for name in atom_names:
+        atoms[name] = Struct(name, 0, [])
+    for key, columns in index_columns:
+        program.index_columns[key] = set(columns)
+
+    # attaching a table or an external predicate drops the clauses of its
+    # predicate, so they are restored first and encoded clauses after them,
+    # as a predicate may have both: facts compacted into a table, then the
+    # clauses of a later file still encoded
+    terms = program.symbols.terms
+    terms.extend(decode_term(t, atoms) for t in symbols)
+    program.symbols.ids.update((t, i) for i, t in enumerate(terms))
+    for key, kind, data in tables:
+        if kind == "facts":
+            table = FactTable(*key, program.symbols)
+            for column, values in zip(table.columns, data, strict=True):
+                column.frombytes(values)
+        else:
+            table = MappedFactTable(data, atoms)
+        program.attach(key, table)
+    for key, database, table in externals:
+        source = SqliteTable(key[1], database, table, atoms)
+        program.add_external(key, source.solutions)
+    for key, clauses in predicates:
+        program.add_encoded(key, clauses)
+
+    debug_state = DebugState(RecordedDB())
+    for ref_id, key, term in records:
+        debug_state.recorded_db.record(
+            key, decode_term(term, atoms), at_end=True, ref_id=ref_id
+        )
+    debug_state.recorded_db.counter = counter
+    for table_id, entries in hash_tables:
+        debug_state.hash_tables[table_id] = {
+            decode_term(k, atoms): decode_term(v, atoms) for k, v in entries
+        }
+    debug_state.seq = seq
+    return program, debug_state
+
+
+def handle_qsave(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    # qsave(File)
+    if len(goal.params) != 1:
+        raise ErrUnknownPredicate("상태저장", len(goal.params))
+    check_program(program, goal)
+
+    path = file_argument(substitute_term(unif, goal.params[0]), "상태저장")
+    save_state(path, program, debug_state)
+    return True, rest_goals, [unif]
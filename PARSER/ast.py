@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Tuple
 
 
 class Term:
@@ -24,6 +24,7 @@ class Struct(Term):
         self.name = name
         self.arity = arity
         self.params = params
+        self._hash = None
 
     def __repr__(self):
         if self.arity == 0:
@@ -39,11 +40,125 @@ class Struct(Term):
         )
 
     def __hash__(self):
-        return hash((self.name, self.arity, tuple(self.params)))
+        # terms are never mutated, so the structural hash is cached; nested
+        # arguments are hashed bottom-up to avoid deep recursion on lists
+        if self._hash is None:
+            stack = [self]
+            while stack:
+                term = stack[-1]
+                pending = [
+                    p
+                    for p in term.params
+                    if isinstance(p, Struct)
+                    and not isinstance(p, ArrayList)
+                    and p._hash is None
+                ]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                stack.pop()
+                term._hash = hash((term.name, term.arity, tuple(term.params)))
+        return self._hash
 
     def __lt__(self, other):
-        return (self.name, len(self.params), self.params) < (
-            other.name,
-            len(other.params),
-            other.params,
+        # standard order of terms; imported here as compare depends on ast
+        from PARSER.Data.compare import compare_terms
+
+        return compare_terms(self, other) < 0
+
+
+class _Prehashed:
+    __slots__ = ("value",)
+
+    def __init__(self, value: int):
+        self.value = value
+
+    def __hash__(self):
+        return self.value
+
+
+class ArrayList(Struct):
+    # A proper ground list kept as a slice of a shared tuple. It presents
+    # itself as the cons cell '.'(Head, Tail), building the tail view on
+    # demand, so it unifies with [H|T] patterns like any other list while
+    # length and indexing stay O(1).
+    def __init__(self, items: Tuple[Term, ...], start: int = 0):
+        self.name = "."
+        self.arity = 2
+        self.items = items
+        self.start = start
+        self._hash = None
+        self._params = None
+
+    @property
+    def params(self) -> List[Term]:
+        if self._params is None:
+            self._params = [self.items[self.start], self.tail()]
+        return self._params
+
+    def tail(self) -> Struct:
+        if self.start + 1 < len(self.items):
+            return ArrayList(self.items, self.start + 1)
+        return Struct("[]", 0, [])
+
+    def __len__(self) -> int:
+        return len(self.items) - self.start
+
+    def elements(self) -> List[Term]:
+        return list(self.items[self.start :])
+
+    def nth(self, index: int) -> Term:
+        return self.items[self.start + index]
+
+    def __repr__(self):
+        return (
+            "".join(f".({item}," for item in self.items[self.start :])
+            + "[]"
+            + ")" * len(self)
         )
+
+    def __eq__(self, other):
+        if isinstance(other, ArrayList):
+            return len(self) == len(other) and all(
+                a == b
+                for a, b in zip(
+                    self.items[self.start :],
+                    other.items[other.start :],
+                    strict=True,
+                )
+            )
+        # compare against cons cells without recursing down the spine
+        i = self.start
+        while i < len(self.items):
+            if isinstance(other, ArrayList):
+                return ArrayList(self.items, i) == other
+            if not (
+                isinstance(other, Struct)
+                and other.name == "."
+                and other.arity == 2
+                and self.items[i] == other.params[0]
+            ):
+                return False
+            other = other.params[1]
+            i += 1
+        return isinstance(other, Struct) and other.name == "[]"
+
+    def __hash__(self):
+        # same value as the equivalent chain of '.'/2 structs
+        if self._hash is None:
+            h = hash(("[]", 0, ()))
+            for item in reversed(self.items[self.start :]):
+                h = hash((".", 2, (item, _Prehashed(h))))
+            self._hash = h
+        return self._hash
+
+
+def is_ground(term: Term) -> bool:
+    stack = [term]
+    while stack:
+        t = stack.pop()
+        if isinstance(t, Variable):
+            return False
+        if isinstance(t, Struct) and not isinstance(t, ArrayList):
+            stack.extend(t.params)
+    return True
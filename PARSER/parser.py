@@ -1,565 +1,464 @@
 # coding: utf-8
 import re
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, TextIO, Tuple
 
+from PARSER.ast import Struct, Term, Variable
+from PARSER.Data.list import PrologList
 from UTIL.err import (
     ErrCommandFormat,
     ErrInvalidTerm,
     ErrParenthesis,
-    ErrProlog,
+    ErrPeriod,
+    ErrSyntax,
     ErrUnexpected,
-    ErrUnknownPredicate,
 )
-from PARSER.ast import Struct, Term, Variable
-from PARSER.Data.list import PrologList
-
-
-def has_top_level_comma(s: str) -> bool:
-    depth = 0
-    bracket_depth = 0
-    inside_if_then_else = False
-
-    i = 0
-    while i < len(s):
-        ch = s[i]
-
-        if ch == "(":
-            depth += 1
-        elif ch == ")":
-            depth -= 1
-        elif ch == "[":
-            bracket_depth += 1
-        elif ch == "]":
-            bracket_depth -= 1
-        elif s[i : i + 2] == "->":
-            if depth == 0 and bracket_depth == 0:
-                inside_if_then_else = True
-            i += 1
-        elif (
-            ch == ","
-            and depth == 0
-            and bracket_depth == 0
-            and not inside_if_then_else
-        ):
-            return True
-        i += 1
-    return False
-
-
-def has_top_level_operator(s: str, operator: str) -> bool:
-    depth = 0
-    bracket_depth = 0
-    inside_if_then_else = False
-    op_len = len(operator)
-    i = 0
-
-    while i < len(s):
-        ch = s[i]
-
-        if ch == "(":
-            depth += 1
-        elif ch == ")":
-            depth -= 1
-        elif ch == "[":
-            bracket_depth += 1
-        elif ch == "]":
-            bracket_depth -= 1
-        elif s[i : i + 2] == "->":
-            if depth == 0 and bracket_depth == 0:
-                inside_if_then_else = True
-            i += 1
-        elif (
-            s[i : i + op_len] == operator
-            and depth == 0
-            and bracket_depth == 0
-            and not inside_if_then_else
-        ):
-            return True
-        i += 1
-    return False
 
+# The text is read once by a lexer into tokens and the tokens once by an
+# operator-precedence parser, so parsing is linear in the size of the input.
+#
+# Clauses keep the shape the solver expects: a list holding the head and
+# then each goal of the top-level conjunction of the body. Quoted atoms and
+# strings keep their quotes in the atom name, numbers are atoms with
+# numeric names, and lists are '.'/2 cells built by PrologList.
+
+# operator name -> (priority, type), as in op/3
+PREFIX_OPS: Dict[str, Tuple[int, str]] = {
+    ":-": (1200, "fx"),
+    "?-": (1200, "fx"),
+    "dynamic": (1150, "fx"),
+    "discontiguous": (1150, "fx"),
+    "\\+": (900, "fy"),
+    "논리부정": (900, "fy"),
+    "-": (200, "fy"),
+    "+": (200, "fy"),
+    "\\": (200, "fy"),
+}
+
+INFIX_OPS: Dict[str, Tuple[int, str]] = {
+    ":-": (1200, "xfx"),
+    "-->": (1200, "xfx"),
+    ";": (1100, "xfy"),
+    "|": (1100, "xfy"),
+    "->": (1050, "xfy"),
+    "*->": (1050, "xfy"),
+    ",": (1000, "xfy"),
+    "=": (700, "xfx"),
+    "\\=": (700, "xfx"),
+    "==": (700, "xfx"),
+    "\\==": (700, "xfx"),
+    "@<": (700, "xfx"),
+    "@>": (700, "xfx"),
+    "@=<": (700, "xfx"),
+    "@>=": (700, "xfx"),
+    "=..": (700, "xfx"),
+    "is": (700, "xfx"),
+    ":=": (700, "xfx"),
+    "=:=": (700, "xfx"),
+    "=\\=": (700, "xfx"),
+    "<": (700, "xfx"),
+    ">": (700, "xfx"),
+    "=<": (700, "xfx"),
+    ">=": (700, "xfx"),
+    # comparisons of library(clpfd), so programs written for it load
+    "#=": (700, "xfx"),
+    "#\\=": (700, "xfx"),
+    "#<": (700, "xfx"),
+    "#>": (700, "xfx"),
+    "#=<": (700, "xfx"),
+    "#>=": (700, "xfx"),
+    ":": (200, "xfy"),
+    "+": (500, "yfx"),
+    "-": (500, "yfx"),
+    "/\\": (500, "yfx"),
+    "\\/": (500, "yfx"),
+    "xor": (500, "yfx"),
+    "*": (400, "yfx"),
+    "/": (400, "yfx"),
+    "//": (400, "yfx"),
+    "rem": (400, "yfx"),
+    "mod": (400, "yfx"),
+    "나머지": (400, "yfx"),
+    "div": (400, "yfx"),
+    "rdiv": (400, "yfx"),
+    "<<": (400, "yfx"),
+    ">>": (400, "yfx"),
+    "**": (200, "xfx"),
+    "^": (200, "xfy"),
+}
+
+# Korean spellings of the control predicates the solver knows by their
+# English name, with the arities they take
+CANONICAL_NAMES: Dict[Tuple[str, int], str] = {
+    ("모두찾기", 3): "findall",
+    ("집합", 3): "setof",
+    ("모두만족", 2): "forall",
+    **{("목록에적용", n): "maplist" for n in range(2, 8)},
+}
+
+SYMBOL_ATOMS = set(PREFIX_OPS) | set(INFIX_OPS)
+
+TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<layout>\s+|%[^\n]*|/\*.*?\*/)
+  | (?P<end>\.(?=\s|%|$))
+  | (?P<num>0'.|\d+r\d+|\d+(?:_\d+)+|\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<word>[^\W\d]\w*)
+  | (?P<qatom>'(?:[^'\\]|\\.|'')*')
+  | (?P<str>"(?:[^"\\]|\\.|"")*")
+  | (?P<punct>[()\[\]{},|])
+  | (?P<solo>[!;])
+  | (?P<symbol>[#$&*+\-./:<=>?@^~\\]+)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
 
-def split_args(s: str) -> List[str]:
-    parts, buf, depth, bracket_depth = [], "", 0, 0
-    for ch in s:
-        if ch == "," and depth == 0 and bracket_depth == 0:
-            parts.append(buf.strip())
-            buf = ""
-        else:
-            if ch == "(":
-                depth += 1
-            elif ch == ")":
-                depth -= 1
-            elif ch == "[":
-                bracket_depth += 1
-            elif ch == "]":
-                bracket_depth -= 1
-            buf += ch
-    if buf.strip():
-        parts.append(buf.strip())
-    return parts
 
+# One statement up to its closing period, matched in the same pieces the
+# lexer reads so a period inside a quoted atom, a comment, a number or a
+# symbol such as =.. does not end it. The repetition is possessive, so it
+# never gives a piece back to find a period the lexer would not see. A /*
+# is only read as a closed comment; while its end is still to come the
+# match fails.
+STATEMENT_PATTERN = re.compile(
+    r"""
+    (?: \s+ | %[^\n]* | /\*.*?\*/
+      | 0'. | \d+(?:\.\d+)?(?:[eE][+-]?\d+)? | \w+
+      | '(?:[^'\\]|\\.|'')*' | "(?:[^"\\]|\\.|"")*"
+      | (?!/\*)[#$&*+\-/:<=>?@^~\\][#$&*+\-./:<=>?@^~\\]*
+      | \.(?!\s|%|$)[#$&*+\-./:<=>?@^~\\]*
+      | [^\w\s%'".#$&*+\-/:<=>?@^~\\]
+    )*+
+    \.(?=\s|%|$)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
 
-def parse_primary(tokens: List[str], pos: int, operators) -> Tuple[Term, int]:
-    if pos >= len(tokens):
-        raise ErrUnexpected("")
 
-    token = tokens[pos]
+class Token:
+    __slots__ = ("kind", "text", "layout_before")
 
-    if token in operators and pos + 1 < len(tokens) and tokens[pos + 1] == "(":
-        op_name = token
-        pos += 2
+    def __init__(self, kind: str, text: str, layout_before: bool):
+        self.kind = kind
+        self.text = text
+        self.layout_before = layout_before
 
-        args = []
-        while pos < len(tokens) and tokens[pos] != ")":
-            if tokens[pos] == ",":
-                pos += 1
-                continue
-            arg, pos = parse_precedence(tokens, pos, 1000, operators)
-            args.append(arg)
+    def __repr__(self):
+        return self.text
 
-        if pos >= len(tokens) or tokens[pos] != ")":
-            raise ErrParenthesis("closing")
 
-        return Struct(op_name, len(args), args), pos + 1
+def split_symbols(text: str) -> List[str]:
+    # a run of symbol characters is one token, but runs such as =- or
+    # :-\+ that are no operator are split into the longest known ones
+    if text in SYMBOL_ATOMS or len(text) == 1:
+        return [text]
+    parts = []
+    while text:
+        for size in range(len(text), 0, -1):
+            if text[:size] in SYMBOL_ATOMS or size == 1:
+                parts.append(text[:size])
+                text = text[size:]
+                break
+    return parts
 
-    if token == "(":
-        og_pos = pos + 1
-        paren_depth = 0
-        search_pos = pos + 1
 
-        while search_pos < len(tokens):
-            if tokens[search_pos] == "(":
-                paren_depth += 1
-            elif tokens[search_pos] == ")":
-                if paren_depth == 0:
-                    break
-                paren_depth -= 1
-            search_pos += 1
-
-        if search_pos >= len(tokens):
-            raise ErrParenthesis("closing")
-        content_tokens = tokens[og_pos:search_pos]
-        content_str = ""
-        for i, token in enumerate(content_tokens):
-            if token in ["(", ")", ","] or (
-                i > 0 and content_tokens[i - 1] in ["(", ","]
-            ):
-                content_str += token
-            else:
-                if content_str and content_str[-1] not in ["(", ","]:
-                    content_str += " "
-                content_str += token
-
-        if "," in content_str:
-            parts = split_args(content_str)
-            goals = [parse_struct(part.strip()) for part in parts]
-            if len(goals) == 1:
-                return goals[0], search_pos + 1
+def scan(text: str) -> Tuple[List[Token], List[int]]:
+    # returns the tokens and, for each closing period, the offset just past
+    # it in the text
+    tokens = []
+    append = tokens.append
+    ends = []
+    pos = 0
+    layout = True
+    for m in TOKEN_PATTERN.finditer(text):
+        if m.start() != pos:
+            # finditer skipped a character no token can start with
+            raise ErrUnexpected(text[pos])
+        pos = m.end()
+        kind = m.lastgroup
+        if kind == "layout":
+            layout = True
+            continue
+        value = m.group()
+        if kind == "word":
+            if value[0] == "_" or value[0].isupper():
+                append(Token("var", value, layout))
             else:
-                result = goals[0]
-                for goal in goals[1:]:
-                    result = Struct(",", 2, [result, goal])
-                return result, search_pos + 1
+                append(Token("name", value, layout))
+        elif kind == "symbol":
+            for i, part in enumerate(split_symbols(value)):
+                append(Token("name", part, layout and i == 0))
+        elif kind == "solo":
+            append(Token("name", value, layout))
         else:
-            return parse_struct(content_str), search_pos + 1
-
-    if token in ["+", "-"] and pos + 1 < len(tokens):
-        operand, pos = parse_primary(tokens, pos + 1, operators)
-        return Struct(token, 1, [operand]), pos
-
-    if re.match(r"^\d+\.?\d*$", token):
-        return Struct(token, 0, []), pos + 1
-
-    if token[0].isupper() or token[0] == "_":
-        return Variable(token), pos + 1
-
-    else:  # FIXME
-        return Struct(token, 0, []), pos + 1
-
-    raise ErrUnexpected(f"{token}")
-
-
-def parse_precedence(
-    tokens: List[str],
-    pos: int,
-    min_prec: int,
-    operators: Dict[str, Tuple[int, bool]],
-) -> Tuple[Term, int]:
-    left, pos = parse_primary(tokens, pos, operators)
-    while pos < len(tokens):
-        operator = tokens[pos]
-        if operator not in operators:
+            append(Token(kind, value, layout))
+            if kind == "end":
+                ends.append(pos)
+        layout = False
+    if pos != len(text):
+        raise ErrUnexpected(text[pos])
+    return tokens, ends
+
+
+def statement_ends(text: str, final: bool = True) -> List[int]:
+    # The offset just past each closing period, found without building
+    # tokens. Unless the text is final it may stop mid-statement, so a
+    # statement is only counted once the layout after its period is seen.
+    ends = []
+    pos = 0
+    while m := STATEMENT_PATTERN.match(text, pos):
+        if not final and m.end() == len(text):
             break
-
-        operator_prec, is_left_assoc = operators[operator]
-
-        if (min_prec != 1000) and (operator_prec >= min_prec):
-            break
-
-        pos += 1
-
-        next_min_prec = operator_prec - 1 if is_left_assoc else operator_prec
-
-        right, pos = parse_precedence(tokens, pos, next_min_prec, operators)
-        left = Struct(operator, 2, [left, right])
-    return left, pos
-
-
-def parse_arithmetic_expression(expr: str) -> Term:
-    operators = {
-        "*": (400, True),
-        "/": (400, True),
-        "//": (400, True),
-        "나머지": (400, True),
-        "mod": (400, True),
-        "+": (500, True),
-        "-": (500, True),
-        "=:=": (700, False),
-        "=\=": (700, False),
-        "<": (700, False),
-        ">": (700, False),
-        ">=": (700, False),
-        "=<": (700, False),
-        "=": (700, False),
-        "\=": (700, False),
-        "is": (700, False),
-        ":=": (700, False),
-    }
-
-    expr = expr.strip()
-
-    expr = expr.replace("=\=", "=\\=")
-
-    pattern = r"(=\\=|=:=|>=|=<|//|나머지|mod|is|:=|\d+\.?\d*|[A-Za-z가-힣ㄱ-ㅎㅏ-ㅣ_][A-Za-z가-힣ㄱ-ㅎㅏ-ㅣ0-9_]*|[+\-*/=<>(),])"
-
-    tokens = re.findall(pattern, expr)
-    tokenized = [t for t in tokens if t.strip()]
-
-    if not tokenized:
-        raise ErrInvalidTerm(expr)
-
-    result, pos = parse_precedence(tokenized, 0, 1000, operators)
-
-    if pos < len(tokens):
-        raise ErrUnexpected(f"{tokenized[pos:]}")
-
-    return result
-
-
-def parse_list(s: str) -> Term:
-    s = s.strip()
-    content = s[1:-1].strip()
-
-    if not content:  # empty list
-        return PrologList().to_struct()
-
-    if "|" in content:  # [H | T] - but need to check if | is at top level
-        pipe_pos = find_top_level_pipe(content)
-        if pipe_pos != -1:
-            head = content[:pipe_pos].strip()
-            tail = content[pipe_pos + 1 :].strip()
-
-            if head:
-                elements = [
-                    parse_term(e.strip()) for e in split_args_smart(head)
-                ]
+        pos = m.end()
+        ends.append(pos)
+    if final and pos < len(text):
+        # what is left holds no statement the pattern can end, such as a
+        # /* that is never closed; the lexer decides where it ends
+        ends += [pos + end for end in scan(text[pos:])[1]]
+    return ends
+
+
+def tokenize(text: str) -> List[Token]:
+    return scan(text)[0]
+
+
+def number_text(text: str) -> str:
+    if text.startswith("0'"):
+        return str(ord(text[2]))
+    return text.replace("_", "")  # digit groups, as in 1_000_000
+
+
+class Parser:
+    def __init__(self, tokens: List[Token]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self, offset: int = 0) -> Optional[Token]:
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def next(self) -> Token:
+        token = self.peek()
+        if token is None:
+            raise ErrUnexpected("")
+        self.pos += 1
+        return token
+
+    def expect(self, text: str) -> None:
+        token = self.peek()
+        if token is None or token.kind != "punct" or token.text != text:
+            if text == ")":
+                raise ErrParenthesis("closing")
+            raise ErrUnexpected(token.text if token else text)
+        self.pos += 1
+
+    def at_end(self) -> bool:
+        return self.pos >= len(self.tokens)
+
+    def starts_term(self) -> bool:
+        # whether the next token can begin an operand of a prefix operator
+        token = self.peek()
+        if token is None or token.kind == "end":
+            return False
+        if token.kind == "punct":
+            return token.text in "([{"
+        if token.kind == "name" and token.text in INFIX_OPS:
+            # an infix operator still begins an operand when it is also a
+            # prefix operator or is used as a functor
+            following = self.peek(1)
+            return token.text in PREFIX_OPS or (
+                following is not None
+                and following.text == "("
+                and not following.layout_before
+            )
+        return True
+
+    def parse(self, max_prec: int = 1200) -> Term:
+        left, left_prec = self.parse_primary(max_prec)
+        return self.parse_infix(left, left_prec, max_prec)
+
+    def parse_infix(self, left: Term, left_prec: int, max_prec: int) -> Term:
+        while True:
+            token = self.peek()
+            if token is None:
+                return left
+            if token.kind == "name" or (
+                token.kind == "punct" and token.text in ",|"
+            ):
+                op = INFIX_OPS.get(token.text)
             else:
-                elements = []
-
-            tail = parse_term(tail)
-            return PrologList(elements, tail).to_struct()
-
-    elements = [parse_term(e.strip()) for e in split_args_smart(content)]
-    return PrologList(elements).to_struct()
-
-
-def find_top_level_pipe(content: str) -> int:
-    bracket_depth = 0
-    for i, char in enumerate(content):
-        if char == "[":
-            bracket_depth += 1
-        elif char == "]":
-            bracket_depth -= 1
-        elif char == "|" and bracket_depth == 0:
-            return i
-    return -1
-
-
-def split_args_smart(args_str: str) -> List[str]:
-    if not args_str.strip():
-        return []
+                op = None
+            if op is None:
+                return left
+
+            prec, kind = op
+            left_max = prec - 1 if kind[0] == "x" else prec
+            right_max = prec - 1 if kind[2] == "x" else prec
+            if prec > max_prec or left_prec > left_max:
+                return left
+
+            self.pos += 1
+            if kind != "xfy":
+                left = make_operation(token.text, left, self.parse(right_max))
+                left_prec = prec
+                continue
 
-    args = []
-    current_arg = ""
-    bracket_depth = 0
-    paren_depth = 0
+            # a chain such as a, b, c is read in a loop and folded from the
+            # right, so long bodies do not recurse once per goal
+            operands = [left]
+            names = [token.text]
+            while True:
+                operands.append(self.parse(prec - 1))
+                token = self.peek()
+                if (
+                    token is None
+                    or token.kind not in ("name", "punct")
+                    or INFIX_OPS.get(token.text) != (prec, "xfy")
+                ):
+                    break
+                names.append(token.text)
+                self.pos += 1
+            right = operands.pop()
+            while names:
+                right = make_operation(names.pop(), operands.pop(), right)
+            left = right
+            left_prec = prec
+
+    def parse_primary(self, max_prec: int) -> Tuple[Term, int]:
+        token = self.next()
+
+        if token.kind == "num":
+            return Struct(number_text(token.text), 0, []), 0
+
+        if token.kind == "var":
+            if token.text == "_":
+                return Variable(f"_G{generate_unique_id()}"), 0
+            return Variable(token.text), 0
+
+        if token.kind == "str":
+            return Struct(token.text, 0, []), 0
+
+        if token.kind == "punct":
+            if token.text == "(":
+                term = self.parse(1200)
+                self.expect(")")
+                return term, 0
+            if token.text == "[":
+                return self.parse_list(), 0
+            if token.text == "{":
+                if self.peek() is not None and self.peek().text == "}":
+                    self.pos += 1
+                    return Struct("{}", 0, []), 0
+                term = self.parse(1200)
+                self.expect("}")
+                return Struct("{}", 1, [term]), 0
+            raise ErrUnexpected(token.text)
+
+        if token.kind == "end":
+            raise ErrUnexpected(".")
+
+        # an atom, a compound term or a prefix operator
+        name = token.text
+        following = self.peek()
+        if (
+            following is not None
+            and following.kind == "punct"
+            and following.text == "("
+            and (not following.layout_before or name not in PREFIX_OPS)
+        ):
+            self.pos += 1
+            return self.parse_arguments(name), 0
 
-    for char in args_str:
-        if char == "," and bracket_depth == 0 and paren_depth == 0:
-            args.append(current_arg.strip())
-            current_arg = ""
-        else:
-            if char == "[":
-                bracket_depth += 1
-            elif char == "]":
-                bracket_depth -= 1
-            elif char == "(":
-                paren_depth += 1
-            elif char == ")":
-                paren_depth -= 1
-            current_arg += char
-
-    if current_arg.strip():
-        args.append(current_arg.strip())
-
-    return args
-
-
-def parse_struct(s: str) -> Term:
-    s = s.strip()
-    if s.startswith("(") and s.endswith(")"):
-        inner_content = s[1:-1].strip()
-        if "," in inner_content and has_top_level_operator(inner_content, ","):
-            parts = split_args(inner_content)
-            goals = [parse_struct(part.strip()) for part in parts]
-
-            if len(goals) == 1:
-                return goals[0]
-            else:
-                result = goals[0]
-                for goal in goals[1:]:
-                    result = Struct(",", 2, [result, goal])
-                return result
-        else:
-            return parse_struct(inner_content)
-    elif "," in s and has_top_level_comma(s) and "->" not in s:
-        parts = split_args(s)
-        goals = [parse_struct(part.strip()) for part in parts]
-        if len(goals) == 1:
-            return goals[0]
-        else:
-            result = goals[0]
-            for goal in goals[1:]:
-                result = Struct(",", 2, [result, goal])
-            return result
-    if "->" in s:
-        arrow_pos = s.find("->")
-        condition = s[:arrow_pos].strip()
-
-        condition_term = parse_struct(condition)
-
-        action = s[arrow_pos + 2 :].strip()
-        if ";" in action:
-            actions = action.split(";")
-            action_terms = [parse_struct(a.strip()) for a in actions]
-            return Struct("->", 3, [condition_term] + action_terms)
-        else:
-            action_term = parse_struct(action)
-            return Struct("->", 2, [condition_term, action_term])
-
-    arithmetic_ops = [
-        "+",
-        "-",
-        "*",
-        "/",
-        "//",
-        "나머지",
-        "mod",
-        "=:=",
-        "=\=",
-        ">=",
-        "=<",
-        ">",
-        "<",
-        "is",
-        ":=",
-    ]
-    for op in arithmetic_ops:
-        op_pattern = re.escape(op) + r"\s*\("
-        if re.match(op_pattern, s):
-            try:
-                return parse_arithmetic_expression(s)
-            except ErrProlog:
-                # If arithmetic parsing fails, continue with normal struct parsing
-                break
-    m = re.match(r"^([a-z0-9가-힣][a-zA-Z0-9가-힣_]*)\s*\((.*)\)$", s)
-    if (
-        s.startswith("\=")
-        or "\=" in s
-        and "=\=" not in s
-        and has_top_level_operator(s, "\=")
-    ):
-        equals_pos = s.find("\=")
-        if equals_pos > 0 and equals_pos < len(s) - 2:
-            left_part = s[:equals_pos].strip()
-            right_part = s[equals_pos + 2 :].strip()
-
-            left_term = parse_term(left_part)
-            right_term = parse_term(right_part)
-
-            return Struct("\\=", 2, [left_term, right_term])
-    elif (
-        "=" in s
-        and "=:=" not in s
-        and "=\=" not in s
-        and "=<" not in s
-        and ">=" not in s
-        and ":=" not in s
-    ) and has_top_level_operator(s, "="):
-        equals_pos = s.find("=")
-
-        if equals_pos > 0 and equals_pos < len(s) - 1:
-            left_part = s[:equals_pos].strip()
-            right_part = s[equals_pos + 1 :].strip()
-
-            left_term = parse_term(left_part)
-            right_term = parse_term(right_part)
-
-            return Struct("=", 2, [left_term, right_term])
-        if len(s) == 1 and equals_pos == 0:
-            return Struct("=", 0, [])
-    elif s.startswith("[") and s.endswith("]"):
-        return parse_list(s)
-    elif m:
-        name = m.group(1)
-        args_str = m.group(2)
-
-        # Special handling for findall
         if (
-            name == "findall"
-            or name == "모두찾기"
-            or name == "setof"
-            or name == "집합"
+            name in ("-", "+")
+            and following is not None
+            and following.kind == "num"
+            and not following.layout_before
         ):
-            parts = split_args(args_str)
-            if len(parts) != 3:
-                raise ErrUnknownPredicate(name, len(parts))
+            self.pos += 1
+            value = number_text(following.text)
+            return Struct(value if name == "+" else "-" + value, 0, []), 0
+
+        if name in PREFIX_OPS and self.starts_term():
+            prec, kind = PREFIX_OPS[name]
+            prec = min(prec, max_prec)
+            arg_max = prec if kind == "fy" else prec - 1
+            arg = self.parse(arg_max)
+            return Struct(name, 1, [arg]), prec
+
+        return Struct(name, 0, []), 0
+
+    def parse_arguments(self, name: str) -> Struct:
+        args = [self.parse(999)]
+        while self.peek() is not None and self.peek().text == ",":
+            self.pos += 1
+            args.append(self.parse(999))
+        self.expect(")")
+        name = CANONICAL_NAMES.get((name, len(args)), name)
+        return Struct(name, len(args), args)
+
+    def parse_list(self) -> Term:
+        if self.peek() is not None and self.peek().text == "]":
+            self.pos += 1
+            return Struct("[]", 0, [])
+
+        elements = [self.parse(999)]
+        tail = None
+        while self.peek() is not None and self.peek().text == ",":
+            self.pos += 1
+            elements.append(self.parse(999))
+        if self.peek() is not None and self.peek().text == "|":
+            self.pos += 1
+            tail = self.parse(999)
+        self.expect("]")
+        return PrologList(elements, tail).to_struct()
+
+    def parse_statement(self) -> Term:
+        term = self.parse(1200)
+        token = self.peek()
+        if token is None:
+            raise ErrCommandFormat(f"{term}은 마침표로 끝나야 합니다")
+        if token.kind != "end":
+            raise ErrUnexpected(token.text)
+        self.pos += 1
+        return term
+
+    def parse_clause(self) -> List[Term]:
+        return clause_goals(self.parse_statement())
+
+
+def make_operation(name: str, left: Term, right: Term) -> Struct:
+    if name == "|":
+        name = ";"
+    if (
+        name == ";"
+        and isinstance(left, Struct)
+        and left.name == "->"
+        and left.arity == 2
+    ):
+        # (Cond -> Then ; Else) is the solver's three-argument ->
+        return Struct("->", 3, left.params + [right])
+    return Struct(name, 2, [left, right])
 
-            template = parse_term(parts[0])
-            result_bag = parse_term(parts[2])
-            query_str = parts[1].strip()
-            query_str = parse_struct(query_str)
 
-            if name == "findall" or name == "모두찾기":
-                return Struct("findall", 3, [template, query_str, result_bag])
-            else:
-                return Struct("setof", 3, [template, query_str, result_bag])
-        elif name == "forall" or name == "모두만족":
-            parts = split_args(args_str)
-            if len(parts) != 2:
-                raise ErrUnknownPredicate(name, len(parts))
-
-            generator = parse_struct(parts[0].strip())
-            test = parse_struct(parts[1].strip())
-
-            return Struct("forall", 2, [generator, test])
-        elif name == "maplist" or name == "목록에적용":
-            parts = split_args(args_str)
-            if len(parts) not in {2, 3, 4, 5}:
-                raise ErrUnknownPredicate(name, len(parts))
-
-            predicate = parse_struct(parts[0].strip())
-            lists = [parse_struct(p.strip()) for p in parts[1:]]
-
-            return Struct("maplist", len(parts), [predicate] + lists)
-        elif (
-            name == "writeln"
-            or name == "write"
-            or name == "쓰기"
-            or name == "쓰고줄바꿈"
-        ):
-            if args_str.startswith('"') and args_str.endswith('"'):
-                return Struct(name, 1, [args_str])
-            else:
-                parts = split_args(args_str)
-                params = [parse_term(p) for p in parts]
-                return Struct(name, len(params), params)
-        else:
-            parts = split_args(args_str)
-            params = [parse_term(p) for p in parts]
-            return Struct(name, len(params), params)
-    else:
-        if not s:
-            raise ErrInvalidTerm("빈 항")
-        if any(op in s for op in arithmetic_ops):
-            try:
-                result = parse_arithmetic_expression(s)
-                return result
-            except (ErrProlog, Exception) as e:
-                for op in ["-", "+", "*", "/"]:
-                    if op in s:
-                        paren_depth = 0
-                        op_pos = -1
-                        for i, char in enumerate(s):
-                            if char == "(":
-                                paren_depth += 1
-                            elif char == ")":
-                                paren_depth -= 1
-                            elif char == op and paren_depth == 0:
-                                op_pos = i
-                                break
-
-                        if op_pos > 0:
-                            left_part = s[:op_pos].strip()
-                            right_part = s[op_pos + 1 :].strip()
-
-                            try:
-                                left_term = (
-                                    parse_term(left_part) if left_part else None
-                                )
-                                right_term = (
-                                    parse_term(right_part)
-                                    if right_part
-                                    else None
-                                )
-
-                                if left_term and right_term:
-                                    result = Struct(
-                                        op, 2, [left_term, right_term]
-                                    )
-                                    return result
-                            except Exception as e:
-                                continue
-                pass
-
-        if s[0].isupper() or s[0] == "_":
-            return Variable(s)
-        else:
-            result = Struct(s, 0, [])
-            return result
+def conjunction_goals(term: Term) -> List[Term]:
+    goals = []
+    while isinstance(term, Struct) and term.name == "," and term.arity == 2:
+        goals.extend(conjunction_goals(term.params[0]))
+        term = term.params[1]
+    goals.append(term)
+    return goals
 
 
-def parse_term(s: str) -> Term:
-    s = s.strip()
-
-    if any(
-        op in s
-        for op in [
-            "is",
-            ":=",
-            "+",
-            "-",
-            "*",
-            "/",
-            "//",
-            "나머지",
-            "mod",
-            ">",
-            "<",
-            ">=",
-            "=<",
-            "=:=",
-            "=\=",
-        ]
+def clause_goals(term: Term) -> List[Term]:
+    if isinstance(term, Struct) and term.name == ":-" and term.arity == 2:
+        return [term.params[0]] + conjunction_goals(term.params[1])
+    if (
+        isinstance(term, Struct)
+        and term.name in (":-", "?-")
+        and term.arity == 1
     ):
-        return parse_struct(s)
-    if s and (s[0].isupper() or s[0] == "_"):
-        if s == "_":
-            return Variable(f"_G{generate_unique_id()}")
-        return Variable(s)
-
-    return parse_struct(s)
+        return conjunction_goals(term.params[0])
+    return conjunction_goals(term)
 
 
 def generate_unique_id() -> int:
@@ -569,56 +468,78 @@ def generate_unique_id() -> int:
     return generate_unique_id.counter
 
 
-def flatten_semicolons(head: Term, tail_str: str) -> List[List[Term]]:
-    predicates = []
-    tails = [parse_struct(part.strip()) for part in tail_str.strip().split(";")]
-    if head is not None:
-        for tail in tails:
-            predicates.append([head] + [tail])
-    else:
-        for tail in tails:
-            predicates.append([tail])
-
-    return predicates
-
-
-def parse_line(line: str) -> List[Term]:
-    stripped = line.strip()
-    if not stripped:
-        return []
-    if not stripped.endswith("."):
-        raise ErrCommandFormat(f"{line}은 마침표로 끝나야 합니다")
-    body = stripped[:-1]
-    if ":-" in body:
-        head_str, tail_str = body.split(":-", 1)
-        head = parse_struct(head_str.strip())
-
-        if (";" in tail_str) and ("->" not in tail_str):
-            return flatten_semicolons(head, tail_str)
-        else:
-            parts = split_args(tail_str)
-            tails = [parse_struct(part.strip()) for part in parts]
-            return [head] + tails
-    else:
-        if (";" in body) and ("->" not in body):
-            return flatten_semicolons(None, body)
-        else:
-            parts = split_args(body)
-            structs = [parse_struct(part.strip()) for part in parts]
-            return structs
+def iter_clauses(text: str) -> Iterator[List[Term]]:
+    parser = Parser(tokenize(text))
+    while not parser.at_end():
+        yield parser.parse_clause()
+
+
+def statement_error(
+    text: str, start: int, end: int, line: int, error: ErrSyntax
+) -> ErrSyntax:
+    # names the statement and the line it starts on
+    statement = text[start:end]
+    first = start + len(statement) - len(statement.lstrip())
+    line += text.count("\n", 0, first)
+    return ErrSyntax(f"'{' '.join(statement.split())}': {error}", line)
+
+
+def iter_file_statements(
+    stream: TextIO,
+    skip: Callable[[str], bool] = lambda text: False,
+    chunk_size: int = 1 << 16,
+) -> Iterator[Tuple[str, Optional[Term]]]:
+    # Reads a program in chunks and yields the text of each statement with
+    # its term as soon as it is parsed, so only the statement being read and
+    # one chunk are held in memory. A statement whose text skip accepts is
+    # neither lexed nor parsed and comes with None. When no statement ends
+    # inside a chunk the next read is doubled.
+    buffer = ""
+    line = 1
+    size = chunk_size
+    while True:
+        chunk = stream.read(size)
+        final = not chunk
+        buffer += chunk
+        start = 0
+        for end in statement_ends(buffer, final):
+            text = buffer[start:end].strip()
+            if skip(text):
+                term = None
+            else:
+                try:
+                    term = Parser(tokenize(buffer[start:end])).parse_statement()
+                except ErrSyntax as e:
+                    raise statement_error(buffer, start, end, line, e) from e
+            yield text, term
+            start = end
+        if final:
+            if tokenize(buffer[start:]):
+                rest = " ".join(buffer[start:].split())
+                raise ErrPeriod(f"'{rest}'")
+            return
+        line += buffer.count("\n", 0, start)
+        buffer = buffer[start:]
+        size = chunk_size if start else size * 2
+
+
+def iter_file_terms(
+    stream: TextIO, chunk_size: int = 1 << 16
+) -> Iterator[Term]:
+    for _, term in iter_file_statements(stream, chunk_size=chunk_size):
+        yield term
 
 
 def parse_string(s: str) -> List[List[Term]]:
-    parsed = []
-    for line in s.splitlines():
-        parsed_line = parse_line(line)
-        if (
-            parsed_line
-            and isinstance(parsed_line, list)
-            and isinstance(parsed_line[0], list)
-        ):
-            for p in parsed_line:
-                parsed.append(p)
-        else:
-            parsed.append(parsed_line)
-    return parsed
+    return list(iter_clauses(s))
+
+
+def parse_term(s: str) -> Term:
+    # a single term without the closing period
+    parser = Parser(tokenize(s))
+    if parser.at_end():
+        raise ErrInvalidTerm("빈 항")
+    term = parser.parse(1200)
+    if not parser.at_end():
+        raise ErrUnexpected(parser.peek().text)
+    return term
@@ -0,0 +1,210 @@
+import gc
+import hashlib
+import marshal
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from PARSER.ast import ArrayList, Struct, Term, Variable
+
+# Each consulted file gets a sidecar cache next to it (foo.kpl ->
+# foo.kplc) holding its directives and its clauses grouped by predicate,
+# so consulting an unchanged file again skips the parser. The cache starts
+# with the interpreter version and a digest of the source, and is used only
+# when both match. Every clause also keeps a digest of its statement's text,
+# which lets a reload of an edited file parse only the statements that
+# changed.
+#
+# Terms are stored as marshal data:
+#   atom              name
+#   variable          (name,)
+#   compound          (name, arg1, ..., argN)
+#   ground list       [elem1, ..., elemN]         (an ArrayList)
+#   other list cells  (None, tail, elem1, ..., elemN)
+# and a clause as a tuple of its head and goals.
+
+# bump whenever the parser or the term classes change what a statement
+# parses to, so caches written by older code are not trusted
+FORMAT_VERSION = 2
+INTERPRETER_VERSION = (FORMAT_VERSION, marshal.version, sys.version_info[:2])
+
+CACHE_SUFFIX = "c"
+
+PredicateKey = Tuple[str, int]
+
+
+def encode_term(term: Term):
+    if isinstance(term, Variable):
+        return (term.name,)
+    if isinstance(term, ArrayList):
+        return [encode_term(t) for t in term.items[term.start :]]
+    if term.arity == 0:
+        return term.name
+    if term.name == "." and term.arity == 2:
+        # a chain of cons cells is stored flat, so long lists do not nest
+        elements = []
+        while (
+            isinstance(term, Struct)
+            and not isinstance(term, ArrayList)
+            and term.name == "."
+            and term.arity == 2
+        ):
+            elements.append(encode_term(term.params[0]))
+            term = term.params[1]
+        return (None, encode_term(term), *elements)
+    return (term.name, *[encode_term(p) for p in term.params])
+
+
+def decode_term(data, atoms: Dict[str, Struct]) -> Term:
+    # atoms are shared through the given table, as terms are never mutated
+    kind = type(data)
+    if kind is str:
+        atom = atoms.get(data)
+        if atom is None:
+            atom = atoms[data] = Struct(data, 0, [])
+        return atom
+    if kind is list:
+        return ArrayList(tuple([decode_term(d, atoms) for d in data]))
+    if len(data) == 1:
+        return Variable(data[0])
+    if data[0] is None:
+        term = decode_term(data[1], atoms)
+        for element in reversed(data[2:]):
+            term = Struct(".", 2, [decode_term(element, atoms), term])
+        return term
+    params = [decode_term(d, atoms) for d in data[1:]]
+    return Struct(data[0], len(params), params)
+
+
+def encode_clause(clause: List[Term]) -> tuple:
+    return tuple(encode_term(t) for t in clause)
+
+
+def decode_clause(data: tuple, atoms: Dict[str, Struct]) -> List[Term]:
+    return [decode_term(t, atoms) for t in data]
+
+
+def statement_digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+def source_digest(path: str) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def cache_path(path: str) -> str:
+    return path + CACHE_SUFFIX
+
+
+class ClauseCache:
+    # the encoded contents of one source file, as written to its cache
+
+    def __init__(self, digest: bytes = b""):
+        # the digest of the source this was read from
+        self.digest = digest
+        self.directives: List = []
+        self.predicates: Dict[PredicateKey, List[tuple]] = {}
+        # the statement digest of each clause, in the same order
+        self.digests: Dict[PredicateKey, List[bytes]] = {}
+        # cleared when a term is nested too deeply to encode
+        self.complete = True
+
+    def add_directive(self, term: Term) -> None:
+        try:
+            self.directives.append(encode_term(term))
+        except RecursionError:
+            self.complete = False
+
+    def add_clause(
+        self, key: PredicateKey, clause: List[Term], digest: bytes
+    ) -> None:
+        try:
+            self.add_encoded(key, encode_clause(clause), digest)
+        except RecursionError:
+            self.complete = False
+
+    def add_encoded(
+        self, key: PredicateKey, data: tuple, digest: bytes
+    ) -> None:
+        self.predicates.setdefault(key, []).append(data)
+        self.digests.setdefault(key, []).append(digest)
+
+    def clauses_by_digest(self) -> Dict[bytes, Tuple[PredicateKey, tuple]]:
+        return {
+            digest: (key, data)
+            for key, clauses in self.predicates.items()
+            for digest, data in zip(self.digests[key], clauses, strict=True)
+        }
+
+    def dumps(self) -> bytes:
+        # raises ValueError when a term holds something marshal cannot store
+        return marshal.dumps(
+            (
+                INTERPRETER_VERSION,
+                self.digest,
+                self.directives,
+                [
+                    (key, clauses, self.digests[key])
+                    for key, clauses in self.predicates.items()
+                ],
+            )
+        )
+
+    @staticmethod
+    def loads(data: bytes) -> Optional["ClauseCache"]:
+        # None when the data is broken or was written by another version
+        #
+        # the loaded tuples and lists cannot form cycles, so the cycle
+        # collector running while they are built is wasted time
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            version, digest, directives, predicates = marshal.loads(data)
+        except (EOFError, ValueError, TypeError):
+            return None
+        finally:
+            if collecting:
+                gc.enable()
+        if version != INTERPRETER_VERSION:
+            return None
+        cache = ClauseCache(digest)
+        cache.directives = directives
+        for key, clauses, digests in predicates:
+            cache.predicates[key] = clauses
+            cache.digests[key] = digests
+        return cache
+
+    def save(self, path: str) -> None:
+        # written beside the target and renamed, so a reader never sees a
+        # partial file; a cache that cannot be written is simply skipped
+        if not self.complete:
+            return
+        target = cache_path(path)
+        temp = f"{target}.{os.getpid()}.tmp"
+        try:
+            data = self.dumps()
+            with open(temp, "wb") as f:
+                f.write(data)
+            os.replace(temp, target)
+        except (OSError, ValueError):
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+
+    @staticmethod
+    def load(path: str, digest: bytes) -> Optional["ClauseCache"]:
+        # None when the cache is missing, stale or unreadable
+        try:
+            with open(cache_path(path), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        cache = ClauseCache.loads(data)
+        if cache is None or cache.digest != digest:
+            return None
+        return cache
@@ -1,25 +1,53 @@
 # coding: utf-8
-from typing import Dict, List, Tuple
+import math
+import operator
+import random
+import sys
+import time
+from fractions import Fraction
+from typing import Callable, Dict, List, Tuple, Union
 
 from PARSER.ast import Struct, Term, Variable
+from PARSER.Data.assoc import (
+    handle_assoc_to_keys,
+    handle_assoc_to_list,
+    handle_empty_assoc,
+    handle_get_assoc,
+    handle_list_to_assoc,
+    handle_put_assoc,
+)
+from PARSER.Data.compare import handle_compare, handle_term_order, number_value
 from PARSER.Data.list import (
     handle_atom_chars,
     handle_between,
     handle_flatten,
     handle_is_list,
     handle_keysort,
+    handle_last,
     handle_list_append,
     handle_list_length,
     handle_list_permutation,
     handle_member,
     handle_memberchk,
-    handle_ord_subset,
+    handle_msort,
+    handle_nth0,
+    handle_nth1,
+    handle_numlist,
     handle_reverse,
     handle_select,
     handle_sort,
     handle_subtract,
+    integer_value,
 )
-from PARSER.parser import parse_struct
+from PARSER.Data.ordset import (
+    handle_list_to_ord_set,
+    handle_ord_intersection,
+    handle_ord_memberchk,
+    handle_ord_subset,
+    handle_ord_subtract,
+    handle_ord_union,
+)
+from PARSER.parser import parse_term
 from UTIL.err import (
     AssertException,
     ErrArithmetic,
@@ -37,6 +65,8 @@ from UTIL.str_util import struct_to_infix
 
 from .unification import extract_variable, match_params, substitute_term
 
+Number = Union[int, float, Fraction]
+
 
 def handle_is(
     goal: Struct, rest_goals: List[Term], old_unif: Dict[str, Term]
@@ -51,9 +81,7 @@ def handle_is(
         if isinstance(result, Variable):
             raise ErrUninstantiated(result.name, "산술 표현식")
 
-        result_term = Struct(
-            str(int(result) if result.is_integer() else result), 0, []
-        )
+        result_term = number_term(result)
 
         success, new_unif = match_params([left], [result_term], old_unif)
         return success, rest_goals, [new_unif] if success else []
@@ -63,51 +91,259 @@ def handle_is(
         return False, [], []
 
 
-def evaluate_arithmetic(expr: Term, unif: Dict[str, Term]) -> float:
+def number_term(value: Number) -> Struct:
+    if isinstance(value, Fraction):
+        if value.denominator == 1:
+            return Struct(str(value.numerator), 0, [])
+        return Struct(f"{value.numerator}r{value.denominator}", 0, [])
+    return Struct(str(value), 0, [])
+
+
+def integer_term(value: int) -> Struct:
+    return Struct(str(value), 0, [])
+
+
+def handle_succ(
+    goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 2:
+        raise ErrUnknownPredicate("다음수", len(goal.params))
+
+    before, after = [substitute_term(unif, p) for p in goal.params]
+    if isinstance(before, Variable):
+        after_int = integer_value(after, "다음수")
+        if after_int < 0:
+            raise ErrType(after.name, "0 이상의 정수")
+        if after_int == 0:
+            return False, rest_goals, []
+        target, result = before, after_int - 1
+    else:
+        before_int = integer_value(before, "다음수")
+        if before_int < 0:
+            raise ErrType(before.name, "0 이상의 정수")
+        target, result = after, before_int + 1
+
+    success, new_unif = match_params([target], [integer_term(result)], unif)
+    return success, rest_goals, [new_unif] if success else []
+
+
+def handle_plus(
+    goal: Struct, rest_goals: List[Term], unif: Dict[str, Term]
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 3:
+        raise ErrUnknownPredicate("덧셈", len(goal.params))
+
+    x, y, z = [substitute_term(unif, p) for p in goal.params]
+    # any two of the three arguments determine the third
+    if isinstance(z, Variable):
+        target = z
+        result = integer_value(x, "덧셈") + integer_value(y, "덧셈")
+    elif isinstance(y, Variable):
+        target = y
+        result = integer_value(z, "덧셈") - integer_value(x, "덧셈")
+    else:
+        target = x
+        result = integer_value(z, "덧셈") - integer_value(y, "덧셈")
+
+    success, new_unif = match_params([target], [integer_term(result)], unif)
+    return success, rest_goals, [new_unif] if success else []
+
+
+def integer_operand(value: Number, function_name: str) -> int:
+    if not isinstance(value, int):
+        raise ErrType(number_term(value).name, f"정수 ({function_name}의 인수)")
+    return value
+
+
+def nonzero(value: Number) -> Number:
+    if value == 0:
+        raise ErrDivisionByZero()
+    return value
+
+
+def truncate_division(left: int, right: int) -> int:
+    # rounds toward zero, unlike Python's floor division
+    quotient = abs(left) // abs(right)
+    return quotient if (left < 0) == (right < 0) else -quotient
+
+
+def divide(left: Number, right: Number) -> Number:
+    nonzero(right)
+    if isinstance(left, int) and isinstance(right, int):
+        # integers stay exact when the division is exact
+        if left % right == 0:
+            return left // right
+        return left / right
+    return left / right
+
+
+def power(left: Number, right: Number) -> Number:
+    if isinstance(left, int) and isinstance(right, int) and right < 0:
+        return float(left) ** right
+    return left**right
+
+
+def int_power(left: Number, right: Number) -> Number:
+    # ^ keeps integers exact; a negative exponent only has an integer
+    # result for 1 and -1
+    if isinstance(left, int) and isinstance(right, int) and right < 0:
+        if left == 1:
+            return 1
+        if left == -1:
+            return 1 if right % 2 == 0 else -1
+        if left == 0:
+            raise ErrDivisionByZero()
+        raise ErrType(str(right), "0 이상의 정수")
+    return left**right
+
+
+def rational_division(left: Number, right: Number) -> Fraction:
+    for value in (left, right):
+        if isinstance(value, float):
+            raise ErrType(str(value), "정수 또는 유리수")
+    return Fraction(left) / nonzero(Fraction(right))
+
+
+def remainder(left: int, right: int) -> int:
+    return left - right * truncate_division(left, nonzero(right))
+
+
+def sign(value: Number) -> Number:
+    result = (value > 0) - (value < 0)
+    return float(result) if isinstance(value, float) else result
+
+
+def round_half_away(value: Number) -> int:
+    if isinstance(value, int):
+        return value
+    rounded = math.floor(abs(value) + Fraction(1, 2))
+    return rounded if value >= 0 else -rounded
+
+
+def logarithm(value: Number, base: Number = None) -> float:
+    if value <= 0 or (base is not None and base <= 0):
+        raise ErrArithmetic("log", "정의역 오류")
+    if base is None:
+        return math.log(value)
+    return math.log(value) / math.log(base)
+
+
+def integer_function(name: str, function: Callable) -> Callable:
+    # wraps a function that is only defined on integers
+    def checked(*args):
+        return function(*(integer_operand(arg, name) for arg in args))
+
+    return checked
+
+
+def msb(value: int) -> int:
+    if value <= 0:
+        raise ErrType(str(value), "양의 정수")
+    return value.bit_length() - 1
+
+
+def random_below(limit: int) -> int:
+    if limit <= 0:
+        raise ErrType(str(limit), "양의 정수")
+    return random.randrange(limit)
+
+
+# Evaluable functions keyed by (name, arity); arity 0 entries are the
+# constants. Each node of an expression costs one lookup here.
+ARITH_FUNCTIONS: Dict[Tuple[str, int], Callable[..., Number]] = {
+    ("pi", 0): lambda: math.pi,
+    ("e", 0): lambda: math.e,
+    ("inf", 0): lambda: math.inf,
+    ("nan", 0): lambda: math.nan,
+    ("epsilon", 0): lambda: sys.float_info.epsilon,
+    ("max_tagged_integer", 0): lambda: (1 << 60) - 1,
+    ("random_float", 0): random.random,
+    ("cputime", 0): time.process_time,
+    ("realtime", 0): lambda: int(time.time()),
+    ("-", 1): operator.neg,
+    ("+", 1): operator.pos,
+    ("abs", 1): abs,
+    ("sign", 1): sign,
+    ("sqrt", 1): math.sqrt,
+    ("exp", 1): math.exp,
+    ("log", 1): logarithm,
+    ("log", 2): lambda base, value: logarithm(value, base),
+    ("log2", 1): lambda value: logarithm(value, 2),
+    ("sin", 1): math.sin,
+    ("cos", 1): math.cos,
+    ("tan", 1): math.tan,
+    ("asin", 1): math.asin,
+    ("acos", 1): math.acos,
+    ("atan", 1): math.atan,
+    ("atan", 2): math.atan2,
+    ("atan2", 2): math.atan2,
+    ("floor", 1): math.floor,
+    ("ceiling", 1): math.ceil,
+    ("round", 1): round_half_away,
+    ("integer", 1): round_half_away,
+    ("truncate", 1): math.trunc,
+    ("float", 1): float,
+    ("float_integer_part", 1): lambda value: float(math.trunc(value)),
+    ("float_fractional_part", 1): lambda value: value - math.trunc(value),
+    ("\\", 1): integer_function("\\", operator.invert),
+    ("msb", 1): integer_function("msb", msb),
+    ("random", 1): integer_function("random", random_below),
+    ("+", 2): operator.add,
+    ("-", 2): operator.sub,
+    ("*", 2): operator.mul,
+    ("/", 2): divide,
+    ("rdiv", 2): rational_division,
+    ("**", 2): power,
+    ("^", 2): int_power,
+    ("mod", 2): lambda left, right: left % nonzero(right),
+    ("나머지", 2): lambda left, right: left % nonzero(right),
+    ("min", 2): lambda left, right: right if right < left else left,
+    ("max", 2): lambda left, right: right if right > left else left,
+    ("//", 2): integer_function(
+        "//", lambda left, right: truncate_division(left, nonzero(right))
+    ),
+    ("div", 2): integer_function(
+        "div", lambda left, right: left // nonzero(right)
+    ),
+    ("rem", 2): integer_function("rem", remainder),
+    ("gcd", 2): integer_function("gcd", math.gcd),
+    (">>", 2): integer_function(">>", operator.rshift),
+    ("<<", 2): integer_function("<<", operator.lshift),
+    ("/\\", 2): integer_function("/\\", operator.and_),
+    ("\\/", 2): integer_function("\\/", operator.or_),
+    ("xor", 2): integer_function("xor", operator.xor),
+}
+
+
+def evaluate_arithmetic(expr: Term, unif: Dict[str, Term]) -> Number:
+    # integers stay Python ints, so results of any size are exact; floats
+    # appear only when an operand is a float or a function needs one
     expr = substitute_term(unif, expr)
 
     if isinstance(expr, Variable):
         raise ErrUninstantiated(expr.name, "산술 표현식")
     elif isinstance(expr, Struct):
         if expr.arity == 0:
-            try:
-                return float(expr.name)
-            except ValueError as e:
-                raise ErrNotNumber(expr.name) from e
-        elif expr.arity == 2:
-            left_val = evaluate_arithmetic(expr.params[0], unif)
-            right_val = evaluate_arithmetic(expr.params[1], unif)
-            if expr.name == "+":
-                return left_val + right_val
-            elif expr.name == "-":
-                return left_val - right_val
-            elif expr.name == "*":
-                return left_val * right_val
-            elif expr.name == "/":
-                if right_val == 0:
-                    raise ErrDivisionByZero()
-                return left_val / right_val
-            elif expr.name == "//":
-                if right_val == 0:
-                    raise ErrDivisionByZero()
-                return float(int(left_val // right_val))
-            elif expr.name == "나머지" or expr.name == "mod":
-                if right_val == 0:
-                    raise ErrDivisionByZero()
-                return left_val % right_val
-            else:
-                raise ErrUnknownOperator(expr.name)
-        elif expr.arity == 1:
-            val = evaluate_arithmetic(expr.params[0], unif)
-            if expr.name == "-":
-                return -val
-            elif expr.name == "+":
-                return val
-            else:
-                raise ErrUnknownOperator(expr.name)
+            value = number_value(expr)
+            if value is not None:
+                return value
 
-        else:
-            raise ErrArithmetic(expr.name)
+        function = ARITH_FUNCTIONS.get((expr.name, expr.arity))
+        if function is None:
+            if expr.arity == 0:
+                raise ErrNotNumber(expr.name)
+            raise ErrUnknownOperator(expr.name)
+
+        args = [evaluate_arithmetic(p, unif) for p in expr.params]
+        try:
+            return function(*args)
+        except OverflowError as e:
+            raise ErrArithmetic(expr.name, "범위 초과") from e
+        except ZeroDivisionError as e:
+            # e.g. 0 ** -1, which power passes on to Python
+            raise ErrDivisionByZero() from e
+        except ValueError as e:
+            raise ErrArithmetic(expr.name, "정의역 오류") from e
 
     return None
 
@@ -212,7 +448,7 @@ def handle_write(
     if writeStr.startswith("'") or writeStr.endswith("'"):
         raise ErrParsing({writeStr})
 
-    struct_form = parse_struct(writeStr)
+    struct_form = parse_term(writeStr)
     print(struct_to_infix(struct_form))
     return True, rest_goals, [unif]
 
@@ -244,7 +480,7 @@ def handle_display(
     if writeStr.startswith("'") or writeStr.endswith("'"):
         raise ErrParsing({writeStr})
 
-    struct_form = parse_struct(writeStr)
+    struct_form = parse_term(writeStr)
     print(struct_form, end="")
     return True, rest_goals, [unif]
 
@@ -642,6 +878,16 @@ BUILTINS = {
     "정렬": handle_sort,
     "keysort": handle_keysort,
     "키정렬": handle_keysort,
+    "msort": handle_msort,
+    "모두정렬": handle_msort,
+    "compare": handle_compare,
+    "비교": handle_compare,
+    "==": handle_term_order,
+    "\\==": handle_term_order,
+    "@<": handle_term_order,
+    "@>": handle_term_order,
+    "@=<": handle_term_order,
+    "@>=": handle_term_order,
     "char_code": handle_char_code,
     "문자코드": handle_char_code,
     "atom_chars": handle_atom_chars,
@@ -650,12 +896,46 @@ BUILTINS = {
     "평평히": handle_flatten,
     "between": handle_between,
     "이내": handle_between,
+    "numlist": handle_numlist,
+    "수목록": handle_numlist,
+    "succ": handle_succ,
+    "다음수": handle_succ,
+    "plus": handle_plus,
+    "덧셈": handle_plus,
     "ord_subset": handle_ord_subset,
     "서열부분집합": handle_ord_subset,
+    "list_to_ord_set": handle_list_to_ord_set,
+    "서열집합": handle_list_to_ord_set,
+    "ord_union": handle_ord_union,
+    "서열합집합": handle_ord_union,
+    "ord_intersection": handle_ord_intersection,
+    "서열교집합": handle_ord_intersection,
+    "ord_subtract": handle_ord_subtract,
+    "서열차집합": handle_ord_subtract,
+    "ord_memberchk": handle_ord_memberchk,
+    "서열원소점검": handle_ord_memberchk,
     "select": handle_select,
     "선택": handle_select,
     "atom": handle_atomic,
     "상수": handle_atomic,
+    "nth0": handle_nth0,
+    "번째0": handle_nth0,
+    "nth1": handle_nth1,
+    "번째": handle_nth1,
+    "last": handle_last,
+    "마지막": handle_last,
+    "empty_assoc": handle_empty_assoc,
+    "빈연관": handle_empty_assoc,
+    "put_assoc": handle_put_assoc,
+    "연관넣기": handle_put_assoc,
+    "get_assoc": handle_get_assoc,
+    "연관찾기": handle_get_assoc,
+    "list_to_assoc": handle_list_to_assoc,
+    "리스트연관": handle_list_to_assoc,
+    "assoc_to_list": handle_assoc_to_list,
+    "연관리스트": handle_assoc_to_list,
+    "assoc_to_keys": handle_assoc_to_keys,
+    "연관키": handle_assoc_to_keys,
 }
 
 
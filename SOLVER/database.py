@@ -0,0 +1,246 @@
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from PARSER.ast import Struct, Term, Variable
+from PARSER.serialize import ClauseCache, decode_clause
+from SOLVER.facts import (
+    ColumnTable,
+    FactTable,
+    SymbolTable,
+    is_fact,
+    table_of,
+)
+
+PredicateKey = Tuple[str, int]
+
+# the clauses of one predicate by the name and arity of one argument
+ColumnIndex = Dict[Tuple[str, int], List[List[Term]]]
+
+# a predicate of ground facts at least this long is kept as a fact table
+FACT_TABLE_MIN = 512
+
+# gives the solutions of a call to an external predicate
+ExternalSolutions = Callable[
+    [Struct, Dict[str, Term]], Iterator[Dict[str, Term]]
+]
+
+
+def clause_key(clause: List[Term]) -> Optional[PredicateKey]:
+    head = clause[0] if clause else None
+    if not isinstance(head, Struct):
+        return None
+    return head.name, head.arity
+
+
+class Database:
+    # The clause store: each predicate's clauses in source order under its
+    # name and arity, so a call looks up only its own. Predicates read from
+    # a clause cache stay encoded until they are first called. The encoded
+    # contents of each consulted file are kept in sources, so a predicate
+    # can be rebuilt from them when a file is reloaded. Arguments declared
+    # indexed get a hash index, built on first use and dropped whenever the
+    # predicate changes. Large predicates of ground facts are kept in fact
+    # tables instead of clause lists; see facts.py. Predicates declared
+    # external are answered by a function instead of clauses, such as a
+    # query on an SQLite table.
+
+    def __init__(self, clauses: Iterable[List[Term]] = ()):
+        self.predicates: Dict[PredicateKey, List[List[Term]]] = {}
+        self.encoded: Dict[PredicateKey, List[tuple]] = {}
+        self.atoms: Dict[str, Struct] = {}
+        self.sources: Dict[str, ClauseCache] = {}
+        self.index_columns: Dict[PredicateKey, Set[int]] = {}
+        self.indexes: Dict[PredicateKey, Dict[int, Optional[ColumnIndex]]] = {}
+        self.tables: Dict[PredicateKey, ColumnTable] = {}
+        self.symbols = SymbolTable()
+        self.externals: Dict[PredicateKey, ExternalSolutions] = {}
+        for clause in clauses:
+            self.append(clause)
+
+    def materialize(self, key: PredicateKey) -> None:
+        encoded = self.encoded.pop(key, None)
+        if encoded is not None:
+            decoded = [decode_clause(c, self.atoms) for c in encoded]
+            table = self.tables.get(key)
+            if isinstance(table, FactTable) and all(
+                is_fact(c) for c in decoded
+            ):
+                for clause in decoded:
+                    table.append(clause[0].params)
+                return
+            self.unpack(key)
+            self.predicates[key] = self.predicates.get(key, []) + decoded
+            self.indexes.pop(key, None)
+            self.compact(key)
+
+    def compact(self, key: PredicateKey) -> None:
+        # moves a large predicate of ground facts into a fact table
+        clauses = self.predicates.get(key)
+        if clauses is None or len(clauses) < FACT_TABLE_MIN:
+            return
+        table = table_of(*key, clauses, self.symbols)
+        if table is not None:
+            self.tables[key] = table
+            del self.predicates[key]
+            self.indexes.pop(key, None)
+
+    def unpack(self, key: PredicateKey) -> None:
+        # turns a fact table back into clauses, before a clause that is not
+        # a ground fact joins it, one is put in front of it or a mapped
+        # table is added to
+        table = self.tables.pop(key, None)
+        if table is not None:
+            self.predicates[key] = list(table.all_rows())
+
+    def add_encoded(self, key: PredicateKey, clauses: List[tuple]) -> None:
+        # encoded clauses always follow the decoded ones, so clauses from
+        # several files stay encoded and in order
+        self.encoded[key] = self.encoded.get(key, []) + clauses
+
+    def attach(self, key: PredicateKey, table: ColumnTable) -> None:
+        # defines a predicate by a fact table, replacing its clauses
+        self.predicates.pop(key, None)
+        self.encoded.pop(key, None)
+        self.indexes.pop(key, None)
+        self.externals.pop(key, None)
+        self.tables[key] = table
+
+    def add_external(
+        self, key: PredicateKey, solutions: ExternalSolutions
+    ) -> None:
+        # defines a predicate outside the program, replacing its clauses
+        self.predicates.pop(key, None)
+        self.encoded.pop(key, None)
+        self.indexes.pop(key, None)
+        self.tables.pop(key, None)
+        self.externals[key] = solutions
+
+    def rebuild(self, key: PredicateKey) -> None:
+        # redefines a predicate from the files that define it, dropping
+        # its current clauses; it is decoded again on its next call
+        self.predicates.pop(key, None)
+        self.encoded.pop(key, None)
+        self.indexes.pop(key, None)
+        self.tables.pop(key, None)
+        encoded = [
+            c
+            for source in self.sources.values()
+            for c in source.predicates.get(key, [])
+        ]
+        if encoded:
+            self.encoded[key] = encoded
+
+    def append(self, clause: List[Term]) -> None:
+        key = clause_key(clause)
+        self.materialize(key)
+        table = self.tables.get(key)
+        if isinstance(table, FactTable) and is_fact(clause):
+            table.append(clause[0].params)
+            return
+        self.unpack(key)
+        self.predicates.setdefault(key, []).append(clause)
+        self.indexes.pop(key, None)
+
+    def extend(self, key: PredicateKey, clauses: Iterable[List[Term]]) -> None:
+        # Appends many clauses at once. A predicate that has no clauses yet
+        # or is a fact table takes ground facts straight into the table, so
+        # a bulk import never holds its rows as clauses.
+        self.materialize(key)
+        if not isinstance(self.tables.get(key), (FactTable, type(None))):
+            self.unpack(key)
+        clauses = iter(clauses)
+        if key[1] > 0 and key not in self.predicates:
+            table = self.tables.setdefault(key, FactTable(*key, self.symbols))
+            for clause in clauses:
+                if not is_fact(clause):
+                    self.unpack(key)
+                    self.predicates[key].append(clause)
+                    break
+                table.append(clause[0].params)
+            if not len(table):
+                self.tables.pop(key, None)
+        self.predicates.setdefault(key, []).extend(clauses)
+        self.indexes.pop(key, None)
+
+    def insert_first(self, clause: List[Term]) -> None:
+        key = clause_key(clause)
+        self.materialize(key)
+        self.unpack(key)
+        self.predicates.setdefault(key, []).insert(0, clause)
+        self.indexes.pop(key, None)
+
+    def clauses(self, name: str, arity: int) -> Sequence[List[Term]]:
+        key = (name, arity)
+        if key in self.encoded:
+            self.materialize(key)
+        table = self.tables.get(key)
+        if table is not None:
+            return table.all_rows()
+        return self.predicates.get(key, [])
+
+    def add_index(self, key: PredicateKey, column: int) -> None:
+        # a fact table indexes any column on demand, so it is only built now
+        if key in self.tables:
+            self.tables[key].index(column)
+        else:
+            self.index_columns.setdefault(key, set()).add(column)
+
+    def column_index(
+        self, key: PredicateKey, column: int
+    ) -> Optional[ColumnIndex]:
+        # None when some clause has a variable in the column, as it would
+        # have to be tried for every value
+        indexes = self.indexes.setdefault(key, {})
+        if column not in indexes:
+            index = {}
+            for clause in self.clauses(*key):
+                arg = clause[0].params[column]
+                if isinstance(arg, Variable):
+                    index = None
+                    break
+                index.setdefault((arg.name, arg.arity), []).append(clause)
+            indexes[column] = index
+        return indexes[column]
+
+    def candidates(
+        self, goal: Struct, unif: Dict[str, Term]
+    ) -> Sequence[List[Term]]:
+        # the clauses a call may match, narrowed through the first indexed
+        # argument the call binds; they keep their source order
+        key = (goal.name, goal.arity)
+        clauses = self.clauses(*key)
+        if key in self.tables:
+            return self.tables[key].candidates(goal, unif)
+        for column in self.index_columns.get(key, ()):
+            arg = goal.params[column]
+            while isinstance(arg, Variable) and arg.name in unif:
+                arg = unif[arg.name]
+            if isinstance(arg, Struct):
+                index = self.column_index(key, column)
+                if index is not None:
+                    return index.get((arg.name, arg.arity), [])
+        return clauses
+
+    def __iter__(self) -> Iterator[List[Term]]:
+        for key in list(self.encoded):
+            self.materialize(key)
+        for clauses in list(self.predicates.values()):
+            yield from clauses
+        for table in list(self.tables.values()):
+            yield from table.all_rows()
+
+    def __len__(self) -> int:
+        return (
+            sum(len(c) for c in self.predicates.values())
+            + sum(len(c) for c in self.encoded.values())
+            + sum(len(t) for t in self.tables.values())
+        )
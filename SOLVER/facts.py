@@ -0,0 +1,185 @@
+from abc import ABC, abstractmethod
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+from PARSER.ast import Struct, Term, Variable, is_ground
+from SOLVER.unification import substitute_term
+
+# A predicate made only of ground facts can be kept as a fact table: one
+# column per argument holding a small integer id for each fact's value, the
+# values themselves interned once in a symbol table shared by every table.
+# That is a few bytes per argument where a clause list pays for a list, a
+# Struct and its parameter list per fact. Clauses are built only for the
+# facts a call is about to try, and any column a call binds is answered
+# through a hash index built the first time it is needed.
+
+
+def is_fact(clause: List[Term]) -> bool:
+    # a ground fact with at least one argument
+    return (
+        len(clause) == 1
+        and isinstance(clause[0], Struct)
+        and clause[0].arity > 0
+        and is_ground(clause[0])
+    )
+
+
+class SymbolTable:
+    def __init__(self):
+        self.terms: List[Term] = []
+        self.ids: Dict[Term, int] = {}
+
+    def intern(self, term: Term) -> int:
+        symbol = self.ids.get(term)
+        if symbol is None:
+            symbol = self.ids[term] = len(self.terms)
+            self.terms.append(term)
+        return symbol
+
+
+class ColumnTable(ABC):
+    # What every fact table shares: the facts are columns of symbol ids
+    # and a call is answered from them. A table says how a value maps to
+    # its symbol, how a symbol maps back to its term, and which rows hold a
+    # symbol in a column.
+    name: str
+    arity: int
+    columns: List[Sequence[int]]
+
+    def __len__(self) -> int:
+        return len(self.columns[0])
+
+    @abstractmethod
+    def find_symbol(self, term: Term) -> Optional[int]:
+        pass
+
+    @abstractmethod
+    def term(self, symbol: int) -> Term:
+        pass
+
+    @abstractmethod
+    def bucket(self, position: int, symbol: int) -> Sequence[int]:
+        pass
+
+    @abstractmethod
+    def index(self, position: int) -> None:
+        # builds the index for a column ahead of its first use
+        pass
+
+    def clause(self, row: int) -> List[Term]:
+        params = [self.term(column[row]) for column in self.columns]
+        return [Struct(self.name, self.arity, params)]
+
+    def all_rows(self) -> "FactRows":
+        return FactRows(self, range(len(self)))
+
+    def candidates(self, goal: Struct, unif: Dict[str, Term]) -> "FactRows":
+        # The rows whose values agree with every ground argument of the
+        # call. The smallest index bucket among them is scanned and the
+        # other bound columns are compared by id, so no clause is built
+        # for a fact that cannot match.
+        bound = []
+        for position, arg in enumerate(goal.params):
+            while isinstance(arg, Variable) and arg.name in unif:
+                arg = unif[arg.name]
+            if isinstance(arg, Variable):
+                continue
+            if arg.arity > 0:
+                arg = substitute_term(unif, arg)
+                if not is_ground(arg):
+                    continue
+            symbol = self.find_symbol(arg)
+            if symbol is None:
+                return FactRows(self, ())
+            bound.append((position, symbol))
+        if not bound:
+            return self.all_rows()
+
+        buckets = [self.bucket(position, symbol) for position, symbol in bound]
+        rows = min(buckets, key=len)
+        if len(bound) > 1:
+            columns = self.columns
+            rows = [
+                row
+                for row in rows
+                if all(columns[p][row] == symbol for p, symbol in bound)
+            ]
+        return FactRows(self, rows)
+
+
+class FactTable(ColumnTable):
+    # a fact table in memory, which facts can be appended to
+    def __init__(self, name: str, arity: int, symbols: SymbolTable):
+        self.name = name
+        self.arity = arity
+        self.symbols = symbols
+        self.columns = [array("i") for _ in range(arity)]
+        # column -> symbol -> the rows holding it, in order
+        self.indexes: Dict[int, Dict[int, array]] = {}
+
+    def append(self, params: List[Term]) -> None:
+        row = len(self)
+        for column, term in zip(self.columns, params, strict=True):
+            column.append(self.symbols.intern(term))
+        for position, index in self.indexes.items():
+            symbol = self.columns[position][row]
+            index.setdefault(symbol, array("i")).append(row)
+
+    def find_symbol(self, term: Term) -> Optional[int]:
+        return self.symbols.ids.get(term)
+
+    def term(self, symbol: int) -> Term:
+        return self.symbols.terms[symbol]
+
+    def bucket(self, position: int, symbol: int) -> Sequence[int]:
+        return self.index(position).get(symbol, ())
+
+    def index(self, position: int) -> Dict[int, array]:
+        index = self.indexes.get(position)
+        if index is None:
+            index = {}
+            for row, symbol in enumerate(self.columns[position]):
+                rows = index.get(symbol)
+                if rows is None:
+                    rows = index[symbol] = array("i")
+                rows.append(row)
+            self.indexes[position] = index
+        return index
+
+    @staticmethod
+    def from_clauses(
+        name: str,
+        arity: int,
+        clauses: Iterable[List[Term]],
+        symbols: SymbolTable,
+    ) -> "FactTable":
+        table = FactTable(name, arity, symbols)
+        for clause in clauses:
+            table.append(clause[0].params)
+        return table
+
+
+class FactRows(Sequence):
+    # the clauses for some rows of a table, each built when it is read;
+    # slicing gives another view, so a choice point over the rest of a
+    # million facts costs no more than one over ten
+    def __init__(self, table: ColumnTable, rows: Union[Sequence[int], range]):
+        self.table = table
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return FactRows(self.table, self.rows[item])
+        return self.table.clause(self.rows[item])
+
+
+def table_of(
+    name: str, arity: int, clauses: List[List[Term]], symbols: SymbolTable
+) -> Optional[FactTable]:
+    # a table for the clauses when every one of them is a ground fact
+    if arity == 0 or not all(is_fact(c) for c in clauses):
+        return None
+    return FactTable.from_clauses(name, arity, clauses, symbols)
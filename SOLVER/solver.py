@@ -1,15 +1,38 @@
-from typing import Dict, List, Optional, Tuple, Union
+import itertools
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
 from UTIL.err import (
     ErrProlog,
+    ErrType,
+    ErrUninstantiated,
     ErrUnknownPredicate,
     handle_error,
 )
-from PARSER.ast import Struct, Term, Variable
+from PARSER.ast import ArrayList, Struct, Term, Variable
+from PARSER.Data.hashtable import (
+    handle_ht_del,
+    handle_ht_get,
+    handle_ht_new,
+    handle_ht_pairs,
+    handle_ht_put,
+    handle_ht_size,
+    handle_nb_ht_del,
+    handle_nb_ht_put,
+)
+from PARSER.Data.compare import term_key
+from PARSER.Data.csv_import import handle_csv_load
+from PARSER.Data.external import handle_external
+from PARSER.Data.fact_file import (
+    handle_fact_table_attach,
+    handle_fact_table_save,
+)
+from PARSER.Data.saved_state import handle_qsave
 from PARSER.Data.list import (
     PrologList,
-    extract_list,
     is_empty_list,
+    list_elements,
+    sort_unique,
+    split_list,
 )
 from UTIL.debug import (
     DebugState,
@@ -19,7 +42,13 @@ from UTIL.debug import (
 )
 from UTIL.str_util import flatten_comma_structure
 
-from .builtin import handle_builtins, has_builtin
+from .database import Database
+from .builtin import (
+    evaluate_arithmetic,
+    handle_builtins,
+    has_builtin,
+    number_term,
+)
 from .unification import (
     extract_variable,
     match_params,
@@ -34,6 +63,9 @@ def get_variables(terms: List[Term]) -> List[str]:
         if isinstance(t, Variable):
             result.append(t.name)
 
+        elif isinstance(t, ArrayList):
+            continue  # ground
+
         elif isinstance(t, Struct):
             result.extend(get_variables(t.params))
 
@@ -148,8 +180,8 @@ def handle_setof(
 
     if success and findall_unifs:
         result_list = findall_unifs[0][goal.params[2].name]  # the bag
-        python_list = extract_list(result_list)
-        unique_sorted = sorted(set(python_list))  # remove dups + sort
+        python_list = list_elements(result_list)
+        unique_sorted = sort_unique(python_list)  # standard order, no dups
 
         setof_result = PrologList(unique_sorted).to_struct()
 
@@ -171,36 +203,132 @@ def handle_forall(
     if len(goal.params) != 2:
         raise ErrUnknownPredicate("forall", len(goal.params))
 
+    # forall(Gen, Test) is \+ (Gen, \+ Test): the generator is streamed
+    # and the first counterexample ends the search
     generator, test = goal.params
-    result_var = Variable("_Result")  # temporary variable name
+    counterexample = Struct(",", 2, [generator, Struct("not", 1, [test])])
+    return True, [Struct("not", 1, [counterexample])] + rest_goals, [unif]
 
-    findall_goal = Struct("findall", 3, [generator, generator, result_var])
 
-    findall_success, _, findall_unifs = handle_findall(
-        findall_goal, [], unif.copy(), program, debug_state
-    )
+def fresh_variables(n: int, debug_state: DebugState) -> List[Variable]:
+    start = debug_state.seq
+    debug_state.seq += n
+    return [Variable(f"TEMP{start + i}") for i in range(n)]
 
-    if not findall_success or not findall_unifs:
-        # generator failed or had no solutions means vacuously true
-        return True, rest_goals, [unif]
 
-    result_struct = findall_unifs[0][result_var.name]
-    generator_results = extract_list(result_struct)
+def extend_closure(closure: Term, args: List[Term], context: str) -> Struct:
+    # call/N: the closure with the extra arguments appended
+    if isinstance(closure, Variable):
+        raise ErrUninstantiated(closure.name, context)
+    if not isinstance(closure, Struct):
+        raise ErrType(str(closure), "호출 가능한 항")
+    if not args:
+        return closure
+    params = closure.params + args
+    return Struct(closure.name, len(params), params)
 
-    for result in generator_results:
-        ok, test_unif = match_params([generator], [result], {})
-        if not ok:
-            return False, [], []
 
-        test_instantiated = substitute_term(test_unif, test)
+def handle_call(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if not goal.params:
+        raise ErrUnknownPredicate("호출", len(goal.params))
+
+    closure = substitute_term(unif, goal.params[0])
+    call = extend_closure(closure, goal.params[1:], "호출")
+    return True, [call] + rest_goals, [unif]
+
+
+def list_columns(
+    lists: List[Term], unif: Dict[str, Term], debug_state: DebugState
+) -> Tuple[Optional[List[List[Term]]], Dict[str, Term]]:
+    # the elements of lists that must all have the same length; open lists
+    # are bound to fresh variables up to the length of a proper one. None
+    # when no list has a known length yet, [] when they cannot agree.
+    splits = [split_list(lst) for lst in lists]
+    lengths = {len(prefix) for prefix, end in splits if is_empty_list(end)}
+    if not lengths:
+        return None, unif
+    if len(lengths) > 1:
+        return [], unif
+    n = lengths.pop()
+
+    columns = []
+    for prefix, end in splits:
+        if not is_empty_list(end):
+            if not isinstance(end, Variable) or len(prefix) > n:
+                return [], unif
+            extra = fresh_variables(n - len(prefix), debug_state)
+            open_tail = PrologList(extra).to_struct()
+            success, unif = match_params([end], [open_tail], unif)
+            if not success:
+                return [], unif
+            prefix = prefix + extra
+        columns.append(prefix)
+    return columns, unif
+
+
+def open_lengths(
+    lists: List[Term], unif: Dict[str, Term], debug_state: DebugState
+) -> Iterator[Dict[str, Term]]:
+    # no list is proper: try every length, shortest first
+    splits = [split_list(lst) for lst in lists]
+    for _, end in splits:
+        if not isinstance(end, Variable):
+            return
+    for n in itertools.count(max(len(prefix) for prefix, _ in splits)):
+        new_unif = unif
+        for prefix, end in splits:
+            open_tail = PrologList(
+                fresh_variables(n - len(prefix), debug_state)
+            ).to_struct()
+            success, new_unif = match_params([end], [open_tail], new_unif)
+            if not success:
+                break
+        else:
+            yield new_unif
 
-        success, _ = solve_with_choice_points(
-            program, [test_instantiated], {}, debug_state, []
-        )
-        if not success:
-            return False, [], []
 
-    return True, rest_goals, [unif]
+def expand_over_lists(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    lists: List[Term],
+    debug_state: DebugState,
+    make_step,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    # checks once that the lists agree on a length, binding the open ones,
+    # then replaces goal by make_step over the proper lists. Each step runs
+    # one call and leaves the tails to the next, so the goal list stays short.
+    lists = [substitute_term(unif, lst) for lst in lists]
+    columns, new_unif = list_columns(lists, unif, debug_state)
+    if columns is None:
+        # re-run goal once the open lists have a length
+        return True, [goal] + rest_goals, open_lengths(lists, unif, debug_state)
+    if lists and not columns:
+        return False, rest_goals, []
+    lists = [substitute_term(new_unif, lst) for lst in lists]
+    return True, [make_step(lists)] + rest_goals, [new_unif]
+
+
+def step_lists(
+    lists: Sequence[Term], unif: Dict[str, Term]
+) -> Optional[Tuple[List[Term], List[Term]]]:
+    # heads and tails of proper lists of one length, None once they are empty
+    heads, tails = [], []
+    for lst in lists:
+        while isinstance(lst, Variable) and lst.name in unif:
+            lst = unif[lst.name]
+        if is_empty_list(lst):
+            return None
+        head, tail = lst.params
+        heads.append(head)
+        tails.append(tail)
+    return heads, tails
 
 
 def handle_maplist(
@@ -210,142 +338,585 @@ def handle_maplist(
     program: List[List[Term]],
     debug_state: DebugState,
 ) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
-    if len(goal.params) < 2:
+    if not 2 <= len(goal.params) <= 7:
         raise ErrUnknownPredicate("maplist", len(goal.params))
 
-    pred = goal.params[0]
-    lists = goal.params[1:]
-    lists = [substitute_term(unif, lst) for lst in lists]
+    closure = substitute_term(unif, goal.params[0])
+    extend_closure(closure, [], "maplist")  # checked once, not per element
 
-    empty_count = 0
-    for lst in lists:
-        if is_empty_list(lst):
-            empty_count += 1
+    def make_step(lists: List[Term]) -> Term:
+        return Struct("$maplist", len(goal.params), [closure] + lists)
+
+    return expand_over_lists(
+        goal, rest_goals, unif, goal.params[1:], debug_state, make_step
+    )
 
-    if empty_count == len(lists):
+
+def handle_maplist_step(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    # '$maplist'(G, L1, ...) over lists already checked by handle_maplist
+    closure, *lists = goal.params
+    step = step_lists(lists, unif)
+    if step is None:
         return True, rest_goals, [unif]
+    heads, tails = step
+    call = extend_closure(closure, heads, "maplist")
+    next_step = Struct("$maplist", goal.arity, [closure] + tails)
+    return True, [call, next_step] + rest_goals, [unif]
 
-    # if any list is empty but not all, try to unify variables with empty lists
-    if empty_count > 0 and empty_count < len(lists):
-        for i, lst in enumerate(lists):
-            if isinstance(lst, Variable):
-                empty_list = Struct("[]", 0, [])
-                success, new_unif = match_params([lst], [empty_list], unif)
-                if success:
-                    unif = new_unif
-                    empty_count += 1
-                    lists[i] = empty_list
 
-        if empty_count == len(lists):
-            return True, rest_goals, [unif]
+def handle_foldl(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    # foldl(G, L1, ..., V0, V) threads an accumulator through G(X1, ..., A0, A)
+    if not 4 <= len(goal.params) <= 6:
+        raise ErrUnknownPredicate("접기", len(goal.params))
 
-    lists = [substitute_term(unif, lst) for lst in lists]
+    closure = substitute_term(unif, goal.params[0])
+    extend_closure(closure, [], "접기")
+    v0, v = goal.params[-2:]
 
-    if any(is_empty_list(lst) for lst in lists) and not all(
-        is_empty_list(lst) for lst in lists
-    ):
-        return False, [], []
+    def make_step(lists: List[Term]) -> Term:
+        return Struct("$foldl", len(goal.params), [closure] + lists + [v0, v])
 
-    try:
-        heads = []
-        tails = []
-        for i, lst in enumerate(lists):
-            if isinstance(lst, Variable):
-                head_var = Variable(f"_H{id(lst)}{i}")
-                tail_var = Variable(f"_T{id(lst)}{i}")
-                list_cons = Struct(".", 2, [head_var, tail_var])
-                success, new_unif = match_params([lst], [list_cons], unif)
-                if not success:
-                    return False, [], []
-                unif = new_unif
-                heads.append(head_var)
-                tails.append(tail_var)
-            elif isinstance(lst, Struct) and lst.name == "." and lst.arity == 2:
-                heads.append(lst.params[0])
-                tails.append(lst.params[1])
-            else:
-                return False, [], []
-    except (IndexError, AttributeError):
-        return False, [], []
+    return expand_over_lists(
+        goal, rest_goals, unif, goal.params[1:-2], debug_state, make_step
+    )
 
-    if isinstance(pred, Struct):
-        pred_call = Struct(pred.name, len(heads), heads)
-    else:
-        pred_call = Struct(str(pred), len(heads), heads)
 
-    success, new_unifs = solve_with_choice_points(
-        program, [pred_call], unif, debug_state, []
+def handle_foldl_step(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    # '$foldl'(G, L1, ..., V0, V) over lists already checked by handle_foldl
+    closure, *lists, v0, v = goal.params
+    step = step_lists(lists, unif)
+    if step is None:
+        return True, [Struct("=", 2, [v0, v])] + rest_goals, [unif]
+    heads, tails = step
+    (v1,) = fresh_variables(1, debug_state)
+    call = extend_closure(closure, heads + [v0, v1], "접기")
+    next_step = Struct("$foldl", goal.arity, [closure] + tails + [v1, v])
+    return True, [call, next_step] + rest_goals, [unif]
+
+
+def filter_calls(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    targets: List[Term],
+    debug_state: DebugState,
+    context: str,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    # splits a proper list on whether Pred succeeds for each element by
+    # replacing goal with one '$if'(Test, Then, Else) per element, which the
+    # main loop runs like ( call(Pred, X) -> Then ; Else ), so only the first
+    # answer of a test counts. An element that passes sets its flag, and
+    # '$filtered' builds the two lists from the flags once all have run.
+    closure = substitute_term(unif, goal.params[0])
+    extend_closure(closure, [], context)
+    list_term = substitute_term(unif, goal.params[1])
+    if isinstance(list_term, Variable):
+        raise ErrUninstantiated(list_term.name, context)
+    elements = list_elements(list_term)
+    if elements is None:
+        raise ErrType(str(list_term), "리스트")
+
+    true = Struct("true", 0, [])
+    flags = fresh_variables(len(elements), debug_state)
+    calls = [
+        Struct(
+            "$if",
+            3,
+            [
+                extend_closure(closure, [element], context),
+                Struct("=", 2, [flag, true]),
+                true,
+            ],
+        )
+        for element, flag in zip(elements, flags, strict=True)
+    ]
+    collect = Struct(
+        "$filtered",
+        4,
+        [
+            PrologList(elements).to_struct(),
+            PrologList(flags).to_struct(),
+            *targets,
+        ],
     )
+    return True, calls + [collect] + rest_goals, [unif]
 
-    if not success or not new_unifs:
-        return False, [], []
 
-    new_unif = new_unifs[0]
-    recursive_goal = Struct("maplist", len(lists) + 1, [pred] + tails)
+def handle_filtered(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    # '$filtered'(Elements, Flags, Included, Excluded), see filter_calls
+    elements = list_elements(substitute_term(unif, goal.params[0]))
+    flags = list_elements(substitute_term(unif, goal.params[1]))
+    included, excluded = [], []
+    for element, flag in zip(elements, flags, strict=True):
+        (excluded if isinstance(flag, Variable) else included).append(element)
+    lists = [PrologList(included).to_struct(), PrologList(excluded).to_struct()]
+    success, new_unif = match_params(goal.params[2:], lists, unif)
+    return success, rest_goals, [new_unif] if success else []
+
+
+def handle_include(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 3:
+        raise ErrUnknownPredicate("포함", len(goal.params))
+
+    unwanted = fresh_variables(1, debug_state)
+    return filter_calls(
+        goal, rest_goals, unif, goal.params[2:] + unwanted, debug_state, "포함"
+    )
 
-    return handle_maplist(
-        recursive_goal, rest_goals, new_unif, program, debug_state
+
+def handle_exclude(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 3:
+        raise ErrUnknownPredicate("제외", len(goal.params))
+
+    unwanted = fresh_variables(1, debug_state)
+    return filter_calls(
+        goal, rest_goals, unif, unwanted + goal.params[2:], debug_state, "제외"
     )
 
 
-def handle_arrow(
+def handle_partition(
     goal: Struct,
     rest_goals: List[Term],
     unif: Dict[str, Term],
     program: List[List[Term]],
     debug_state: DebugState,
 ) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
-    if len(goal.params) not in [2, 3]:
-        raise ErrUnknownPredicate("->", len(goal.params))
+    if len(goal.params) != 4:
+        raise ErrUnknownPredicate("분할", len(goal.params))
 
-    try:
-        success, new_unifs = solve_with_choice_points(
-            program, [goal.params[0]], unif, debug_state, []
-        )
+    return filter_calls(
+        goal, rest_goals, unif, goal.params[2:], debug_state, "분할"
+    )
 
-        if success:
-            condition_unif = new_unifs[0] if new_unifs else unif
-            then_success, then_unifs = solve_with_choice_points(
-                program, [goal.params[1]], condition_unif, debug_state, []
-            )
-            return then_success, rest_goals, then_unifs
-        else:
-            if len(goal.params) == 3:
-                else_success, else_unifs = solve_with_choice_points(
-                    program, [goal.params[2]], unif, debug_state, []
-                )
-                return else_success, rest_goals, else_unifs
+
+def handle_predsort(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 3:
+        raise ErrUnknownPredicate("술어정렬", len(goal.params))
+
+    pred = substitute_term(unif, goal.params[0])
+    input_list = substitute_term(unif, goal.params[1])
+    if isinstance(pred, Variable):
+        raise ErrUninstantiated(pred.name, "술어정렬")
+    if isinstance(input_list, Variable):
+        raise ErrUninstantiated(input_list.name, "술어정렬")
+    elements = list_elements(input_list)
+    if elements is None:
+        raise ErrType(str(input_list), "리스트")
+
+    order_var = Variable("_Order")
+    orders = {"<": -1, "=": 0, ">": 1}
+
+    def call_order(a: Term, b: Term) -> int:
+        # the first answer of Pred(Order, A, B) decides; failure is an error
+        args = pred.params + [order_var, a, b]
+        call = Struct(pred.name, len(args), args)
+        first = first_solution(program, [call], unif, debug_state)
+        order = substitute_term(first, order_var) if first is not None else None
+        if order is None or isinstance(order, Variable):
+            raise ErrType(str(call), "순서를 정하는 술어")
+        if order.name not in orders:
+            raise ErrType(str(order), "순서")
+        return orders[order.name]
+
+    # merge sort so that elements the predicate calls equal can be dropped
+    def merge_sort(items: List[Term]) -> List[Term]:
+        if len(items) <= 1:
+            return items
+        mid = len(items) // 2
+        left, right = merge_sort(items[:mid]), merge_sort(items[mid:])
+        merged = []
+        i = j = 0
+        while i < len(left) and j < len(right):
+            c = call_order(left[i], right[j])
+            if c < 0:
+                merged.append(left[i])
+                i += 1
+            elif c > 0:
+                merged.append(right[j])
+                j += 1
             else:
-                return False, rest_goals, []
+                merged.append(left[i])
+                i += 1
+                j += 1
+        merged.extend(left[i:])
+        merged.extend(right[j:])
+        return merged
+
+    result_list = PrologList(merge_sort(elements)).to_struct()
+    success, new_unif = match_params([goal.params[2]], [result_list], unif)
+    return success, rest_goals, [new_unif] if success else []
+
+
+AGGREGATE_SPECS = {
+    "count": "count",
+    "개수": "count",
+    "sum": "sum",
+    "합계": "sum",
+    "max": "max",
+    "최대": "max",
+    "min": "min",
+    "최소": "min",
+    "bag": "bag",
+    "모음": "bag",
+    "set": "set",
+    "고유모음": "set",  # 집합 is already setof
+}
+
+
+class Aggregator:
+    # folds solutions into a single result as the engine produces them;
+    # only bag and set keep per-solution terms
+    def __init__(self, spec: Term):
+        if isinstance(spec, Variable):
+            raise ErrUninstantiated(spec.name, "모두집계")
+        kind = AGGREGATE_SPECS.get(spec.name)
+        arities = {"count": (0,), "max": (1, 2), "min": (1, 2)}
+        if kind is None or spec.arity not in arities.get(kind, (1,)):
+            raise ErrType(str(spec), "집계 방식")
+        self.kind = kind
+        self.spec = spec
+        self.count = 0
+        self.total = 0
+        self.best = None  # (value, witness) for max and min
+        self.items = {}  # dict as an insertion-ordered bag or set
+
+    def add(self, solution: Dict[str, Term]) -> None:
+        self.count += 1
+        if self.kind == "count":
+            return
+        template = self.spec.params[0]
+        if self.kind == "sum":
+            self.total += evaluate_arithmetic(template, solution)
+        elif self.kind == "bag":
+            self.items[self.count] = substitute_term(solution, template)
+        elif self.kind == "set":
+            self.items.setdefault(substitute_term(solution, template), None)
+        else:
+            value = evaluate_arithmetic(template, solution)
+            if (
+                self.best is None
+                or (self.kind == "max" and value > self.best[0])
+                or (self.kind == "min" and value < self.best[0])
+            ):
+                witness = None
+                if self.spec.arity == 2:
+                    witness = substitute_term(solution, self.spec.params[1])
+                self.best = (value, witness)
+
+    def result(self) -> Optional[Term]:
+        if self.kind == "count":
+            return Struct(str(self.count), 0, [])
+        if self.kind == "sum":
+            return number_term(self.total)
+        if self.kind == "bag":
+            return PrologList(list(self.items.values())).to_struct()
+        if self.kind == "set":
+            return PrologList(sort_unique(list(self.items))).to_struct()
+        if self.best is None:
+            return None  # max and min of no solutions fail
+        value, witness = self.best
+        if witness is None:
+            return number_term(value)
+        return Struct(self.spec.name, 2, [number_term(value), witness])
+
+
+def handle_aggregate_all(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) == 4:
+        return aggregate_groups(goal, rest_goals, unif, program, debug_state)
+    if len(goal.params) != 3:
+        raise ErrUnknownPredicate("모두집계", len(goal.params))
 
-    except ErrProlog as e:
-        handle_error(e, "-> predicate")
+    spec, query, result = goal.params
+    aggregator = Aggregator(substitute_term(unif, spec))
+    query = substitute_term(unif, query)
+
+    for solution in iter_solutions(program, [query], unif, debug_state):
+        aggregator.add(solution)
+
+    value = aggregator.result()
+    if value is None:
         return False, rest_goals, []
+    success, new_unif = match_params([result], [value], unif)
+    return success, rest_goals, [new_unif] if success else []
 
 
-def handle_recorda(
+def aggregate_groups(
     goal: Struct,
     rest_goals: List[Term],
     unif: Dict[str, Term],
     program: List[List[Term]],
     debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    # aggregate_all(Spec, Group, Goal, Result) aggregates separately for
+    # each distinct instance of Group, enumerating the groups in order
+    spec, group, query, result = goal.params
+    spec = substitute_term(unif, spec)
+    query = substitute_term(unif, query)
+
+    groups = {}
+    for solution in iter_solutions(program, [query], unif, debug_state):
+        key = substitute_term(solution, group)
+        aggregator = groups.get(key)
+        if aggregator is None:
+            aggregator = groups[key] = Aggregator(spec)
+        aggregator.add(solution)
+
+    all_solutions = []
+    for key in sorted(groups, key=term_key):
+        value = groups[key].result()
+        if value is None:
+            continue
+        success, new_unif = match_params([group, result], [key, value], unif)
+        if success:
+            all_solutions.append(new_unif)
+    return len(all_solutions) > 0, rest_goals, all_solutions
+
+
+def solutions_of(
+    query: Term,
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Iterator[Dict[str, Term]]:
+    query = substitute_term(unif, query)
+    return iter_solutions(program, [query], unif, debug_state)
+
+
+def count_argument(term: Term, unif: Dict[str, Term], context: str) -> int:
+    term = substitute_term(unif, term)
+    if isinstance(term, Variable):
+        raise ErrUninstantiated(term.name, context)
+    try:
+        count = int(term.name)
+    except ValueError as e:
+        raise ErrType(str(term), "정수") from e
+    if count < 0:
+        raise ErrType(str(term), "0 이상의 정수")
+    return count
+
+
+def variant_key(term: Term) -> Term:
+    # answers that differ only in the names of their variables share a key
+    renaming = {}
+    for name in get_variables([term]):
+        renaming.setdefault(name, Variable(f"_V{len(renaming)}"))
+    return substitute_term(renaming, term)
+
+
+def handle_limit(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], Iterator[Dict[str, Term]]]:
+    if len(goal.params) != 2:
+        raise ErrUnknownPredicate("제한", len(goal.params))
+
+    count = count_argument(goal.params[0], unif, "제한")
+    solutions = solutions_of(goal.params[1], unif, program, debug_state)
+    return True, rest_goals, itertools.islice(solutions, count)
+
+
+def handle_offset(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], Iterator[Dict[str, Term]]]:
+    if len(goal.params) != 2:
+        raise ErrUnknownPredicate("건너뛰기", len(goal.params))
+
+    count = count_argument(goal.params[0], unif, "건너뛰기")
+    solutions = solutions_of(goal.params[1], unif, program, debug_state)
+    return True, rest_goals, itertools.islice(solutions, count, None)
+
+
+def distinct_solutions(
+    witness: Term, solutions: Iterator[Dict[str, Term]]
+) -> Iterator[Dict[str, Term]]:
+    seen = set()
+    for solution in solutions:
+        key = variant_key(substitute_term(solution, witness))
+        if key not in seen:
+            seen.add(key)
+            yield solution
+
+
+def handle_distinct(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], Iterator[Dict[str, Term]]]:
+    # distinct(Goal) drops repeated answers; distinct(Witness, Goal) drops
+    # answers whose Witness was already seen
+    if len(goal.params) == 1:
+        witness = query = goal.params[0]
+    elif len(goal.params) == 2:
+        witness, query = goal.params
+    else:
+        raise ErrUnknownPredicate("중복제거", len(goal.params))
+
+    solutions = solutions_of(query, unif, program, debug_state)
+    return True, rest_goals, distinct_solutions(witness, solutions)
+
+
+ORDER_DIRECTIONS = {
+    "asc": False,
+    "오름차순": False,
+    "desc": True,
+    "내림차순": True,
+}
+
+
+def handle_order_by(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    if len(goal.params) != 2:
+        raise ErrUnknownPredicate("정렬기준", len(goal.params))
+
+    specs_term = substitute_term(unif, goal.params[0])
+    if isinstance(specs_term, Variable):
+        raise ErrUninstantiated(specs_term.name, "정렬기준")
+    specs = list_elements(specs_term)
+    if not specs:
+        raise ErrType(str(specs_term), "정렬 기준 리스트")
+    for spec in specs:
+        if (
+            not isinstance(spec, Struct)
+            or spec.arity != 1
+            or spec.name not in ORDER_DIRECTIONS
+        ):
+            raise ErrType(str(spec), "asc(키) 또는 desc(키)")
+
+    # ordering needs every answer; stable sorts from the last key to the
+    # first give the combined order
+    solutions = list(solutions_of(goal.params[1], unif, program, debug_state))
+    for spec in reversed(specs):
+        solutions.sort(
+            key=lambda s: term_key(substitute_term(s, spec.params[0])),
+            reverse=ORDER_DIRECTIONS[spec.name],
+        )
+    return len(solutions) > 0, rest_goals, solutions
+
+
+def solution_chunks(
+    size: int,
+    template: Term,
+    result: Term,
+    solutions: Iterator[Dict[str, Term]],
+    unif: Dict[str, Term],
+) -> Iterator[Dict[str, Term]]:
+    while True:
+        chunk = [
+            substitute_term(s, template)
+            for s in itertools.islice(solutions, size)
+        ]
+        chunk_list = PrologList(chunk).to_struct()
+        success, new_unif = match_params([result], [chunk_list], unif)
+        if success:
+            yield new_unif
+        if len(chunk) < size:
+            return
+
+
+def handle_findnsols(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], Iterator[Dict[str, Term]]]:
+    # like findall/3 but in chunks of at most N answers, the next chunk
+    # being computed only on backtracking
+    if len(goal.params) != 4:
+        raise ErrUnknownPredicate("몇개찾기", len(goal.params))
+
+    size_term, template, query, result = goal.params
+    size = count_argument(size_term, unif, "몇개찾기")
+    if size == 0:
+        raise ErrType(str(size_term), "양의 정수")
+
+    solutions = solutions_of(query, unif, program, debug_state)
+    return (
+        True,
+        rest_goals,
+        solution_chunks(size, template, result, solutions, unif),
+    )
+
+
+def record_term(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    debug_state: DebugState,
+    at_end: bool,
 ) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
     if len(goal.params) != 3:
-        raise ErrUnknownPredicate("recorda", len(goal.params))
+        raise ErrUnknownPredicate(goal.name, len(goal.params))
 
     key = substitute_term(unif, goal.params[0])
     term = substitute_term(unif, goal.params[1])
     ref_var = goal.params[2]
 
-    debug_state.recorded_counter += 1
-    ref_id = debug_state.recorded_counter
+    ref_id = debug_state.recorded_db.record(str(key), term, at_end)
     ref_struct = Struct("$ref", 1, [Struct(str(ref_id), 0, [])])
 
-    k = str(key)
-    if k not in debug_state.recorded_db:
-        debug_state.recorded_db[k] = []
-    debug_state.recorded_db[k].insert(0, (ref_id, term))
-
     ok, new_unif = match_params([ref_var], [ref_struct], unif)
     if ok:
         return True, rest_goals, [new_unif]
@@ -353,6 +924,26 @@ def handle_recorda(
         return False, [], []
 
 
+def handle_recorda(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    return record_term(goal, rest_goals, unif, debug_state, at_end=False)
+
+
+def handle_recordz(
+    goal: Struct,
+    rest_goals: List[Term],
+    unif: Dict[str, Term],
+    program: List[List[Term]],
+    debug_state: DebugState,
+) -> Tuple[bool, List[Term], List[Dict[str, Term]]]:
+    return record_term(goal, rest_goals, unif, debug_state, at_end=True)
+
+
 def handle_recorded(
     goal: Struct,
     rest_goals: List[Term],
@@ -364,15 +955,13 @@ def handle_recorded(
         raise ErrUnknownPredicate("recorded", len(goal.params))
 
     key = substitute_term(unif, goal.params[0])
-    term_pat = goal.params[1]
+    term_pat = substitute_term(unif, goal.params[1])
     ref_pat = goal.params[2]
 
-    k = str(key)
-    if k not in debug_state.recorded_db or not debug_state.recorded_db[k]:
-        return False, [], []
-
     matches = []
-    for ref_id, stored_term in debug_state.recorded_db[k]:
+    for ref_id, stored_term in debug_state.recorded_db.candidates(
+        str(key), term_pat
+    ):
         ref_struct = Struct("$ref", 1, [Struct(str(ref_id), 0, [])])
         ok1, unif1 = match_params([term_pat], [stored_term], unif)
         if ok1:
@@ -408,29 +997,91 @@ def handle_erase(
     except (ValueError, AttributeError):
         return False, [], []
 
-    for k in list(debug_state.recorded_db.keys()):
-        before = len(debug_state.recorded_db[k])
-        debug_state.recorded_db[k] = [
-            (rid, t) for (rid, t) in debug_state.recorded_db[k] if rid != ref_id
-        ]
-        if not debug_state.recorded_db[k]:
-            del debug_state.recorded_db[k]
-        if len(debug_state.recorded_db.get(k, [])) != before:
-            break
-
+    debug_state.recorded_db.erase(ref_id)
     return True, rest_goals, [unif]
 
 
+INTERNAL_HANDLERS = {
+    "findall": handle_findall,
+    "setof": handle_setof,
+    "forall": handle_forall,
+    "maplist": handle_maplist,
+    "call": handle_call,
+    "호출": handle_call,
+    "$maplist": handle_maplist_step,
+    "foldl": handle_foldl,
+    "접기": handle_foldl,
+    "$foldl": handle_foldl_step,
+    "include": handle_include,
+    "포함": handle_include,
+    "exclude": handle_exclude,
+    "제외": handle_exclude,
+    "partition": handle_partition,
+    "분할": handle_partition,
+    "$filtered": handle_filtered,
+    "predsort": handle_predsort,
+    "술어정렬": handle_predsort,
+    "aggregate_all": handle_aggregate_all,
+    "모두집계": handle_aggregate_all,
+    "limit": handle_limit,
+    "제한": handle_limit,
+    "offset": handle_offset,
+    "건너뛰기": handle_offset,
+    "distinct": handle_distinct,
+    "중복제거": handle_distinct,
+    "order_by": handle_order_by,
+    "정렬기준": handle_order_by,
+    "findnsols": handle_findnsols,
+    "몇개찾기": handle_findnsols,
+    "recorda": handle_recorda,
+    "레코드기록": handle_recorda,
+    "recordz": handle_recordz,
+    "레코드끝기록": handle_recordz,
+    "recorded": handle_recorded,
+    "레코드": handle_recorded,
+    "erase": handle_erase,
+    "지우기": handle_erase,
+    "ht_new": handle_ht_new,
+    "해시생성": handle_ht_new,
+    "ht_put": handle_ht_put,
+    "해시넣기": handle_ht_put,
+    "nb_ht_put": handle_nb_ht_put,
+    "해시영구넣기": handle_nb_ht_put,
+    "ht_get": handle_ht_get,
+    "해시찾기": handle_ht_get,
+    "ht_del": handle_ht_del,
+    "해시삭제": handle_ht_del,
+    "nb_ht_del": handle_nb_ht_del,
+    "해시영구삭제": handle_nb_ht_del,
+    "ht_pairs": handle_ht_pairs,
+    "해시쌍들": handle_ht_pairs,
+    "ht_size": handle_ht_size,
+    "해시크기": handle_ht_size,
+    "csv_load": handle_csv_load,
+    "표적재": handle_csv_load,
+    "fact_table_save": handle_fact_table_save,
+    "사실표저장": handle_fact_table_save,
+    "fact_table_attach": handle_fact_table_attach,
+    "사실표연결": handle_fact_table_attach,
+    "external": handle_external,
+    "외부": handle_external,
+    "qsave": handle_qsave,
+    "상태저장": handle_qsave,
+}
+
+
 class ChoicePoint:
-    alternatives: List[
-        Union[List[Term], Dict[str, Term]]
-    ]  # clauses or unifications
+    alternatives: Union[
+        Sequence[Union[List[Term], Dict[str, Term]]],
+        Iterator[Dict[str, Term]],
+    ]  # clauses or unifications, or an iterator producing unifications
     current_index: int
     goal: Term
     rest_goals: List[Term]
     new_goals: List[Term]
     base_unif: Dict[str, Term]
     call_depth: int
+    trail_mark: int
 
     def __init__(
         self,
@@ -441,6 +1092,7 @@ class ChoicePoint:
         new_goals,
         base_unif,
         call_depth,
+        trail_mark,
     ):
         self.alternatives = alternatives
         self.current_index = current_index
@@ -449,6 +1101,7 @@ class ChoicePoint:
         self.new_goals = new_goals
         self.base_unif = base_unif
         self.call_depth = call_depth
+        self.trail_mark = trail_mark
 
 
 def solve_with_choice_points(
@@ -458,18 +1111,78 @@ def solve_with_choice_points(
     debug_state: DebugState,
     choice_stack: Optional[List[ChoicePoint]] = None,
 ) -> Tuple[bool, List[Dict[str, Term]]]:
+    all_solutions = list(
+        iter_solutions(program, goals, unif, debug_state, choice_stack)
+    )
+    return len(all_solutions) > 0, all_solutions
+
+
+def iter_solutions(
+    program: List[List[Term]],
+    goals: List[Term],
+    unif: Dict[str, Term],
+    debug_state: DebugState,
+    choice_stack: Optional[List[ChoicePoint]] = None,
+) -> Iterator[Dict[str, Term]]:
+    # yields each solution as soon as it is found, so a caller that only
+    # needs a count or the first answer never holds the rest in memory
     if choice_stack is None:
         choice_stack = []
 
-    all_solutions = []
+    base_depth = debug_state.call_depth
+    trail_mark = len(debug_state.trail)
+    # lazy alternatives a cut removed, kept open until the search ends
+    committed: List[Iterator[Dict[str, Term]]] = []
+    try:
+        yield from _run(
+            program, goals, unif, debug_state, choice_stack, committed
+        )
+    finally:
+        # A search that ends, exhausted or abandoned by its consumer, takes
+        # its backtrackable updates with it. Alternatives cut away are
+        # closed only after that, so they find nothing left to undo.
+        undo_trail(debug_state, trail_mark)
+        committed.clear()
+        # a consumer may stop early, abandoning the goals in flight
+        debug_state.call_depth = base_depth
+
+
+def first_solution(
+    program: List[List[Term]],
+    goals: List[Term],
+    unif: Dict[str, Term],
+    debug_state: DebugState,
+) -> Optional[Dict[str, Term]]:
+    # the first answer of goals, committed to as if a cut followed it: the
+    # search's other choices are dropped, but the backtrackable updates
+    # that led to the answer stay on the caller's trail
+    trail = debug_state.trail
+    mark = len(trail)
+    solutions = iter_solutions(program, goals, unif, debug_state)
+    first = next(solutions, None)
+    kept = trail[mark:]
+    del trail[mark:]
+    solutions.close()
+    trail.extend(kept)
+    return first
+
+
+def _run(
+    program: List[List[Term]],
+    goals: List[Term],
+    unif: Dict[str, Term],
+    debug_state: DebugState,
+    choice_stack: List[ChoicePoint],
+    committed: List[Iterator[Dict[str, Term]]],
+) -> Iterator[Dict[str, Term]]:
     # main solving loop - replaces recursion with iteration
     while True:
         if not goals:
-            all_solutions.append(unif.copy())
+            yield unif.copy()
 
             backtrack_result = backtrack(program, choice_stack, debug_state)
             if backtrack_result is None:
-                return len(all_solutions) > 0, all_solutions
+                return
             goals, unif = backtrack_result
             continue
 
@@ -486,6 +1199,65 @@ def solve_with_choice_points(
                 goals = flattened_goals + rest
                 continue
 
+            if isinstance(x, Struct) and x.name == ";" and x.arity == 2:
+                # run the left branch now and leave the right one to be
+                # tried on backtracking
+                choice_stack.append(
+                    ChoicePoint(
+                        alternatives=[unif],
+                        current_index=0,
+                        goal=x,
+                        rest_goals=rest,
+                        new_goals=[x.params[1]] + rest,
+                        base_unif=unif,
+                        call_depth=debug_state.call_depth,
+                        trail_mark=len(debug_state.trail),
+                    )
+                )
+                goals = [x.params[0]] + rest
+                continue
+
+            if isinstance(x, Struct) and (
+                (x.name == "$if" and x.arity == 3)
+                or (x.name == "->" and x.arity in (2, 3))
+            ):
+                # ( Cond -> Then ; Else ), and '$if'(Cond, Then, Else) for
+                # it, run here rather than in a nested search, so Then
+                # keeps what Cond did: Else waits in a choice point that
+                # the first answer of Cond cuts away, with any Cond left
+                # behind
+                cond, then = x.params[:2]
+                otherwise = (
+                    x.params[2] if x.arity == 3 else Struct("fail", 0, [])
+                )
+                height = len(choice_stack)
+                choice_stack.append(
+                    ChoicePoint(
+                        alternatives=[unif],
+                        current_index=0,
+                        goal=x,
+                        rest_goals=rest,
+                        new_goals=[otherwise] + rest,
+                        base_unif=unif,
+                        call_depth=debug_state.call_depth,
+                        trail_mark=len(debug_state.trail),
+                    )
+                )
+                barrier = Struct("$cut_to", 1, [Struct(str(height), 0, [])])
+                goals = [cond, barrier, then] + rest
+                continue
+
+            if isinstance(x, Struct) and x.name == "$cut_to" and x.arity == 1:
+                height = int(x.params[0].name)
+                committed.extend(
+                    cp.alternatives
+                    for cp in choice_stack[height:]
+                    if isinstance(cp.alternatives, Iterator)
+                )
+                del choice_stack[height:]
+                goals = rest
+                continue
+
             if (
                 isinstance(x, Struct)
                 and ((x.name == "fail") or (x.name == "포기"))
@@ -497,24 +1269,36 @@ def solve_with_choice_points(
 
                 backtrack_result = backtrack(program, choice_stack, debug_state)
                 if backtrack_result is None:
-                    return len(all_solutions) > 0, all_solutions
+                    return
                 goals, unif = backtrack_result
                 continue
 
             if isinstance(x, Struct) and x.name == "!" and x.arity == 0:
+                # the updates of a nested search cut away are kept, so it
+                # must not undo them when it is closed
+                committed.extend(
+                    cp.alternatives
+                    for cp in choice_stack
+                    if isinstance(cp.alternatives, Iterator)
+                )
                 choice_stack.clear()
                 goals = rest
                 continue
 
-            if isinstance(x, Struct) and (
-                x.name == "not" or x.name == "논리부정"
-            ):
+            if isinstance(x, Struct) and (x.name in ("not", "\\+", "논리부정")):
                 if not len(x.params) == 1:
                     raise ErrUnknownPredicate("논리부정", len(x.params))
                 inner_goal = substitute_term(unif, x.params[0])
 
-                inner_success, _ = solve_with_choice_points(
-                    program, [inner_goal], unif, debug_state, []
+                # only whether a first solution exists matters
+                inner_success = (
+                    next(
+                        iter_solutions(
+                            program, [inner_goal], unif, debug_state
+                        ),
+                        None,
+                    )
+                    is not None
                 )
 
                 if inner_success:
@@ -523,7 +1307,7 @@ def solve_with_choice_points(
                         program, choice_stack, debug_state
                     )
                     if backtrack_result is None:
-                        return len(all_solutions) > 0, all_solutions
+                        return
                     goals, unif = backtrack_result
                     continue
                 else:
@@ -534,39 +1318,23 @@ def solve_with_choice_points(
                     goals = rest
                     continue
 
-            if isinstance(x, Struct) and (
-                x.name
-                in {
-                    "findall",
-                    "setof",
-                    "forall",
-                    "maplist",
-                    "->",
-                    "recorda",
-                    "레코드기록",
-                    "recorded",
-                    "레코드",
-                    "erase",
-                    "지우기",
-                }
-                or has_builtin(x.name)
+            # a predicate declared external is answered lazily, the same
+            # way as a builtin with lazy alternatives
+            external = (
+                program.externals.get((x.name, x.arity))
+                if isinstance(program, Database) and isinstance(x, Struct)
+                else None
+            )
+
+            if external is not None or (
+                isinstance(x, Struct)
+                and (x.name in INTERNAL_HANDLERS or has_builtin(x.name))
             ):
-                internal_handlers = {
-                    "findall": handle_findall,
-                    "setof": handle_setof,
-                    "forall": handle_forall,
-                    "maplist": handle_maplist,
-                    "->": handle_arrow,
-                    "recorda": handle_recorda,
-                    "레코드기록": handle_recorda,
-                    "recorded": handle_recorded,
-                    "레코드": handle_recorded,
-                    "erase": handle_erase,
-                    "지우기": handle_erase,
-                }
-
-                if x.name in internal_handlers:
-                    success, new_goals, new_unifications = internal_handlers[
+                if external is not None:
+                    success, new_goals = True, rest
+                    new_unifications = external(x, unif)
+                elif x.name in INTERNAL_HANDLERS:
+                    success, new_goals, new_unifications = INTERNAL_HANDLERS[
                         x.name
                     ](x, rest, unif, program, debug_state)
                 else:
@@ -574,6 +1342,28 @@ def solve_with_choice_points(
                         x, rest, unif
                     )
 
+                if success and not isinstance(new_unifications, list):
+                    # lazy alternatives: take the first answer now and the
+                    # rest only when execution backtracks into this goal
+                    first = next_alternative(new_unifications, debug_state)
+                    if first is not None:
+                        choice_stack.append(
+                            ChoicePoint(
+                                alternatives=new_unifications,
+                                current_index=0,
+                                goal=x,
+                                rest_goals=rest,
+                                new_goals=new_goals,
+                                base_unif=unif,
+                                call_depth=debug_state.call_depth,
+                                trail_mark=len(debug_state.trail),
+                            )
+                        )
+                        goals = new_goals
+                        unif = first
+                        continue
+                    new_unifications = []
+
                 if success and new_unifications:
                     if len(new_unifications) > 1:
                         choice_point = ChoicePoint(
@@ -586,6 +1376,7 @@ def solve_with_choice_points(
                             new_goals=new_goals,
                             base_unif=unif,
                             call_depth=debug_state.call_depth,
+                            trail_mark=len(debug_state.trail),
                         )
                         choice_stack.append(choice_point)
                     goals = new_goals
@@ -596,16 +1387,19 @@ def solve_with_choice_points(
                         program, choice_stack, debug_state
                     )
                     if backtrack_result is None:
-                        return len(all_solutions) > 0, all_solutions
+                        return
                     goals, unif = backtrack_result
                     continue
 
-            clauses = [c for c in program if is_relevant(x, c)]
+            if isinstance(program, Database) and isinstance(x, Struct):
+                clauses = program.candidates(x, unif)
+            else:
+                clauses = [c for c in program if is_relevant(x, c)]
 
             if not clauses:
                 backtrack_result = backtrack(program, choice_stack, debug_state)
                 if backtrack_result is None:
-                    return len(all_solutions) > 0, all_solutions
+                    return
                 goals, unif = backtrack_result
                 continue
 
@@ -628,6 +1422,7 @@ def solve_with_choice_points(
                         new_goals=rest,
                         base_unif=unif,
                         call_depth=debug_state.call_depth,
+                        trail_mark=len(debug_state.trail),
                     )
                     choice_stack.append(choice_point)
 
@@ -644,6 +1439,7 @@ def solve_with_choice_points(
                         new_goals=rest,
                         base_unif=unif,
                         call_depth=debug_state.call_depth,
+                        trail_mark=len(debug_state.trail),
                     )
                     backtrack_result = try_next_alternative(
                         program, choice_point, choice_stack, debug_state
@@ -654,7 +1450,7 @@ def solve_with_choice_points(
 
                 backtrack_result = backtrack(program, choice_stack, debug_state)
                 if backtrack_result is None:
-                    return len(all_solutions) > 0, all_solutions
+                    return
                 goals, unif = backtrack_result
                 continue
 
@@ -668,6 +1464,16 @@ def try_next_alternative(
     choice_stack: List[ChoicePoint],
     debug_state: DebugState,
 ) -> Optional[Tuple[List[Term], Dict[str, Term]]]:
+    if isinstance(choice_point.alternatives, Iterator):
+        alternative = next_alternative(choice_point.alternatives, debug_state)
+        if alternative is None:
+            return None
+        # the iterator undoes its own goal's effects when it backtracks, so
+        # only what runs after this answer belongs to this choice point
+        choice_point.trail_mark = len(debug_state.trail)
+        choice_stack.append(choice_point)
+        return choice_point.new_goals, alternative
+
     while choice_point.current_index < len(choice_point.alternatives):
         alternative = choice_point.alternatives[choice_point.current_index]
         choice_point.current_index += 1
@@ -698,6 +1504,24 @@ def try_next_alternative(
     return None
 
 
+def next_alternative(
+    alternatives: Iterator[Dict[str, Term]], debug_state: DebugState
+) -> Optional[Dict[str, Term]]:
+    # resuming a nested search must not disturb the caller's trace depth
+    depth = debug_state.call_depth
+    try:
+        return next(alternatives, None)
+    finally:
+        debug_state.call_depth = depth
+
+
+def undo_trail(debug_state: DebugState, mark: int) -> None:
+    # roll back backtrackable side effects recorded since mark
+    trail = debug_state.trail
+    while len(trail) > mark:
+        trail.pop()()
+
+
 def backtrack(
     program: List[List[Term]],
     choice_stack: List[ChoicePoint],
@@ -707,6 +1531,7 @@ def backtrack(
         choice_point = choice_stack.pop()
 
         debug_state.call_depth = choice_point.call_depth
+        undo_trail(debug_state, choice_point.trail_mark)
 
         result = try_next_alternative(
             program, choice_point, choice_stack, debug_state
@@ -719,6 +1544,15 @@ def backtrack(
 
 def solve(
     program: List[List[Term]], goals: List[Term], debug_state: DebugState
-) -> Tuple[bool, List[Dict[str, Term]]]:
-    result, unifs = solve_with_choice_points(program, goals, {}, debug_state)
-    return result, [extract_variable(get_variables(goals), u) for u in unifs]
+) -> Tuple[bool, Iterator[Dict[str, Term]]]:
+    # the first answer is found now and the others only as they are asked
+    # for, so a query with endless answers still prints its first one
+    variables = get_variables(goals)
+    answers = (
+        extract_variable(variables, u)
+        for u in iter_solutions(program, goals, {}, debug_state)
+    )
+    first = next(answers, None)
+    if first is None:
+        return False, iter([])
+    return True, itertools.chain([first], answers)
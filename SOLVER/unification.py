@@ -1,7 +1,7 @@
 from typing import Dict, List, Tuple
 
 from UTIL.err import ErrUnification
-from PARSER.ast import Struct, Term, Variable
+from PARSER.ast import ArrayList, Struct, Term, Variable
 
 
 def extract_variable(vars: List[str], unif: Dict[str, Term]) -> Dict[str, Term]:
@@ -39,17 +39,75 @@ def substitute_term(
             return result
         else:
             return term
+    elif isinstance(term, ArrayList):
+        return term  # ground by construction
+    elif isinstance(term, Struct) and term.name == "." and term.arity == 2:
+        return substitute_list(unification, term, visited, depth)
     elif isinstance(term, Struct):
         new_params = [
             substitute_term(unification, p, visited, depth + 1)
             for p in term.params
         ]
+        if all(
+            new is old for new, old in zip(new_params, term.params, strict=True)
+        ):
+            return term  # nothing was bound; share the original
         result = Struct(term.name, term.arity, new_params)
         return result
     else:
         return term
 
 
+def substitute_list(
+    unification: Dict[str, Term], term: Struct, visited: set, depth: int
+) -> Term:
+    # follows the spine in a loop, so the depth limit and Python's recursion
+    # limit only count nesting inside the elements, not the list length
+    cells = []
+    heads = []
+    followed = []
+    rebuilt_from = 0  # cells before this index had a bound variable tail
+    while True:
+        if (
+            isinstance(term, Struct)
+            and term.name == "."
+            and term.arity == 2
+            and not isinstance(term, ArrayList)
+        ):
+            cells.append(term)
+            heads.append(
+                substitute_term(unification, term.params[0], visited, depth + 1)
+            )
+            term = term.params[1]
+        elif (
+            isinstance(term, Variable)
+            and term.name in unification
+            and term.name not in visited
+        ):
+            visited.add(term.name)
+            followed.append(term.name)
+            rebuilt_from = len(cells)
+            term = unification[term.name]
+        else:
+            tail = substitute_term(unification, term, visited, depth + 1)
+            break
+    for name in followed:
+        visited.remove(name)
+
+    # an unchanged suffix of the list is shared rather than copied
+    result = tail
+    shared = tail is term
+    for i in range(len(cells) - 1, -1, -1):
+        if i < rebuilt_from:
+            shared = False
+        if shared and heads[i] is cells[i].params[0]:
+            result = cells[i]
+        else:
+            shared = False
+            result = Struct(".", 2, [heads[i], result])
+    return result
+
+
 def substitute(unification: Dict[str, Term], terms: List[Term]) -> List[Term]:
     return [substitute_term(unification, t) for t in terms]
 
@@ -63,6 +121,8 @@ def substitute_unification(
 def match_structs(
     a: Struct, b: Struct, old_unif: Dict[str, Term]
 ) -> Tuple[bool, Dict[str, Term]]:
+    if isinstance(a, ArrayList) and isinstance(b, ArrayList):
+        return (True, old_unif) if a == b else (False, {})
     try:
         if a.name == b.name and a.arity == b.arity:
             success, result_unif = match_params(a.params, b.params, old_unif)
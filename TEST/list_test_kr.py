@@ -64,6 +64,11 @@ class TestKProlog(unittest.TestCase):
             "접합([], [1,2], _엑스).",  # Testing append with one empty and one nonempty list, should work
             "접합([3,4],[], _엑스).",  # Testing append with one nonempty and one empty list, should work
             "접합([1,2],[3,4], []).",  # Testing append with two nonempty lists with empty list, should not work
+            "접합(_앞, [3], [1,2,3]).",  # Testing append with unbound first list, should split
+            "접합([1|_꼬리], _뒤, [1,2]), 길이(_꼬리, 1).",  # Testing append with partial first list
+            "모두찾기(_앞+_뒤, 접합(_앞, _뒤, [1,2,3]), _나눔들).",  # every split
+            "모두찾기(_뒤, 접합([1|_], _뒤, [1,2,3]), _뒤들).",
+            "접합([x|_], _, [1,2]).",  # the known prefix must match
         ]
 
         stdout, stderr, returncode = self.run_prolog_commands(commands)
@@ -72,6 +77,13 @@ class TestKProlog(unittest.TestCase):
         self.assertIn("_엑스 = [1, 2]", stdout)
         self.assertIn("_엑스 = [3, 4]", stdout)
         self.assertIn("거짓", stdout)
+        self.assertIn("_앞 = [1, 2]", stdout)
+        self.assertIn("_꼬리 = [2]", stdout)
+        self.assertIn(
+            "_나눔들 = [[]+[1, 2, 3], [1]+[2, 3], [1, 2]+[3], [1, 2, 3]+[]]",
+            stdout,
+        )
+        self.assertIn("_뒤들 = [[2, 3], [3], []]", stdout)
 
     def test_list_length(self):
         commands = ["길이([1,2,3], _엑스).", "길이(_리스트, 4)."]
@@ -141,6 +153,7 @@ class TestKProlog(unittest.TestCase):
             "정렬([a,c,b,a], _결과6).",  # Testing sort with atoms and duplicates
             "정렬([3,1,4,1,5], [1,3,4,5]).",  # Testing sort with expected result (should succeed)
             "정렬([3,1,4,1,5], [1,1,3,4,5]).",  # Testing sort with wrong expected result (should fail)
+            "정렬([b, 2, f(a), 1.0, a, 2], _결과7).",  # Testing sort with mixed types in standard order
         ]
 
         stdout, stderr, returncode = self.run_prolog_commands(commands)
@@ -161,6 +174,26 @@ class TestKProlog(unittest.TestCase):
         self.assertIn(
             "_결과6 = [a, b, c]", stdout
         )  # Atoms sorted with duplicates removed
+        self.assertIn("_결과7 = [1.0, 2, a, b, f(a)]", stdout)
+
+    def test_subtract_memberchk(self):
+        commands = [
+            "원소제거([1,2,3,4,2], [2,4], _결과).",  # Testing subtract with ground elements
+            "원소제거([f(1),g(2)], [f(_)], _결과2).",  # Testing subtract with a pattern to unify
+            "원소점검(_엑스, [a,b,c]).",  # Testing memberchk commits to the first match
+            "원소점검(d, [a,b,c]).",  # Testing memberchk with missing element, should fail
+            "순열([1,2,2,3], [2,3,1,2]).",  # Testing permutation check of two bound lists
+            "순열([1,2,2], [1,1,2]).",  # Testing permutation with different counts, should fail
+        ]
+
+        stdout, stderr, returncode = self.run_prolog_commands(commands)
+
+        self.assertIn("_결과 = [1, 3]", stdout)
+        self.assertIn("_결과2 = [g(2)]", stdout)
+        self.assertIn("_엑스 = a", stdout)
+        self.assertNotIn("_엑스 = b", stdout)
+        self.assertIn("참", stdout)
+        self.assertIn("거짓", stdout)
 
     def test_keysort(self):
         commands = [
@@ -304,6 +337,25 @@ class TestKProlog(unittest.TestCase):
             "_집합 = [1, 2|", stdout
         )  # Variable set unifies with subset with tail
 
+    def test_ord_sets(self):
+        commands = [
+            "서열집합([c, a, b, a, 2, 1.5], _집합).",  # Sorted in standard order, duplicates removed
+            "서열합집합([1, 3, 5], [2, 3, 4], _합).",
+            "서열교집합([1, 3, 5], [2, 3, 5], _교).",
+            "서열차집합([1, 2, 3, 4], [2, 4], _차).",
+            "서열원소점검(3, [1, 2, 3]).",  # Testing ord_memberchk (should succeed)
+            "서열원소점검(f(a), [1, a, f(b)]).",  # Testing ord_memberchk (should fail)
+        ]
+
+        stdout, stderr, returncode = self.run_prolog_commands(commands)
+
+        self.assertIn("_집합 = [1.5, 2, a, b, c]", stdout)
+        self.assertIn("_합 = [1, 2, 3, 4, 5]", stdout)
+        self.assertIn("_교 = [3, 5]", stdout)
+        self.assertIn("_차 = [1, 3]", stdout)
+        self.assertIn("참", stdout)
+        self.assertIn("거짓", stdout)
+
     def test_select(self):
         commands = [
             "선택(10, [1, 2, 3], _나머지).",  # Testing element not in list (should fail)
@@ -351,6 +403,73 @@ class TestKProlog(unittest.TestCase):
             "_나머지6 = [1, 1]", stdout
         )  # Remove first of three identical elements
 
+    def test_assoc(self):
+        content = """
+        채우기(0, _연관, _연관).
+        채우기(_엔, _연관0, _연관) :-
+            _엔 > 0,
+            연관넣기(_엔, _연관0, 값, _연관1),
+            _엠 := _엔 - 1,
+            채우기(_엠, _연관1, _연관).
+        """
+        self.create_test_file("연관.kpl", content)
+
+        commands = [
+            "[연관].",
+            "빈연관(_빈).",  # Testing empty_assoc
+            "빈연관(_에이), 연관넣기(b, _에이, 2, _비), 연관넣기(a, _비, 1, _씨), 연관리스트(_씨, _쌍들).",
+            "리스트연관([c-3, a-1, b-2], _티), 연관찾기(b, _티, _값).",  # Testing lookup
+            "리스트연관([c-3, a-1], _티), 연관찾기(z, _티, _값).",  # Missing key should fail
+            "빈연관(_에이), 채우기(7, _에이, _티), 연관키(_티, _키들).",  # Rebalancing on ascending inserts
+        ]
+
+        stdout, stderr, returncode = self.run_prolog_commands(commands)
+
+        self.assertIn("_빈 = t", stdout)
+        self.assertIn("_쌍들 = [a-1, b-2]", stdout)
+        self.assertIn("_값 = 2", stdout)
+        self.assertIn("거짓", stdout)
+        self.assertIn("_키들 = [1, 2, 3, 4, 5, 6, 7]", stdout)
+        self.assertIn("_티 = t(4, 값, =, t(2, 값, =,", stdout)
+
+    def test_indexed_access(self):
+        content = """
+        색(빨강).
+        색(초록).
+        색(파랑).
+        """
+        self.create_test_file("색.kpl", content)
+
+        commands = [
+            "[색].",
+            "모두찾기(_엑스, 색(_엑스), _엘), 길이(_엘, _엔).",
+            "모두찾기(_엑스, 색(_엑스), _엘), 번째0(2, _엘, _이).",
+            "모두찾기(_엑스, 색(_엑스), _엘), 번째(1, _엘, _일).",
+            "모두찾기(_엑스, 색(_엑스), _엘), 마지막(_엘, _끝).",
+            "모두찾기(_엑스, 색(_엑스), _엘), 번째(_위치, _엘, 초록).",
+            "번째0(5, [a, b], _없음).",  # Out of range should fail
+            "모두찾기(_아이-_이, 번째0(_아이, [a, b], _이), _쌍0).",
+            "모두찾기(_아이-_이, 번째(_아이, [a, b], _이), _쌍1).",
+            "모두찾기(_엘, 제한(2, 마지막(_엘, x)), _끝들).",
+            "모두찾기(_티, 제한(2, 마지막([a|_티], _)), _꼬리들).",
+            "모두찾기(_아이, 제한(2, 번째0(_아이, [a|_], x)), _위치들).",
+        ]
+
+        stdout, stderr, returncode = self.run_prolog_commands(commands)
+
+        self.assertIn("_엔 = 3", stdout)
+        self.assertIn("_이 = 파랑", stdout)
+        self.assertIn("_일 = 빨강", stdout)
+        self.assertIn("_끝 = 파랑", stdout)
+        self.assertIn("_위치 = 2", stdout)
+        self.assertIn("거짓", stdout)
+        # unbound arguments are enumerated, lazily for an open list
+        self.assertIn("_쌍0 = [0-a, 1-b]", stdout)
+        self.assertIn("_쌍1 = [1-a, 2-b]", stdout)
+        self.assertRegex(stdout, r"_끝들 = \[\[x\], \[_\w+, x\]\]")
+        self.assertRegex(stdout, r"_꼬리들 = \[\[\], \[_\w+\]\]")
+        self.assertIn("_위치들 = [1, 2]", stdout)
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
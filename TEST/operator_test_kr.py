@@ -447,6 +447,164 @@ class TestKProlog(unittest.TestCase):
         )  # some opaque reference struct, e.g. $ref(...)
         self.assertIn("R2 =", stdout)
 
+    def test_record_order_and_index(self):
+        content = """
+        기록하기 :-
+            레코드기록(k, f(a, 1), _),
+            레코드끝기록(k, f(b, 2), _),
+            레코드기록(k, f(a, 0), R),
+            레코드끝기록(k, f(_, 3), _),
+            지우기(R).
+        """
+        self.create_test_file("record_index.kpl", content)
+
+        commands = [
+            "[record_index].",
+            "기록하기.",
+            "모두찾기(_엑스, 레코드(k, f(_엑스, _), _), _모두).",
+            "모두찾기(_와이, 레코드(k, f(a, _와이), _), _에이).",
+            "모두찾기(_와이, 레코드(k, f(b, _와이), _), _비).",
+        ]
+
+        stdout, stderr, returncode = self.run_prolog_commands(commands)
+
+        self.assertIn("_모두 = [a, b, _", stdout)
+        self.assertIn("_에이 = [1, 3]", stdout)
+        self.assertIn("_비 = [2, 3]", stdout)
+
+    def test_hash_table(self):
+        content = """
+        되돌리기(_H, _V) :- 해시넣기(_H, k, 1), 포기.
+        되돌리기(_H, _V) :- 해시찾기(_H, k, _V).
+        되돌리기(_H, 없음).
+        영구넣기(_H) :- 해시영구넣기(_H, k, 2), 포기.
+        영구넣기(_H).
+        세며비교(_H, _O, _A, _B) :- 해시넣기(_H, _A, 1), 비교(_O, _A, _B).
+        """
+        self.create_test_file("hash_table.kpl", content)
+
+        commands = [
+            "[hash_table].",
+            "해시생성(_H), 해시넣기(_H, f(a), 1), 해시넣기(_H, b, 2), 해시찾기(_H, f(a), _값), 해시크기(_H, _크기).",
+            "해시생성(_H), 되돌리기(_H, _되돌린값).",  # ht_put is undone on backtracking
+            "해시생성(_H), 영구넣기(_H), 해시찾기(_H, k, _영구값).",  # nb_ht_put survives backtracking
+            "해시생성(_H), 해시넣기(_H, a, 1), 해시삭제(_H, a, _삭제값), 해시쌍들(_H, _쌍들).",
+            "해시생성(_H), 해시넣기(_H, f(_X), 1).",  # Non-ground key is an instantiation error
+            # a nested search takes its ht_put updates with it when it ends
+            "해시생성(_H), 논리부정((해시넣기(_H, k, 1), 포기)), 해시크기(_H, _부정후).",
+            "해시생성(_H), 모두찾기(x, 해시넣기(_H, k, 1), _L), 해시크기(_H, _찾기후).",
+            "해시생성(_H), forall(해시넣기(_H, k, 1), 해시크기(_H, 1)), 해시크기(_H, _모두후).",
+            # but not when a cut commits to its answer
+            "해시생성(_H), 제한(1, 해시넣기(_H, k, 1)), !, 해시크기(_H, _컷후).",
+            # a condition or branch that is committed to keeps its updates
+            "해시생성(_H), (true -> 해시넣기(_H, k, 1) ; true), 해시크기(_H, _분기후).",
+            "해시생성(_H), (해시넣기(_H, k, 1) -> true ; true), 해시크기(_H, _조건후).",
+            "해시생성(_H), 술어정렬(세며비교(_H), [b, a, c], _), 해시크기(_H, _정렬후).",
+        ]
+
+        stdout, stderr, returncode = self.run_prolog_commands(commands)
+
+        self.assertIn("_값 = 1", stdout)
+        self.assertIn("_크기 = 2", stdout)
+        self.assertIn("_되돌린값 = 없음", stdout)
+        self.assertIn("_영구값 = 2", stdout)
+        self.assertIn("_삭제값 = 1", stdout)
+        self.assertIn("_쌍들 = []", stdout)
+        self.assertIn("인수가 충분히 실체화되지 않았습니다", stderr)
+        self.assertIn("_부정후 = 0", stdout)
+        self.assertIn("_찾기후 = 0", stdout)
+        self.assertIn("_모두후 = 0", stdout)
+        self.assertIn("_컷후 = 1", stdout)
+        self.assertIn("_분기후 = 1", stdout)
+        self.assertIn("_조건후 = 1", stdout)
+        self.assertIn("_정렬후 = 2", stdout)
+
+    def test_standard_order(self):
+        content = """
+        역순(_순서, _에이, _비) :- 비교(_순서, _비, _에이).
+        """
+        self.create_test_file("standard_order.kpl", content)
+
+        commands = [
+            "[standard_order].",
+            "비교(_순서, 1, a).",  # Testing numbers before atoms
+            "f(_엑스) == f(_엑스).",  # Testing identity of variables
+            "_엑스 \\== _와이.",  # Testing distinct variables
+            "f(b) @< f(a, b).",  # Testing arity before name
+            "모두정렬([c, 1, b, 1, f(x), 2.0], _엠).",  # Testing msort keeps duplicates
+            "정렬(0, @>=, [1, 3, 2, 3], _내림).",  # Testing sort/4 descending with duplicates
+            "정렬(2, @<, [f(1, b), f(2, a), f(3, b)], _키).",  # Testing sort/4 on an argument
+            "키정렬([b-1, a-2, b-0, 1-x], _쌍).",  # Testing keysort is stable
+            "술어정렬(역순, [3, 1, 2, 1], _역).",  # Testing predsort drops equal elements
+        ]
+
+        stdout, stderr, returncode = self.run_prolog_commands(commands)
+
+        self.assertIn("_순서 = <", stdout)
+        self.assertNotIn("거짓", stdout)
+        self.assertIn("_엠 = [1, 1, 2.0, b, c, f(x)]", stdout)
+        self.assertIn("_내림 = [3, 3, 2, 1]", stdout)
+        self.assertIn("_키 = [f(2, a), f(1, b)]", stdout)
+        self.assertIn("_쌍 = [1-x, a-2, b-1, b-0]", stdout)
+        self.assertIn("_역 = [3, 2, 1]", stdout)
+
+    def test_exact_arithmetic(self):
+        commands = [
+            "_큰 := 2 ** 100 + 1.",  # past 2^53 integers stay exact
+            "_반 := 7 / 2.",  # inexact integer division gives a float
+            "_실 := 2.0 * 3.",
+            "_거듭 := 2 ^ 3 ^ 2.",  # right associative
+            "_몫 := -7 // 2.",  # truncates toward zero
+            "_내림몫 := -7 div 2.",
+            "_나머 := -7 rem 2.",
+            "_최대 := gcd(12, 18).",
+            "_비트 := msb(1000).",
+            "_밀기 := (1 << 3) \\/ (5 /\\ 3).",
+            "_유리 := 1 rdiv 3, _다시 := _유리 * 3.",
+            "_영 := 0 ** -1.",  # an error, not a crash of the REPL
+            "(_뒤 := 0.0 ** -1 ; _뒤 = 계속).",
+        ]
+
+        stdout, stderr, returncode = self.run_prolog_commands(commands)
+
+        self.assertIn("_큰 = 1267650600228229401496703205377", stdout)
+        self.assertIn("_반 = 3.5", stdout)
+        self.assertIn("_실 = 6.0", stdout)
+        self.assertIn("_거듭 = 512", stdout)
+        self.assertIn("_몫 = -3", stdout)
+        self.assertIn("_내림몫 = -4", stdout)
+        self.assertIn("_나머 = -1", stdout)
+        self.assertIn("_최대 = 6", stdout)
+        self.assertIn("_비트 = 9", stdout)
+        self.assertIn("_밀기 = 9", stdout)
+        self.assertIn("_유리 = 1r3", stdout)
+        self.assertIn("_다시 = 1", stdout)
+        self.assertIn("0으로 나누기", stderr)
+        self.assertIn("_뒤 = 계속", stdout)
+
+    def test_arithmetic_functions(self):
+        commands = [
+            "_절대 := abs(-3).",
+            "_큰쪽 := max(2, 7) - min(2, 7).",
+            "_근 := sqrt(16).",
+            "_바닥 := floor(2.7) + ceiling(2.1).",
+            "_반올림 := round(-2.5).",
+            "_각 := atan2(0, 1) + sign(-4).",
+            "_무작위 := random(10), _무작위 < 10.",
+            "_오류 := foo(1).",
+        ]
+
+        stdout, stderr, returncode = self.run_prolog_commands(commands)
+
+        self.assertIn("_절대 = 3", stdout)
+        self.assertIn("_큰쪽 = 5", stdout)
+        self.assertIn("_근 = 4.0", stdout)
+        self.assertIn("_바닥 = 5", stdout)
+        self.assertIn("_반올림 = -3", stdout)
+        self.assertIn("_각 = -1.0", stdout)
+        self.assertIn("_무작위 = ", stdout)
+        self.assertIn("알 수 없는 연산자: foo", stderr)
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -38,9 +38,9 @@ class TestKProlog(unittest.TestCase):
             f.write(content)
         return filepath
 
-    def run_prolog_commands(self, commands, timeout=10):
+    def run_prolog_commands(self, commands, timeout=10, args=()):
         process = subprocess.Popen(
-            [self.interpreter_path, self.main_script],
+            [self.interpreter_path, self.main_script, *args],
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -616,6 +616,26 @@ class TestKProlog(unittest.TestCase):
 
         self.assertIn("참", stdout)
 
+    def test_forall_infinite_generator(self):
+        content = """
+            자연수(0).
+            자연수(_엔) :- 자연수(_엠), _엔 is _엠 + 1.
+            작다(_엑스) :- _엑스 < 20.
+        """
+
+        self.create_test_file("forall_infinite.kpl", content)
+
+        # the generator never ends, so this only fails if the first
+        # counterexample stops the search
+        commands = [
+            "[forall_infinite].",
+            "모두만족(자연수(_엑스), 작다(_엑스)).",
+        ]
+
+        stdout, stderr, returncode = self.run_prolog_commands(commands)
+
+        self.assertIn("거짓", stdout)
+
     def test_maplist_binding(self):
         commands = [
             "maplist(=, [1, 2], [1, 2]).",
@@ -712,6 +732,526 @@ class TestKProlog(unittest.TestCase):
             "_차이결과 = [3, 3, 2]", stdout
         )  # [5,4,3] - [2,1,1] = [3,3,2]
 
+    def test_aggregate_all(self):
+        content = """
+            판매(서울, 3).
+            판매(부산, 5).
+            판매(서울, 4).
+        """
+        self.create_test_file("집계.kpl", content)
+
+        commands = [
+            "[집계].",
+            "모두집계(개수, 판매(_, _), _개수).",  # Count
+            "모두집계(합계(_엔), 판매(_, _엔), _합).",  # Sum
+            "모두집계(최대(_엔, _도시), 판매(_도시, _엔), _최대).",  # Max with witness
+            "모두집계(고유모음(_도시), 판매(_도시, _), _도시들).",  # Set
+            "모두집계(최소(_엔), 판매(대구, _엔), _없음).",  # Min of nothing fails
+            "모두집계(합계(_엔), _도시, 판매(_도시, _엔), _소계).",  # Grouped sum
+            ";",
+        ]
+
+        stdout, stderr, returncode = self.run_prolog_commands(commands)
+
+        self.assertIn("_개수 = 3", stdout)
+        self.assertIn("_합 = 12", stdout)
+        self.assertIn("_최대 = 최대(5, 부산)", stdout)
+        self.assertIn("_도시들 = [부산, 서울]", stdout)
+        self.assertIn("거짓", stdout)
+        self.assertIn("_도시 = 부산\n_소계 = 5", stdout)
+        self.assertIn("_도시 = 서울\n_소계 = 7", stdout)
+
+    def test_solution_modifiers(self):
+        content = """
+            값(3).
+            값(1).
+            값(2).
+            값(1).
+            자연수(0).
+            자연수(_엔) :- 자연수(_엠), _엔 := _엠 + 1.
+        """
+        self.create_test_file("수정자.kpl", content)
+
+        commands = [
+            "[수정자].",
+            "모두찾기(_엑스, 제한(2, 값(_엑스)), _처음).",  # limit
+            "모두찾기(_엑스, 건너뛰기(2, 값(_엑스)), _나머지).",  # offset
+            "모두찾기(_엑스, 중복제거(값(_엑스)), _고유).",  # distinct
+            "모두찾기(_엑스, 정렬기준([desc(_엑스)], 값(_엑스)), _내림).",  # order_by
+            "모두찾기(_엘, 몇개찾기(3, _엑스, 값(_엑스), _엘), _조각).",  # findnsols
+            "모두찾기(_엑스, 제한(3, 자연수(_엑스)), _무한).",  # limit stops an infinite search
+        ]
+
+        stdout, stderr, returncode = self.run_prolog_commands(commands)
+
+        self.assertIn("_처음 = [3, 1]", stdout)
+        self.assertIn("_나머지 = [2, 1]", stdout)
+        self.assertIn("_고유 = [3, 1, 2]", stdout)
+        self.assertIn("_내림 = [3, 2, 1, 1]", stdout)
+        self.assertIn("_조각 = [[3, 1, 2], [1]]", stdout)
+        self.assertIn("_무한 = [0, 1, 2]", stdout)
+
+    def test_integer_generators(self):
+        commands = [
+            "이내(1, 무한, _엑스).",  # only the answers asked for are made
+            ";",
+            "x",
+            "이내(1, inf, 1000000000).",
+            "이내(3, 1, _와이).",
+            "모두찾기(_엔, 제한(3, 이내(1, 10000000, _엔)), _앞).",
+            "수목록(1, 4, _목록).",
+            "다음수(_전, 4).",
+            "다음수(0, 0).",
+            "덧셈(2, _더할, 7).",
+        ]
+
+        stdout, stderr, returncode = self.run_prolog_commands(commands)
+
+        self.assertIn("_엑스 = 1_엑스 = 2", stdout)
+        self.assertNotIn("_엑스 = 3", stdout)
+        self.assertIn("참", stdout)
+        self.assertIn("거짓", stdout)
+        self.assertIn("_앞 = [1, 2, 3]", stdout)
+        self.assertIn("_목록 = [1, 2, 3, 4]", stdout)
+        self.assertIn("_전 = 3", stdout)
+        self.assertIn("_더할 = 5", stdout)
+
+    def test_higher_order(self):
+        content = """
+            더하기(_엑스, _와이, _지) :- _지 := _엑스 + _와이.
+            짝수(_엑스) :- 0 =:= _엑스 나머지 2.
+            고르기(_엑스) :- 원소(_엑스, [a, b]).
+        """
+        self.create_test_file("고차.kpl", content)
+
+        commands = [
+            "[고차].",
+            "호출(더하기(1), 2, _합).",  # call/N adds arguments to a closure
+            "maplist(더하기(10), [1, 2, 3], _열).",  # maplist with a closure
+            "maplist(더하기, [1, 2], [3, 4], [_가, _나]).",  # maplist/4
+            "접기(더하기, [1, 2, 3], 0, _총합).",  # foldl
+            "포함(짝수, [1, 2, 3, 4], _짝).",  # include
+            "제외(짝수, [1, 2, 3, 4], _홀).",  # exclude
+            "분할(짝수, [1, 2, 3, 4], _안, _밖).",  # partition
+            "포함(고르기, [_, c, _], _골라).",  # a test keeps its first answer
+            "모두찾기(_엘, 포함(고르기, [_], _엘), _고른것들).",
+            "모두찾기(_엘, maplist(고르기, [_, _]), _엘들).",
+            "모두찾기(_엘, 제한(3, maplist(고르기, _엘)), _목록들).",  # open list
+            "수목록(1, 50000, _긴), maplist(integer, _긴), 길이(_긴, _긴길이).",
+            "maplist(=, [1, 2 | _꼬리], [_, _, c]).",  # partial list
+        ]
+
+        stdout, stderr, returncode = self.run_prolog_commands(commands)
+
+        self.assertIn("_합 = 3", stdout)
+        self.assertIn("_열 = [11, 12, 13]", stdout)
+        self.assertIn("_가 = 4", stdout)
+        self.assertIn("_나 = 6", stdout)
+        self.assertIn("_총합 = 6", stdout)
+        self.assertIn("_짝 = [2, 4]", stdout)
+        self.assertIn("_홀 = [1, 3]", stdout)
+        self.assertIn("_안 = [2, 4]", stdout)
+        self.assertIn("_밖 = [1, 3]", stdout)
+        self.assertIn("_골라 = [a, a]", stdout)
+        self.assertIn("_고른것들 = [[a]]", stdout)
+        self.assertIn("_목록들 = [[], [a], [b]]", stdout)
+        self.assertIn("_긴길이 = 50000", stdout)
+        self.assertIn("_꼬리 = [c]", stdout)
+
+    def test_operator_syntax(self):
+        content = """
+            % 주석과 /* 블록 주석 */ 사이의 절
+            색(_엑스) :- _엑스 = 빨강 ; _엑스 = '파란 색'.
+            부호(_엔, _결과) :- ( _엔 < 0 -> _결과 = 음 ; _결과 = 양 ).
+            빨강아님(_엑스) :- \\+ _엑스 = 빨강.
+            좌표(-1, -2).
+            버전(http_version(1_1), 1_000_000).
+        """
+        self.create_test_file("연산자.kpl", content)
+
+        commands = [
+            "[연산자].",
+            "모두찾기(_엑스, 색(_엑스), _색들).",  # disjunction in a body
+            "부호(-5, _가).",  # if-then-else
+            "빨강아님(파랑).",  # \\+ as a prefix operator
+            "좌표(_엑스, _와이), _합 is _엑스 + _와이 * -3.",  # negative literals
+            "_식 = (1 - 2 - 3), _식 = -(_왼, 3).",  # yfx is left-associative
+            "_답 is 2 ** -1 + 2 ^ 3 ^ 2.",
+            "버전(_버, _큰).",  # digit groups
+            "_식 = (_가 #= 1 + 2).",  # clpfd comparisons are operators
+        ]
+
+        stdout, stderr, returncode = self.run_prolog_commands(commands)
+
+        self.assertIn("_색들 = [빨강, '파란 색']", stdout)
+        self.assertIn("_가 = 음", stdout)
+        self.assertIn("참", stdout)
+        self.assertIn("_합 = 5", stdout)
+        self.assertIn("_왼 = 1-2", stdout)
+        self.assertIn("_답 = 512.5", stdout)
+        self.assertIn("_버 = http_version(11)", stdout)
+        self.assertIn("_큰 = 1000000", stdout)
+        self.assertIn("_식 = #=(_가, 1+2)", stdout)
+
+    def test_streamed_file_loading(self):
+        content = "".join(f"번호({i}, '항목. {i}').\n" for i in range(3000))
+        content += """
+            /* 마침표. 가 들어 있는 주석 */
+            끝번호(_엑스) :-
+                번호(_엑스, _),
+                _엑스 >= 2999.
+            :- 쓰기(적재중), nl.
+        """
+        self.create_test_file("큰파일.kpl", content)
+        self.create_test_file("깨진파일.kpl", "좋음.\n\n나쁨(.\n")
+
+        commands = [
+            "[큰파일].",
+            "번호(1500, _이름).",
+            "끝번호(_끝).",
+            "[깨진파일].",
+        ]
+
+        stdout, stderr, returncode = self.run_prolog_commands(commands)
+
+        self.assertIn("적재중", stdout)
+        self.assertIn("_이름 = '항목. 1500'", stdout)
+        self.assertIn("_끝 = 2999", stdout)
+        self.assertIn("라인 3", stderr)
+
+    def test_clause_cache(self):
+        content = """
+            부모(철수, 영희).
+            부모(영희, [민수, _]).
+            조상(_엑스, _와이) :- 부모(_엑스, _와이) ; 부모(_엑스, _지), 조상(_지, _와이).
+            :- 쓰기(지시문), nl.
+        """
+        filepath = self.create_test_file("캐시.kpl", content)
+        commands = ["[캐시].", "모두찾기(_와이, 조상(철수, _와이), _들)."]
+
+        stdout1, stderr1, returncode1 = self.run_prolog_commands(commands)
+        self.assertTrue(os.path.exists(filepath + "c"))
+        stdout2, stderr2, returncode2 = self.run_prolog_commands(commands)
+
+        # a damaged cache is ignored and rewritten
+        with open(filepath + "c", "wb") as f:
+            f.write(b"\x00")
+        stdout3, stderr3, returncode3 = self.run_prolog_commands(commands)
+
+        self.assertIn("_들 = [영희, [민수, ", stdout1)
+        self.assertIn("지시문", stdout1)
+        self.assertEqual(stdout1, stdout2)
+        self.assertEqual(stdout1, stdout3)
+
+    def test_incremental_make(self):
+        from CONSOLE.repl import parse_file_multiline, reload_source
+        from PARSER.Data.recorded import RecordedDB
+        from UTIL.debug import DebugState
+
+        filepath = self.create_test_file(
+            "증분.kpl", "색(빨강).\n색(파랑).\n크기(큼).\n:- 초기화(nl).\n"
+        )
+        debug_state = DebugState(RecordedDB())
+        program, pending = parse_file_multiline(filepath, debug_state)
+        sizes = program.clauses("크기", 1)
+
+        with open(filepath, "a", encoding="utf-8") as f:
+            f.write("색(초록).\n모양(원).\n")
+        pending = reload_source(program, filepath, debug_state)
+
+        colours = [str(c[0]) for c in program.clauses("색", 1)]
+        self.assertEqual(colours, ["색(빨강)", "색(파랑)", "색(초록)"])
+        self.assertEqual(len(program.clauses("모양", 1)), 1)
+        # the unchanged predicate is kept as it was
+        self.assertIs(program.clauses("크기", 1), sizes)
+        # initialization goals run again after the reload
+        self.assertEqual([str(g) for g in pending], ["nl"])
+
+        with open(filepath, "w", encoding="utf-8") as f:
+            f.write("색(빨강).\n")
+        reload_source(program, filepath, debug_state)
+        self.assertEqual(len(program.clauses("색", 1)), 1)
+        self.assertEqual(program.clauses("크기", 1), [])
+
+    def test_parallel_consult(self):
+        from CONSOLE.repl import parse_files
+        from PARSER.Data.recorded import RecordedDB
+        from UTIL.debug import DebugState
+
+        paths = [
+            self.create_test_file(
+                f"조각{i}.kpl", f"항목({i}, 가).\n항목({i}, 나).\n"
+            )
+            for i in range(4)
+        ]
+        self.create_test_file("깨진조각.kpl", "항목(9, 가).\n나쁨(.\n")
+
+        program, pending = parse_files(paths, DebugState(RecordedDB()), jobs=2)
+        items = [str(c[0]) for c in program.clauses("항목", 2)]
+        self.assertEqual(
+            items, [f"항목({i},{x})" for i in range(4) for x in "가나"]
+        )
+        # the worker processes wrote each file's cache
+        self.assertTrue(all(os.path.exists(p + "c") for p in paths))
+
+        commands = [
+            "consult([조각0, 조각3]).",
+            "모두찾기(_번호, 항목(_번호, 가), _들).",
+            "[조각1, 깨진조각].",
+        ]
+        stdout, stderr, returncode = self.run_prolog_commands(commands)
+        self.assertIn("_들 = [0, 3]", stdout)
+        self.assertIn("라인 2", stderr)
+
+        # -j takes its count, so the files after it are still consulted
+        for args in (["-j", "2"], ["-j2"], ["--jobs=0"]):
+            stdout, stderr, returncode = self.run_prolog_commands(
+                ["모두찾기(_번호, 항목(_번호, 나), _들)."],
+                args=[*args, "조각0.kpl", "조각2.kpl"],
+            )
+            self.assertIn("_들 = [0, 2]", stdout)
+
+    def test_csv_load(self):
+        self.create_test_file(
+            "도시.csv",
+            "이름,영문,인구\n서울,Seoul,9700000\n부산,New York,3400000\n",
+        )
+        self.create_test_file("쌍.tsv", "가\t1\n나\t2\n")
+        self.create_test_file("깨진.csv", "가,1\n나\n")
+
+        commands = [
+            "csv_load('도시.csv', 도시, [header(true), index([1, 2])]).",
+            "도시(부산, _영문, _인구).",
+            "도시(_이름, 'New York', _).",
+            "표적재('쌍.tsv', 쌍, [types([atom, integer])]).",
+            "모두찾기(_가-_나, 쌍(_가, _나), _들).",
+            "csv_load('깨진.csv', 깨진, []).",
+            "깨진(가, 1).",  # a bad row imports nothing
+        ]
+        stdout, stderr, returncode = self.run_prolog_commands(commands)
+
+        self.assertIn("_영문 = 'New York'", stdout)
+        self.assertIn("_인구 = 3400000", stdout)
+        self.assertIn("_이름 = 부산", stdout)
+        self.assertIn("_들 = [가-1, 나-2]", stdout)
+        self.assertIn("라인 2", stderr)
+        self.assertIn("거짓", stdout)
+
+    def test_fact_table(self):
+        from CONSOLE.repl import parse_file_multiline
+        from PARSER.Data.recorded import RecordedDB
+        from PARSER.parser import parse_string
+        from SOLVER.solver import solve
+        from UTIL.debug import DebugState
+
+        facts = "".join(f"아버지(사람{i}, 사람{i // 3}).\n" for i in range(900))
+        filepath = self.create_test_file("가계.kpl", facts)
+        debug_state = DebugState(RecordedDB())
+        program, _ = parse_file_multiline(filepath, debug_state)
+        self.assertIn(("아버지", 2), program.tables)
+
+        def answers(query):
+            goals = parse_string(query)[0]
+            success, unifs = solve(program, goals, debug_state)
+            return [{k: str(v) for k, v in u.items()} for u in unifs]
+
+        self.assertEqual(
+            answers("아버지(사람600, _엑스)."), [{"_엑스": "사람200"}]
+        )
+        self.assertEqual(
+            [a["_와이"] for a in answers("아버지(_와이, 사람100).")],
+            ["사람300", "사람301", "사람302"],
+        )
+        self.assertEqual(answers("아버지(사람5, 사람9)."), [])
+        self.assertEqual(len(answers("아버지(_, _).")), 900)
+
+        # a clause that is not a ground fact turns the table back into clauses
+        program.insert_first(parse_string("아버지(_누구, 시조).")[0])
+        self.assertNotIn(("아버지", 2), program.tables)
+        self.assertEqual(
+            answers("아버지(사람3, _엑스)."),
+            [{"_엑스": "시조"}, {"_엑스": "사람1"}],
+        )
+
+        # a table made while the file loads unpacks for a later rule
+        facts = "".join(f"짝({i}, {i + 1}).\n" for i in range(600))
+        facts += "짝(_엑스, _엑스).\n짝(끝, 끝).\n"
+        filepath = self.create_test_file("짝.kpl", facts)
+        program, _ = parse_file_multiline(filepath, debug_state)
+        self.assertNotIn(("짝", 2), program.tables)
+        self.assertEqual(len(answers("짝(_, _).")), 602)
+        self.assertEqual(
+            answers("짝(599, _엑스)."), [{"_엑스": "600"}, {"_엑스": "599"}]
+        )
+
+    def test_fact_table_file(self):
+        from CONSOLE.repl import parse_files
+        from PARSER.Data.fact_file import MappedFactTable
+        from PARSER.Data.recorded import RecordedDB
+        from PARSER.parser import parse_string
+        from SOLVER.solver import solve
+        from UTIL.debug import DebugState
+
+        facts = "".join(f"아버지(사람{i}, 사람{i // 3}).\n" for i in range(900))
+        self.create_test_file("가계.kpl", facts)
+        self.create_test_file(
+            "목록.kpl", "".join(f"p({i}, [a, {i}], x, y).\n" for i in range(9))
+        )
+        self.create_test_file("nv.kpl", "nv(_X, 1).\nnv(b, 2).\n")
+        commands = [
+            "consult(가계).",
+            "사실표저장(아버지/2, '가계.kft').",
+            "consult(가계.kft).",
+            "아버지(사람600, _엑스).",
+            "fact_table_save(없음/2, '없음.kft').",
+            "consult(목록).",
+            "사실표저장(p/4, '목록.kft').",
+            "consult(목록.kft).",
+            # a list built by the query finds the list the file holds
+            "_T = [5], p(_N, [a|_T], _, _).",
+            "consult(nv).",
+            "fact_table_save(nv/2, 'nv.kft').",  # nv(_X, 1) is not ground
+        ]
+        stdout, stderr, returncode = self.run_prolog_commands(commands)
+        self.assertIn("_엑스 = 사람200", stdout)
+        self.assertIn("_N = 5", stdout)
+        self.assertFalse(os.path.exists(os.path.join(self.test_dir, "nv.kft")))
+
+        debug_state = DebugState(RecordedDB())
+        filepath = os.path.join(self.test_dir, "가계.kft")
+        program, _ = parse_files([filepath], debug_state)
+        self.assertIsInstance(program.tables[("아버지", 2)], MappedFactTable)
+
+        def answers(query):
+            goals = parse_string(query)[0]
+            success, unifs = solve(program, goals, debug_state)
+            return [{k: str(v) for k, v in u.items()} for u in unifs]
+
+        self.assertEqual(
+            [a["_와이"] for a in answers("아버지(_와이, 사람100).")],
+            ["사람300", "사람301", "사람302"],
+        )
+        self.assertEqual(answers("아버지(사람5, 사람9)."), [])
+        self.assertEqual(answers("아버지(사람5, 나그네)."), [])
+        self.assertEqual(len(answers("아버지(_, _).")), 900)
+
+        # the mapped file is read-only, so a new fact turns it into clauses
+        program.append(parse_string("아버지(사람900, 사람100).")[0])
+        self.assertNotIn(("아버지", 2), program.tables)
+        self.assertEqual(len(answers("아버지(_, 사람100).")), 4)
+
+        # an empty predicate still makes a file with no rows
+        program, _ = parse_files(
+            [os.path.join(self.test_dir, "없음.kft")], debug_state
+        )
+        self.assertEqual(len(program.tables[("없음", 2)]), 0)
+
+    def test_external_sqlite(self):
+        import sqlite3
+
+        connection = sqlite3.connect(os.path.join(self.test_dir, "거래.db"))
+        connection.execute(
+            "CREATE TABLE trades (id TEXT, company TEXT, qty INTEGER, price REAL)"
+        )
+        connection.executemany(
+            "INSERT INTO trades VALUES (?, ?, ?, ?)",
+            [
+                ("t1", "삼성", 10, 2.5),
+                ("t2", "New York", 10, 10.0),
+                ("t3", "삼성", 30, None),
+                ("t4", "t4", 40, 1.0),
+            ],
+        )
+        connection.execute("CREATE INDEX trades_company ON trades (company)")
+        connection.commit()
+        connection.close()
+        self.create_test_file(
+            "거래.kpl",
+            ":- external(거래/4, sqlite('거래.db', trades)).\n"
+            "대량(_번호) :- 거래(_번호, _, _수량, _), _수량 >= 30.\n",
+        )
+
+        commands = [
+            "consult(거래).",
+            "모두찾기(_번호, 거래(_번호, 삼성, _, _), _들).",
+            "거래(t2, _회사, _수량, _가격).",
+            "모두찾기(_번호, 대량(_번호), _대량).",
+            "거래(_번호, _, _, '$null$').",
+            "거래(_같음, _같음, _, _).",
+            "거래(t1, f(삼성), _, _).",
+            "모두찾기(_번호, 제한(1, 거래(_번호, _, 10, _)), _하나).",
+            "외부(없음/2, sqlite('없음.db', t)).",
+        ]
+        stdout, stderr, returncode = self.run_prolog_commands(commands)
+
+        self.assertIn("_들 = [t1, t3]", stdout)
+        self.assertIn("_회사 = 'New York'", stdout)
+        self.assertIn("_가격 = 10.0", stdout)
+        self.assertIn("_대량 = [t3, t4]", stdout)
+        self.assertIn("_번호 = t3", stdout)
+        self.assertIn("_같음 = t4", stdout)
+        self.assertIn("_하나 = [t1]", stdout)
+        self.assertIn("없음.db", stderr)
+
+    def test_saved_state(self):
+        facts = "".join(
+            f"아버지(사람{i}, 사람{i // 3}).\n" for i in range(1, 900)
+        )
+        self.create_test_file(
+            "가계.kpl",
+            facts + "조상(_가, _나) :- 아버지(_가, _나).\n"
+            "조상(_가, _나) :- 아버지(_가, _중), 조상(_중, _나).\n"
+            ":- initialization(recordz(설정, 모드(빠름), _)).\n",
+        )
+
+        stdout, stderr, returncode = self.run_prolog_commands(
+            [], args=["--save-state", "가계.qs", "가계.kpl"]
+        )
+        self.assertEqual(returncode, 0)
+        self.assertNotIn("?-", stdout)
+
+        commands = [
+            "모두찾기(_누구, 조상(사람800, _누구), _들).",
+            "recorded(설정, _값, _).",
+            "recordz(설정, 모드(느림), _).",
+            "상태저장('다시.qs').",
+        ]
+        stdout, stderr, returncode = self.run_prolog_commands(
+            commands, args=["--state", "가계.qs"]
+        )
+        self.assertIn(
+            "_들 = [사람266, 사람88, 사람29, 사람9, 사람3, 사람1, 사람0]",
+            stdout,
+        )
+        self.assertIn("_값 = 모드(빠름)", stdout)
+
+        stdout, stderr, returncode = self.run_prolog_commands(
+            ["모두찾기(_값, recorded(설정, _값, _), _값들)."],
+            args=["--state", "다시.qs"],
+        )
+        self.assertIn("_값들 = [모드(빠름), 모드(느림)]", stdout)
+
+        stdout, stderr, returncode = self.run_prolog_commands(
+            [], args=["--state", "가계.kpl"]
+        )
+        self.assertIn("가계.kpl", stderr)
+
+        # a table compacted from one file, then a later file's clauses for
+        # it still encoded from their cache
+        self.create_test_file(
+            "a.kpl", "".join(f"p({i}).\n" for i in range(600))
+        )
+        self.create_test_file("b.kpl", "p(1000).\n")
+        self.run_prolog_commands([], args=["b.kpl"])
+        self.run_prolog_commands(
+            [], args=["--save-state", "s", "a.kpl", "b.kpl"]
+        )
+        stdout, stderr, returncode = self.run_prolog_commands(
+            ["p(1000).", "모두집계(count, p(_), _몇)."], args=["--state", "s"]
+        )
+        self.assertIn("참", stdout)
+        self.assertIn("_몇 = 601", stdout)
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
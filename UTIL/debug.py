@@ -1,10 +1,13 @@
 class DebugState:
-    def __init__(self):
+    # recorded_db is the store recorda/recordz write to, given by the
+    # caller (see PARSER/Data/recorded.py)
+    def __init__(self, recorded_db):
         self.trace_mode = False
         self.call_depth = 0
         self.seq = 0
-        self.recorded_db = {}  # key:str -> list of (ref_id:int, term:Term)
-        self.recorded_counter = 0
+        self.recorded_db = recorded_db
+        self.hash_tables = {}  # handle id:int -> dict of ground key -> term
+        self.trail = []  # undo callbacks for backtrackable updates
 
 
 class DebugAbort(Exception):
@@ -1,6 +1,6 @@
 from typing import List
 
-from PARSER.ast import Struct, Term, Variable
+from PARSER.ast import ArrayList, Struct, Term, Variable
 
 
 def flatten_comma_structure(term: Term) -> List[Term]:
@@ -67,17 +67,18 @@ def format_list(term: Term, elements: List[str] = None) -> str:
     if elements is None:
         elements = []
 
-    if isinstance(term, Struct):
-        if term.name == "[]" and term.arity == 0:
+    # walk the spine in a loop; long lists would exhaust the recursion limit
+    while True:
+        if isinstance(term, ArrayList):
+            elements.extend(format_term(e) for e in term.elements())
             return "[" + ", ".join(elements) + "]"
-        elif term.name == "." and term.arity == 2:
-            head, tail = term.params
-            elements.append(format_term(head))
-            return format_list(tail, elements)
-        else:
-            tail_str = format_term(term)
-            return "[" + ", ".join(elements) + "|" + tail_str + "]"
-    else:
+        if isinstance(term, Struct):
+            if term.name == "[]" and term.arity == 0:
+                return "[" + ", ".join(elements) + "]"
+            elif term.name == "." and term.arity == 2:
+                head, term = term.params
+                elements.append(format_term(head))
+                continue
         tail_str = format_term(term)
         return "[" + ", ".join(elements) + "|" + tail_str + "]"
 
@@ -1,4 +1,6 @@
+import argparse
 import io
+import os
 import sys
 
 from CONSOLE.repl import execute
@@ -16,11 +18,30 @@ except Exception:
 
 
 def main() -> None:
-    if len(sys.argv) == 1:
-        execute([], "")
-    else:
-        kpl_file = sys.argv[1]
-        execute([], kpl_file)
+    parser = argparse.ArgumentParser(description="K-Prolog interpreter")
+    parser.add_argument("files", nargs="*", help="files to consult in order")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="parse the files in N processes (0 for one per core)",
+    )
+    parser.add_argument(
+        "--state",
+        metavar="FILE",
+        help="start from a state saved by qsave/1 or --save-state",
+    )
+    parser.add_argument(
+        "--save-state",
+        metavar="FILE",
+        help="consult the files, run their initialization goals, save the "
+        "resulting state to FILE and exit",
+    )
+    args = parser.parse_args()
+    jobs = args.jobs or os.cpu_count() or 1
+    execute([], args.files, jobs, args.state, args.save_state)
 
 
 if __name__ == "__main__":